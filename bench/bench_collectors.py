@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Per-collector and full build_dashboard latency/allocation benchmark on synthetic trees.
+
+    python3 bench/bench_collectors.py                       # 8/64/256 cores
+    python3 bench/bench_collectors.py --cores 256 --iterations 500 --json out.json
+
+Each configuration is generated with bench/fakeroot.py in a temporary directory.
+Latency is the median and p95 wall time per call. Allocations are the number of
+memory blocks (and bytes) still allocated or allocated at peak during one call,
+as seen by tracemalloc. The SMART collector is skipped because it needs real
+/dev nodes.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import myrktop
+from fakeroot import FakeRoot
+
+SKIP = {"smart"}
+
+# (cores, nics, disks, procs) per scale step
+SCALES = {8: (8, 2, 2, 100), 64: (64, 16, 32, 1000), 256: (256, 64, 128, 4000)}
+
+def measure(func, fake, iterations):
+    """Return (median_us, p95_us, alloc_blocks, peak_bytes) for func."""
+    func()  # warm up descriptors and rate baselines
+    timings = []
+    for _ in range(iterations):
+        fake.advance()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1e6)
+    fake.advance()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1], blocks, peak
+
+def full_dashboard():
+    for name, collector in myrktop.collectors.collectors.items():
+        if name not in SKIP:
+            collector.updated = None
+    myrktop.collectors.next_tick()
+    myrktop.build_dashboard()
+
+def run(cores, nics, disks, procs, iterations):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="myrktop-bench-") as root:
+        fake = FakeRoot(root, cores=cores, nics=nics, disks=disks, procs=procs)
+        fake.build()
+        myrktop.set_root(root)
+        for name, collector in myrktop.collectors.collectors.items():
+            if name in SKIP:
+                collector.updated = time.monotonic()
+                continue
+            results[name] = measure(collector.func, fake, iterations)
+        results["build_dashboard"] = measure(full_dashboard, fake, iterations)
+        myrktop.set_root("/")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cores", type=int, nargs="+", default=sorted(SCALES),
+                        help="core counts to benchmark (default: 8 64 256)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = parser.parse_args()
+    report = {}
+    for cores in args.cores:
+        _, nics, disks, procs = SCALES.get(cores, (cores, max(2, cores // 4), max(2, cores // 2), cores * 16))
+        results = run(cores, nics, disks, procs, args.iterations)
+        report[str(cores)] = {name: dict(zip(("median_us", "p95_us", "alloc_blocks", "peak_bytes"), r))
+                              for name, r in results.items()}
+        print(f"\n{cores} cores, {nics} NICs, {disks} block devices, {procs} processes")
+        print(f"{'collector':<18} {'median us':>10} {'p95 us':>10} {'blocks':>8} {'peak KiB':>9}")
+        for name, (median, p95, blocks, peak) in results.items():
+            print(f"{name:<18} {median:>10.1f} {p95:>10.1f} {blocks:>8d} {peak / 1024:>9.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""Generate synthetic /proc, /sys and /etc trees for running myrktop off-target.
+
+    python3 bench/fakeroot.py /tmp/rk-256 --cores 256 --nics 32 --disks 64
+    python3 myrktop.py --root /tmp/rk-256
+
+Files are rewritten in place by advance() (never replaced by rename) so that the
+descriptors myrktop keeps open keep seeing fresh contents, like real procfs.
+"""
+import argparse
+import os
+import random
+
+RK3588_FREQS = (408000, 1008000, 1416000, 1800000, 2256000, 2352000)
+GPU_FREQS = (300000000, 400000000, 600000000, 800000000, 1000000000)
+
+def write(root, path, text):
+    full = os.path.join(root, path.lstrip("/"))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(text)
+
+class FakeRoot:
+    """A synthetic board: `cores` CPUs, `nics` network interfaces, `disks` block devices,
+    `procs` processes and `containers` Docker containers."""
+    def __init__(self, root, cores=8, nics=2, disks=2, procs=100, seed=0, containers=3):
+        self.root = root
+        self.cores = cores
+        self.nics = nics
+        self.disks = disks
+        self.rng = random.Random(seed)
+        self.containers = {"%064x" % self.rng.getrandbits(256): [f"inference-{i}", 0, 0, 0]
+                           for i in range(containers)}
+        self.proc_ticks = {pid: [self.rng.randint(0, 10000), self.rng.randint(0, 10 ** 9)]
+                           for pid in range(100, 100 + procs)}
+        self.cpu_times = [[self.rng.randint(1000, 100000) for _ in range(8)] for _ in range(cores)]
+        self.net_bytes = [[self.rng.randint(0, 10 ** 9), self.rng.randint(0, 10 ** 9)] for _ in range(nics)]
+        self.disk_stats = [[self.rng.randint(0, 10 ** 6) for _ in range(11)] for _ in range(disks)]
+        self.uptime = 63000.0
+        self.policy_time = [dict.fromkeys(self.policy_freqs(cpus), 0) for cpus in self.policies()]
+        self.gpu_time = dict.fromkeys(GPU_FREQS, 0)
+        self.vmstat = {"pgfault": 10 ** 8, "pgmajfault": 10 ** 4, "pswpin": 1000, "pswpout": 2000,
+                       "pgscan_kswapd": 10 ** 6, "pgscan_direct": 10 ** 4, "pgsteal_kswapd": 9 * 10 ** 5,
+                       "pgsteal_direct": 9000, "allocstall_normal": 10, "allocstall_movable": 5}
+        self.cma_fail = 0
+        # (irq, description, cores it lands on); NIC and NPU interrupts all go to cpu0
+        self.irqs = [("11", "GICv3  27 Level     arch_timer", None),
+                     ("IPI0", "Rescheduling interrupts", None),
+                     ("IPI1", "Function call interrupts", None)]
+        self.irqs += [(str(40 + i), f"GICv3 {260 + i} Level     {nic}", [0]) for i, nic in enumerate(self.nic_names())]
+        self.irqs += [(str(60 + i), f"GICv3 {142 + i} Level     fdab0000.npu", [0]) for i in range(3)]
+        self.irqs += [(str(70 + i), f"ITS-MSI {i} Edge      {disk}", [i % cores])
+                      for i, disk in enumerate(self.disk_names()) if disk.startswith("nvme")]
+        self.irq_counts = {irq: [0] * cores for irq, _, _ in self.irqs}
+        self.softirq_counts = {name: [0] * cores for name in
+                               ("HI", "TIMER", "NET_TX", "NET_RX", "BLOCK", "IRQ_POLL", "TASKLET", "SCHED", "HRTIMER", "RCU")}
+
+    def disk_names(self):
+        names = []
+        for i in range(self.disks):
+            if i % 4 == 3:
+                names.append(f"nvme{i // 4}n1")
+            else:
+                names.append("sd" + (chr(ord("a") + i // 26 - 1) if i >= 26 else "") + chr(ord("a") + i % 26))
+        return names
+
+    def policies(self):
+        """cpufreq policies as CPU lists: RK3588's 4x A55 + 2x2 A76 clusters, repeated every 8 cores."""
+        layout = []
+        for base in range(0, self.cores, 8):
+            for first, count in ((0, 4), (4, 2), (6, 2)):
+                cpus = [c for c in range(base + first, base + first + count) if c < self.cores]
+                if cpus:
+                    layout.append(cpus)
+        return layout
+
+    def policy_freqs(self, cpus):
+        little = cpus[0] % 8 < 4
+        return [f for f in RK3588_FREQS if not little or f <= 1800000]
+
+    def partition_name(self, disk):
+        return disk + ("p1" if disk.startswith("nvme") else "1")
+
+    def nic_names(self):
+        return ["eth%d" % i for i in range(self.nics)]
+
+    def container_cgroup(self, cid):
+        return f"/sys/fs/cgroup/system.slice/docker-{cid}.scope"
+
+    def build(self):
+        """Write the static parts of the tree, then the first round of counters."""
+        w = lambda path, text: write(self.root, path, text)
+        w("/sys/firmware/devicetree/base/compatible", "rockchip,rk3588s-orangepi-5\x00rockchip,rk3588\x00")
+        w("/sys/kernel/debug/rknpu/version", "RKNPU driver: v0.9.8\n")
+        w("/run/docker.pid", "1\n")
+        w("/proc/1/stat", "1 (dockerd) S 0 1 1 0 -1 0 0 0 0 0 0 0 0 0 20 0 1 0 1 0 0\n")
+        fstab = ["# <file system> <mount point> <type> <options> <dump> <pass>",
+                 "UUID=0000 / ext4 defaults 0 1", "tmpfs /tmp tmpfs defaults 0 0"]
+        for name in self.disk_names():
+            w(f"/sys/block/{name}/size", "1953525168\n")
+            w(f"/sys/block/{name}/device/model", "FAKE DISK\n")
+            w(f"/sys/block/{name}/{self.partition_name(name)}/partition", "1\n")
+            fstab.append(f"/dev/{name}1 /media/{name} ext4 defaults 0 2")
+            os.makedirs(os.path.join(self.root, f"media/{name}"), exist_ok=True)
+        w("/etc/fstab", "\n".join(fstab) + "\n")
+        w("/proc/cpuinfo", "".join(f"processor\t: {i}\nCPU part\t: {'0xd05' if i % 8 < 4 else '0xd0b'}\n\n"
+                                   for i in range(self.cores)))
+        for cpus, freqs in zip(self.policies(), (list(t) for t in self.policy_time)):
+            base = f"/sys/devices/system/cpu/cpufreq/policy{cpus[0]}"
+            w(f"{base}/related_cpus", " ".join(map(str, cpus)) + "\n")
+            w(f"{base}/cpuinfo_max_freq", f"{max(freqs)}\n")
+            w(f"{base}/scaling_governor", "schedutil\n")
+        w("/sys/class/devfreq/fb000000.gpu/available_frequencies", " ".join(map(str, GPU_FREQS)) + "\n")
+        w("/sys/class/devfreq/fdab0000.npu/available_frequencies", " ".join(map(str, GPU_FREQS)) + "\n")
+        w("/sys/class/devfreq/fdab0000.npu/max_freq", f"{GPU_FREQS[-1]}\n")
+        w("/sys/class/devfreq/fb000000.gpu/governor", "performance\n")
+        w("/sys/class/devfreq/fdab0000.npu/governor", "rknpu_ondemand\n")
+        w("/sys/class/devfreq/fdab0000.npu/trans_stat", "".join(
+            f"  {f}:  0  {100 if f == GPU_FREQS[-1] else 0}\n" for f in GPU_FREQS))
+        for i, cpus in enumerate(self.policies()):
+            w(f"/sys/class/thermal/cooling_device{i}/type", f"cpufreq-cpu{cpus[0]}\n")
+        w(f"/sys/class/thermal/cooling_device{len(self.policies())}/type", "devfreq-fb000000.gpu\n")
+        w("/sys/fs/cgroup/cgroup.controllers", "cpuset cpu io memory pids\n")
+        w("/sys/fs/cgroup/system.slice/ssh.service/cpu.stat", "usage_usec 1000\n")
+        for i, cid in enumerate(self.containers):
+            w(f"{self.container_cgroup(cid)}/memory.max", "max\n" if i % 2 else f"{(i + 1) << 30}\n")
+        for nic in self.nic_names():
+            os.makedirs(os.path.join(self.root, f"sys/class/net/{nic}/device"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "sys/class/net/lo"), exist_ok=True)
+        hwmon_names = ["soc_thermal", "bigcore0_thermal", "bigcore1_thermal", "littlecore_thermal",
+                       "center_thermal", "gpu_thermal", "npu_thermal", "nvme"]
+        # Power monitors after the temperature sensors: a 3-channel INA3221 on the SoC rails,
+        # an INA226 on the board input and a USB-C power supply.
+        ina = f"/sys/class/hwmon/hwmon{len(hwmon_names)}"
+        w(f"{ina}/name", "ina3221\n")
+        for ch, label in enumerate(("vdd_npu", "vdd_gpu", "vdd_cpu_big"), 1):
+            w(f"{ina}/in{ch}_label", label + "\n")
+        w(f"/sys/class/hwmon/hwmon{len(hwmon_names) + 1}/name", "ina226\n")
+        for i, name in enumerate(hwmon_names):
+            w(f"/sys/class/hwmon/hwmon{i}/name", name + "\n")
+            w(f"/sys/class/thermal/thermal_zone{i}/type", name.replace("_", "-") + "\n")
+            w(f"/sys/class/thermal/thermal_zone{i}/trip_point_0_type", "passive\n")
+            w(f"/sys/class/thermal/thermal_zone{i}/trip_point_0_temp", "85000\n")
+            w(f"/sys/class/thermal/thermal_zone{i}/trip_point_1_type", "critical\n")
+            w(f"/sys/class/thermal/thermal_zone{i}/trip_point_1_temp", "115000\n")
+        for pid in self.proc_ticks:
+            self.write_proc(pid)
+        self.advance()
+
+    def write_proc(self, pid):
+        ticks, io = self.proc_ticks[pid]
+        write(self.root, f"/proc/{pid}/stat",
+              f"{pid} (worker-{pid}) S 1 {pid} {pid} 0 -1 4194560 100 0 0 0 {ticks // 2} {ticks - ticks // 2} "
+              f"0 0 20 0 1 0 {pid * 10} 123456789 {1000 + pid % 5000} 18446744073709551615\n")
+        write(self.root, f"/proc/{pid}/io", f"rchar: {io}\nwchar: {io // 2}\nread_bytes: {io // 4}\n"
+                                            f"write_bytes: {io // 8}\ncancelled_write_bytes: 0\n")
+
+    def advance(self, dt=0.5):
+        """Move every counter forward as if dt seconds had passed."""
+        w = lambda path, text: write(self.root, path, text)
+        rng = self.rng
+        self.uptime += dt
+        jiffies = int(dt * 100)
+        lines = []
+        for times in self.cpu_times:
+            busy = rng.randint(0, jiffies)
+            times[0] += busy // 2
+            times[2] += busy - busy // 2
+            times[3] += jiffies - busy
+        total = [sum(col) for col in zip(*self.cpu_times)]
+        lines.append("cpu  " + " ".join(str(v) for v in total) + " 0 0")
+        for i, times in enumerate(self.cpu_times):
+            lines.append(f"cpu{i} " + " ".join(str(v) for v in times) + " 0 0")
+        lines.append("intr 123456 0 0")
+        lines.append("ctxt 987654")
+        lines.append("btime 1700000000")
+        lines.append("processes 12345")
+        lines.append("procs_running 2")
+        lines.append("procs_blocked 0")
+        w("/proc/stat", "\n".join(lines) + "\n")
+        w("/proc/uptime", f"{self.uptime:.2f} {self.uptime * self.cores * 0.9:.2f}\n")
+        for i in range(self.cores):
+            w(f"/sys/devices/system/cpu/cpu{i}/cpufreq/scaling_cur_freq", f"{rng.choice(RK3588_FREQS)}\n")
+        w("/proc/meminfo", "MemTotal:       16183376 kB\n"
+                           f"MemFree:         {rng.randint(1000000, 9000000)} kB\n"
+                           f"MemAvailable:   {rng.randint(9000000, 14000000)} kB\n"
+                           "Buffers:          123456 kB\n"
+                           "Cached:          2345678 kB\n"
+                           "SwapTotal:       8388604 kB\n"
+                           "SwapFree:        8383484 kB\n"
+                           "CmaTotal:         131072 kB\n"
+                           f"CmaFree:          {rng.randint(0, 131072)} kB\n")
+        dev = ["Inter-|   Receive                                                |  Transmit",
+               " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed",
+               "    lo: 1000 10 0 0 0 0 0 0 1000 10 0 0 0 0 0 0"]
+        for nic, counters in zip(self.nic_names(), self.net_bytes):
+            counters[0] += rng.randint(0, 10 ** 6)
+            counters[1] += rng.randint(0, 10 ** 6)
+            dev.append(f"{nic:>6}: {counters[0]} 1000 0 0 0 0 0 0 {counters[1]} 1000 0 0 0 0 0 0")
+        w("/proc/net/dev", "\n".join(dev) + "\n")
+        diskstats = []
+        for i, (name, stats) in enumerate(zip(self.disk_names(), self.disk_stats)):
+            reads, writes = rng.randint(0, int(dt * 500)), rng.randint(0, int(dt * 500))
+            for field, inc in ((0, reads), (2, reads * 64), (3, reads // 5), (4, writes), (6, writes * 128),
+                               (7, writes // 2), (9, min(int(dt * 1000), (reads + writes) // 2)),
+                               (10, reads // 5 + writes // 2)):
+                stats[field] += inc
+            counters = " ".join(str(v) for v in stats)
+            diskstats.append(f"{8 if name.startswith('sd') else 259:4d} {16 * i:7d} {name} {counters} 0 0 0 0")
+            diskstats.append(f"{8 if name.startswith('sd') else 259:4d} {16 * i + 1:7d} "
+                             f"{self.partition_name(name)} {counters} 0 0 0 0")
+        w("/proc/diskstats", "\n".join(diskstats) + "\n")
+        for key in self.vmstat:
+            self.vmstat[key] += rng.randint(0, int(dt * (10000 if key == "pgfault" else 20)))
+        w("/proc/vmstat", "".join(f"{key} {value}\n" for key, value in self.vmstat.items()))
+        for resource in ("cpu", "memory", "io"):
+            avgs = [rng.random() * 5 for _ in range(3)]
+            some = " ".join(f"avg{w_}={a:.2f}" for w_, a in zip((10, 60, 300), avgs))
+            w(f"/proc/pressure/{resource}", f"some {some} total=123456\nfull {some} total=12345\n")
+        for cid, (name, usage, rbytes, wbytes) in self.containers.items():
+            usage += rng.randint(0, int(dt * 2e6))
+            rbytes += rng.randint(0, 10 ** 7)
+            wbytes += rng.randint(0, 10 ** 6)
+            self.containers[cid] = [name, usage, rbytes, wbytes]
+            base = self.container_cgroup(cid)
+            w(f"{base}/cpu.stat", f"usage_usec {usage}\nuser_usec {usage // 2}\nsystem_usec {usage - usage // 2}\n")
+            w(f"{base}/memory.current", f"{rng.randint(1 << 27, 1 << 30)}\n")
+            w(f"{base}/io.stat", f"259:0 rbytes={rbytes} wbytes={wbytes} rios=10 wios=5 dbytes=0 dios=0\n")
+            for resource in ("cpu", "memory", "io"):
+                some = " ".join(f"avg{w_}={rng.random() * 3:.2f}" for w_ in (10, 60, 300))
+                w(f"{base}/{resource}.pressure", f"some {some} total=1234\nfull {some} total=123\n")
+        for irq, description, targets in self.irqs:
+            counts = self.irq_counts[irq]
+            for cpu in targets if targets is not None else range(self.cores):
+                counts[cpu] += rng.randint(0, int(dt * (250 if targets is None else 3000)))
+        for name, counts in self.softirq_counts.items():
+            for cpu in range(self.cores):
+                heavy = name in ("NET_RX", "NET_TX") and cpu == 0
+                counts[cpu] += rng.randint(0, int(dt * (2000 if heavy else 100)))
+        cpu_header = "".join(f"{'CPU%d' % c:>11}" for c in range(self.cores))
+        w("/proc/interrupts", " " * 4 + cpu_header + "\n" + "".join(
+            f"{irq + ':':>5}" + "".join(f"{v:11d}" for v in self.irq_counts[irq]) + f"  {description}\n"
+            for irq, description, _ in self.irqs) + "Err:          0\n")
+        w("/proc/softirqs", " " * 12 + cpu_header + "\n" + "".join(
+            f"{name + ':':>12}" + "".join(f"{v:11d}" for v in counts) + "\n"
+            for name, counts in self.softirq_counts.items()))
+        self.cma_fail += rng.random() < 0.1
+        w("/sys/kernel/mm/cma/reserved/alloc_pages_fail", f"{self.cma_fail}\n")
+        bufs = ["Dma-buf Objects:", "size    \tflags   \tmode    \tcount   \texp_name\tino     \tname"]
+        for i in range(20):
+            size = rng.choice((4096, 1 << 20, 8 << 20))
+            heap = rng.choice(("system", "cma", "rknpu"))
+            bufs.append(f"{size:08d}\t00000002\t00080007\t00000003\t{heap}\t{i:08d}\t<none>")
+        w("/sys/kernel/debug/dma_buf/bufinfo", "\n".join(bufs) + "\n")
+        # Big clusters and the GPU are sometimes held under a thermal cap, as a hot board would be.
+        for i, (cpus, times) in enumerate(zip(self.policies(), self.policy_time)):
+            hw_max = max(times)
+            cap = hw_max if cpus[0] % 8 < 4 or rng.random() < 0.7 else 1800000
+            allowed = [f for f in times if f <= cap]
+            for _ in range(jiffies):
+                times[rng.choice(allowed)] += 1
+            base = f"/sys/devices/system/cpu/cpufreq/policy{cpus[0]}"
+            w(f"{base}/scaling_max_freq", f"{cap}\n")
+            w(f"{base}/scaling_cur_freq", f"{rng.choice(allowed)}\n")
+            w(f"{base}/stats/time_in_state", "".join(f"{f} {t}\n" for f, t in times.items()))
+            w(f"/sys/class/thermal/cooling_device{i}/cur_state", f"{int(cap < hw_max)}\n")
+        gpu_cap = GPU_FREQS[-1] if rng.random() < 0.7 else GPU_FREQS[2]
+        for _ in range(jiffies):
+            self.gpu_time[rng.choice([f for f in GPU_FREQS if f <= gpu_cap])] += 10
+        w("/sys/class/devfreq/fb000000.gpu/max_freq", f"{gpu_cap}\n")
+        w("/sys/class/devfreq/fb000000.gpu/trans_stat", "     From  :   To\n" + "".join(
+            f"  {f}:  0  {t}\n" for f, t in self.gpu_time.items()))
+        w(f"/sys/class/thermal/cooling_device{len(self.policies())}/cur_state", f"{int(gpu_cap < GPU_FREQS[-1])}\n")
+        w("/sys/class/devfreq/fb000000.gpu/load", f"{rng.randint(0, 100)}@300000000Hz\n")
+        ina = "/sys/class/hwmon/hwmon8"
+        for ch in (1, 2, 3):
+            w(f"{ina}/in{ch}_input", f"{rng.randint(700, 1000)}\n")
+            w(f"{ina}/curr{ch}_input", f"{rng.randint(50, 3000)}\n")
+        w("/sys/class/hwmon/hwmon9/power1_input", f"{rng.randint(3000000, 12000000)}\n")
+        w("/sys/class/power_supply/usb-c/voltage_now", "5000000\n")
+        w("/sys/class/power_supply/usb-c/current_now", f"{rng.randint(500000, 2500000)}\n")
+        w("/sys/class/devfreq/fb000000.gpu/cur_freq", f"{GPU_FREQS[-1]}\n")
+        w("/sys/class/devfreq/fdab0000.npu/cur_freq", "1000000000\n")
+        npu = ", ".join(f"Core{i}: {rng.randint(0, 100):3d}%" for i in range(3))
+        w("/sys/kernel/debug/rknpu/load", f"NPU load:  {npu},\n")
+        w("/sys/kernel/debug/rkrga/load", "".join(
+            f"scheduler[{i}]: rga3\n\t load = {rng.randint(0, 100)}%\n" for i in range(3)))
+        busy = rng.sample(sorted(self.proc_ticks), len(self.proc_ticks) // 10)
+        for pid in busy:
+            self.proc_ticks[pid][0] += rng.randint(1, int(dt * 100) + 1)
+            self.proc_ticks[pid][1] += rng.randint(0, 10 ** 6)
+            self.write_proc(pid)
+        for i in range(8):
+            temp = str(rng.randint(30000, 80000)) + "\n"
+            w(f"/sys/class/hwmon/hwmon{i}/temp1_input", temp)
+            w(f"/sys/class/thermal/thermal_zone{i}/temp", temp)
+
+    def start_docker(self, delay=0.0):
+        """Start answering GET /containers/json on <root>/run/docker.sock like the Docker Engine
+        API, in a background thread. Each answer waits `delay` seconds first (a slow daemon);
+        server.requests counts the requests. Stop it with stop_docker(server)."""
+        import http.server
+        import json
+        import socketserver
+        import threading
+        import time
+        containers = [{"Id": cid, "Names": ["/" + name], "Image": "rknn-server:latest", "State": "running"}
+                      for cid, (name, *_) in self.containers.items()]
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            def do_GET(self):
+                self.server.requests += 1
+                time.sleep(delay)
+                body = json.dumps(containers if self.path.startswith("/containers/json") else {}).encode()
+                self.send_response(200 if self.path.startswith("/containers/json") else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+            requests = 0
+        path = os.path.join(self.root, "run/docker.sock")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)
+        server = Server(path, Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def stop_docker(self, server):
+        server.shutdown()
+        server.server_close()
+        os.unlink(server.server_address)
+
+    def serve_docker(self, tick=0.5):
+        """Run the fake Docker API (start_docker), advancing the counters every `tick` seconds,
+        until interrupted."""
+        import time
+        server = self.start_docker()
+        print(f"Fake Docker API on {server.server_address}; Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(tick)
+                self.advance(tick)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_docker(server)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a synthetic RK3588-like filesystem tree")
+    parser.add_argument("root", help="directory to create the tree in")
+    parser.add_argument("--cores", type=int, default=8)
+    parser.add_argument("--nics", type=int, default=2)
+    parser.add_argument("--disks", type=int, default=2)
+    parser.add_argument("--procs", type=int, default=100)
+    parser.add_argument("--containers", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--serve-docker", action="store_true",
+                        help="then keep the tree live and answer a fake Docker API on <root>/run/docker.sock")
+    args = parser.parse_args()
+    fake = FakeRoot(args.root, args.cores, args.nics, args.disks, args.procs, args.seed, args.containers)
+    fake.build()
+    if args.serve_docker:
+        fake.serve_docker()
+
+if __name__ == "__main__":
+    main()
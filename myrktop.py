@@ -1,24 +1,238 @@
 #!/usr/bin/env python3
-import urwid
-import subprocess
+import argparse
+import array
+import collections
+import contextlib
+import datetime
+import fnmatch
+import heapq
+import json
+import marshal
+import math
+import mmap
+import struct
+import sys
+import threading
 import re
 import os
+import shlex
 import time
+import zlib
+
+prev_cpu = {}
+prev_net = {}
+prev_disk = {}
+prev_vmstat = {}
+prev_power = {}
+
+# Filesystem root that all procfs/sysfs/debugfs/etc paths are resolved under.
+# Pointing it at a synthetic tree (see bench/fakeroot.py) lets the collectors
+# run off-target.
+ROOT = os.environ.get("MYRKTOP_ROOT", "/")
 
 # -------------------------------
 # Basic System Info Functions
 # -------------------------------
 
+def host_path(path):
+    """Resolve an absolute host path under the configured filesystem root."""
+    if ROOT == "/":
+        return path
+    return os.path.join(ROOT, path.lstrip("/"))
+
+def set_root(path):
+    """Switch the filesystem root, dropping cached descriptors, devices and rate baselines."""
+    global ROOT, block_devices, cpu_policies, power_rails
+    ROOT = path or "/"
+    sysfs.close_all()
+    prev_cpu.clear()
+    prev_net.clear()
+    prev_disk.clear()
+    prev_vmstat.clear()
+    prev_power.clear()
+    prev_cgroup.clear()
+    container_names.reset()
+    block_devices = None
+    cpu_policies = None
+    power_rails = None
+    throttle_detector.reset()
+    interrupt_table.reset()
+    softirq_table.reset()
+
+def read_file(path):
+    with open(path, "r") as f:
+        return f.read()
+
+def cache_path(name):
+    """Path of a file in myrktop's on-disk cache ($XDG_CACHE_HOME/myrktop, default ~/.cache/myrktop)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "myrktop", name)
+
+def config_path(name):
+    """Path of a file in myrktop's config directory ($XDG_CONFIG_HOME/myrktop, default ~/.config/myrktop)."""
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "myrktop", name)
+
+def read_cache(name):
+    """Return the JSON stored in a cache file, or None if it is missing or unreadable."""
+    try:
+        with open(cache_path(name)) as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def write_cache(name, obj):
+    """Atomically replace a cache file with obj as JSON; an unwritable cache is ignored."""
+    path = cache_path(name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "w") as f:
+            json.dump(obj, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+class SysfsReader:
+    """Keeps hot procfs/sysfs/debugfs files open and re-reads them with pread at offset 0.
+
+    Every read goes into a reused per-thread buffer (grown when a file outgrows it),
+    so a sample costs a single syscall per file instead of open/read/close. The lock
+    only guards the descriptor pool; the preads themselves run unlocked, so collectors
+    on different threads do not serialise. Each read holds a reference on its
+    descriptor, and closing one that is in use is deferred until the last reader lets
+    go, so the number is never reused for another file under a running pread. A
+    descriptor is reopened only after a read on it fails; files that could not be
+    opened are not retried for missing_retry seconds.
+    """
+    def __init__(self, bufsize=4096, missing_retry=10.0):
+        self.fds = {}
+        self.users = {}      # {fd: reads in progress}
+        self.doomed = set()  # fds dropped from the pool while still being read
+        self.missing = {}
+        self.missing_retry = missing_retry
+        self.bufsize = bufsize
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def _open(self, path):
+        failed_at = self.missing.get(path)
+        if failed_at is not None and time.monotonic() - failed_at < self.missing_retry:
+            raise FileNotFoundError(path)
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        except OSError:
+            self.missing[path] = time.monotonic()
+            raise
+        self.missing.pop(path, None)
+        self.fds[path] = fd
+        return fd
+
+    def _pread(self, fd):
+        """Read fd from offset 0 into this thread's buffer; returns (view, length)."""
+        view = getattr(self.local, "view", None)
+        if view is None:
+            view = self.local.view = memoryview(bytearray(self.bufsize))
+        while True:
+            n = os.preadv(fd, [view], 0)
+            if n < len(view):
+                return view, n
+            view = self.local.view = memoryview(bytearray(len(view) * 2))
+
+    def _acquire(self, path):
+        with self.lock:
+            fd = self.fds.get(path)
+            if fd is None:
+                fd = self._open(path)
+            self.users[fd] = self.users.get(fd, 0) + 1
+            return fd
+
+    def _release(self, fd, stale=None):
+        """Drop a read's reference; stale names the path whose descriptor just failed."""
+        with self.lock:
+            if stale is not None and self.fds.get(stale) == fd:
+                self._close(stale)
+            left = self.users.pop(fd) - 1
+            if left:
+                self.users[fd] = left
+            elif fd in self.doomed:
+                self.doomed.discard(fd)
+                self._close_fd(fd)
+
+    def _close(self, path):
+        fd = self.fds.pop(path, None)
+        if fd is None:
+            return
+        if fd in self.users:
+            self.doomed.add(fd)
+        else:
+            self._close_fd(fd)
+
+    def _close_fd(self, fd):
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+    def close(self, path):
+        with self.lock:
+            self._close(path)
+
+    def close_all(self):
+        with self.lock:
+            for path in list(self.fds):
+                self._close(path)
+            self.missing.clear()
+
+    def read(self, path):
+        """Return the file's current contents as text; raises OSError like open() would."""
+        fd = self._acquire(path)
+        try:
+            view, n = self._pread(fd)
+        except OSError:
+            self._release(fd, stale=path)
+            fd = self._acquire(path)
+            try:
+                view, n = self._pread(fd)
+            finally:
+                self._release(fd)
+        else:
+            self._release(fd)
+        return str(view[:n], "utf-8", "replace")
+
+sysfs = SysfsReader()
+
+def human_size(num, iec=False):
+    """Format a byte count the way free -h / df -h do (e.g. 7.2G, 15Gi, 0B)."""
+    for unit in ("B", "K", "M", "G", "T", "P"):
+        if abs(num) < 1024 or unit == "P":
+            break
+        num /= 1024.0
+    if unit == "B":
+        return f"{int(num)}B"
+    suffix = unit + ("i" if iec else "")
+    if abs(num) < 10:
+        return f"{num:.1f}{suffix}"
+    return f"{round(num):d}{suffix}"
+
+def format_uptime(seconds):
+    """Format seconds like uptime -p (e.g. up 1 day, 17 hours, 30 minutes)."""
+    minutes = int(seconds) // 60
+    parts = []
+    for unit, size in (("week", 10080), ("day", 1440), ("hour", 60), ("minute", 1)):
+        count, minutes = divmod(minutes, size)
+        if count:
+            parts.append(f"{count} {unit}{'s' if count != 1 else ''}")
+    return "up " + (", ".join(parts) if parts else "0 minutes")
+
 def get_device_info():
     try:
-        device_info = subprocess.check_output(
-            "cat /sys/firmware/devicetree/base/compatible",
-            shell=True, stderr=subprocess.DEVNULL
-        ).decode("utf-8").replace("\x00", "").strip()
+        with open(host_path("/sys/firmware/devicetree/base/compatible"), "rb") as f:
+            device_info = f.read().decode("utf-8").replace("\x00", "").strip()
     except Exception:
         device_info = "N/A"
     npu_version = ""
-    npu_version_path = "/sys/kernel/debug/rknpu/version"
+    npu_version_path = host_path("/sys/kernel/debug/rknpu/version")
     if os.path.exists(npu_version_path):
         try:
             with open(npu_version_path, "r") as f:
@@ -27,186 +241,358 @@ def get_device_info():
             npu_version = "Permission denied - try sudo"
         except Exception:
             npu_version = ""
+    return device_info, npu_version
+
+def get_uptime():
     try:
-        uptime = subprocess.check_output("uptime -p", shell=True).decode("utf-8").strip()
+        uptime = format_uptime(float(read_file(host_path("/proc/uptime")).split()[0]))
     except Exception:
         uptime = "N/A"
+    return uptime
+
+def get_docker_status():
+    # Equivalent of `systemctl is-active docker`: dockerd's pid file points at a live process.
     docker_status = ""
     try:
-        status = subprocess.check_output("systemctl is-active docker", shell=True, stderr=subprocess.PIPE).decode("utf-8").strip()
-        if status == "active":
-            docker_status = status
+        pid = int(read_file(host_path("/run/docker.pid")).strip())
+        if os.path.exists(host_path(f"/proc/{pid}")):
+            docker_status = "active"
     except Exception:
         docker_status = ""
-    return device_info, npu_version, uptime, docker_status
+    return docker_status
+
+CPU_PART_NAMES = {"0xd05": "A55", "0xd0b": "A76"}
+CPU_TIME_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+cpu_policies = None  # [(name, span, policy_dir, cpus)], discovered on first use
+
+def cpu_core_types():
+    """{cpu: core type} from the "CPU part" lines of /proc/cpuinfo (A55/A76 on RK3588)."""
+    types = {}
+    cpu = None
+    try:
+        lines = read_file(host_path("/proc/cpuinfo")).splitlines()
+    except Exception:
+        lines = []
+    for line in lines:
+        key, _, value = line.partition(":")
+        key = key.strip()
+        if key == "processor":
+            cpu = int(value) if value.strip().isdigit() else None
+        elif key == "CPU part" and cpu is not None:
+            types[cpu] = CPU_PART_NAMES.get(value.strip(), value.strip())
+    return types
+
+def discover_cpu_policies():
+    """Return [(name, span, policy_dir, cpus)] per cpufreq policy, e.g. ("A76 cpu4-5", "cpu4-5", ..., [4, 5])."""
+    policies = []
+    core_types = cpu_core_types()
+    cpufreq = host_path("/sys/devices/system/cpu/cpufreq")
+    try:
+        names = sorted((p for p in os.listdir(cpufreq) if p.startswith("policy")), key=lambda p: int(p[6:] or 0))
+    except Exception:
+        names = []
+    for policy in names:
+        base = os.path.join(cpufreq, policy)
+        try:
+            cpus = [int(c) for c in read_file(os.path.join(base, "related_cpus")).split()]
+        except Exception:
+            continue
+        if not cpus:
+            continue
+        span = f"cpu{cpus[0]}-{cpus[-1]}" if len(cpus) > 1 else f"cpu{cpus[0]}"
+        name = f"{core_types[cpus[0]]} {span}" if cpus[0] in core_types else span
+        policies.append((name, span, base, cpus))
+    return policies
 
 def get_cpu_info():
-    cpu_loads = {}
-    core_count = os.cpu_count() or 1
-    global prev_cpu
+    """Per-core load and time breakdown from one pass over /proc/stat, frequencies once per cpufreq policy.
+
+    Returns (cpu_loads, cpu_freqs, cpu_times, clusters): integer load % and MHz per core,
+    {core: {field: %}} for CPU_TIME_FIELDS, and [(name, cores, load, MHz, {field: %})] per policy.
+    Load counts iowait as busy, as before.
+    """
+    global cpu_policies
+    if cpu_policies is None:
+        cpu_policies = discover_cpu_policies()
     try:
-        with open("/proc/stat", "r") as f:
-            lines = f.readlines()
+        lines = sysfs.read(host_path("/proc/stat")).splitlines()
     except Exception:
         lines = []
-    for i in range(core_count):
-        line = next((l for l in lines if l.startswith(f"cpu{i} ")), None)
-        if not line:
+    cpu_loads = {}
+    cpu_times = {}
+    for line in lines:
+        if not (line.startswith("cpu") and line[3:4].isdigit()):
+            if cpu_loads:
+                break  # the per-core lines are contiguous; skip the long intr/softirq lines
             continue
         parts = line.split()
         try:
-            user   = int(parts[1])
-            nice   = int(parts[2])
-            system = int(parts[3])
-            idle   = int(parts[4])
-            iowait = int(parts[5])
-            irq    = int(parts[6])
-            softirq= int(parts[7])
-            steal  = int(parts[8]) if len(parts) > 8 else 0
-        except Exception:
+            core = int(parts[0][3:])
+            values = [int(v) for v in parts[1:9]]
+        except ValueError:
             continue
-        total = user + nice + system + idle + iowait + irq + softirq + steal
-        if i in prev_cpu:
-            prev_total, prev_idle = prev_cpu[i]
-            diff_total = total - prev_total
-            diff_idle  = idle - prev_idle
-            load = (100 * (diff_total - diff_idle)) // diff_total if diff_total > 0 else 0
+        values += [0] * (8 - len(values))
+        total = sum(values)
+        prev = prev_cpu.get(core)
+        prev_cpu[core] = (total, values)
+        if prev is not None and total > prev[0]:
+            diff_total = total - prev[0]
+            times = {f: 100.0 * (v - p) / diff_total for f, v, p in zip(CPU_TIME_FIELDS, values, prev[1])}
+            cpu_loads[core] = (100 * (diff_total - (values[3] - prev[1][3]))) // diff_total
         else:
-            load = 0
-        cpu_loads[i] = load
-        prev_cpu[i] = (total, idle)
+            times = dict.fromkeys(CPU_TIME_FIELDS, 0.0)
+            cpu_loads[core] = 0
+        cpu_times[core] = times
     cpu_freqs = {}
-    for i in range(core_count):
+    clusters = []
+    for name, _, base, cpus in cpu_policies:
         try:
-            with open(f"/sys/devices/system/cpu/cpu{i}/cpufreq/scaling_cur_freq", "r") as f:
-                freq_str = f.read().strip()
-            freq = int(freq_str) // 1000
+            freq = int(sysfs.read(os.path.join(base, "scaling_cur_freq"))) // 1000
         except Exception:
             freq = 0
-        cpu_freqs[i] = freq
-    return cpu_loads, cpu_freqs
+        cores = [c for c in cpus if c in cpu_loads]
+        for c in cores:
+            cpu_freqs[c] = freq
+        if cores:
+            clusters.append((name, cores, sum(cpu_loads[c] for c in cores) // len(cores), freq,
+                             {f: sum(cpu_times[c][f] for c in cores) / len(cores) for f in CPU_TIME_FIELDS}))
+    for core in cpu_loads:
+        if core not in cpu_freqs:  # no cpufreq policy covers it
+            try:
+                cpu_freqs[core] = int(sysfs.read(host_path(
+                    f"/sys/devices/system/cpu/cpu{core}/cpufreq/scaling_cur_freq"))) // 1000
+            except Exception:
+                cpu_freqs[core] = 0
+    return cpu_loads, cpu_freqs, cpu_times, clusters
 
 def get_gpu_info():
-    gpu_load_path = "/sys/class/devfreq/fb000000.gpu/load"
-    gpu_freq_path = "/sys/class/devfreq/fb000000.gpu/cur_freq"
-    if not os.path.exists(gpu_load_path) or not os.path.exists(gpu_freq_path):
+    gpu_load_path = host_path("/sys/class/devfreq/fb000000.gpu/load")
+    gpu_freq_path = host_path("/sys/class/devfreq/fb000000.gpu/cur_freq")
+    try:
+        raw_line = sysfs.read(gpu_load_path).strip()
+        gpu_freq_str = sysfs.read(gpu_freq_path).strip()
+    except OSError:
         return None, None
     try:
-        with open(gpu_load_path, "r") as f:
-            raw_line = f.read().strip()
         fields = re.split(r'[@ ]+', raw_line)
         load_str = fields[0].rstrip('%')
         gpu_load = int(load_str)
     except Exception:
         gpu_load = 0
     try:
-        with open(gpu_freq_path, "r") as f:
-            gpu_freq_str = f.read().strip()
         gpu_freq = int(gpu_freq_str) // 1000000
     except Exception:
         gpu_freq = 0
     return gpu_load, gpu_freq
 
 def get_npu_info():
-    npu_load_path = "/sys/kernel/debug/rknpu/load"
-    npu_freq_path = "/sys/class/devfreq/fdab0000.npu/cur_freq"
-    if not os.path.exists(npu_load_path) or not os.path.exists(npu_freq_path):
-        return None, None
+    npu_load_path = host_path("/sys/kernel/debug/rknpu/load")
+    npu_freq_path = host_path("/sys/class/devfreq/fdab0000.npu/cur_freq")
     try:
-        with open(npu_load_path, "r") as f:
-            data = f.read()
-        percents = re.findall(r'(\d+)%', data)
-        if percents:
-            npu_load = " ".join([p + "%" for p in percents])
-        else:
-            npu_load = "0% 0% 0%"
-    except Exception:
+        data = sysfs.read(npu_load_path)
+        npu_freq_str = sysfs.read(npu_freq_path).strip()
+    except OSError:
+        return None, None
+    percents = re.findall(r'(\d+)%', data)
+    if percents:
+        npu_load = " ".join([p + "%" for p in percents])
+    else:
         npu_load = "0% 0% 0%"
     try:
-        with open(npu_freq_path, "r") as f:
-            npu_freq_str = f.read().strip()
         npu_freq = int(npu_freq_str) // 1000000
     except Exception:
         npu_freq = 0
     return npu_load, npu_freq
 
 def get_rga_info():
-    rga_load_path = "/sys/kernel/debug/rkrga/load"
-    if not os.path.exists(rga_load_path):
-        return None
+    rga_load_path = host_path("/sys/kernel/debug/rkrga/load")
     try:
-        with open(rga_load_path, "r") as f:
-            data = f.read()
-        rga_values = re.findall(r'load = (\d+)%', data)
-        if rga_values:
-            rga_values = " ".join([v + "%" for v in rga_values[:3]])
-        else:
-            rga_values = "0% 0% 0%"
-    except Exception:
+        data = sysfs.read(rga_load_path)
+    except OSError:
+        return None
+    rga_values = re.findall(r'load = (\d+)%', data)
+    if rga_values:
+        rga_values = " ".join([v + "%" for v in rga_values[:3]])
+    else:
         rga_values = "0% 0% 0%"
     return rga_values
 
+def read_meminfo():
+    """Parse /proc/meminfo into a dict of byte counts."""
+    meminfo = {}
+    for line in sysfs.read(host_path("/proc/meminfo")).splitlines():
+        key, _, rest = line.partition(":")
+        fields = rest.split()
+        if not fields:
+            continue
+        try:
+            value = int(fields[0])
+        except ValueError:
+            continue
+        meminfo[key] = value * 1024 if len(fields) > 1 and fields[1] == "kB" else value
+    return meminfo
+
 def get_ram_swap_info():
+    """Return (ram_used, ram_total, swap_used, swap_total) in bytes, or Nones if unavailable."""
     try:
-        free_output = subprocess.check_output("free -h", shell=True).decode("utf-8")
-        lines = free_output.splitlines()
-        ram_line = next((l for l in lines if l.startswith("Mem:")), None)
-        swap_line = next((l for l in lines if l.startswith("Swap:")), None)
-        if ram_line:
-            parts = ram_line.split()
-            ram_total = parts[1]; ram_used = parts[2]
-        else:
-            ram_total = ram_used = "N/A"
-        if swap_line:
-            parts = swap_line.split()
-            swap_total = parts[1]; swap_used = parts[2]
-        else:
-            swap_total = swap_used = "N/A"
+        meminfo = read_meminfo()
+        ram_total = meminfo["MemTotal"]
+        ram_used = ram_total - meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+        swap_total = meminfo.get("SwapTotal", 0)
+        swap_used = swap_total - meminfo.get("SwapFree", 0)
     except Exception:
-        ram_used, ram_total, swap_used, swap_total = "N/A", "N/A", "N/A", "N/A"
+        ram_used, ram_total, swap_used, swap_total = None, None, None, None
     return ram_used, ram_total, swap_used, swap_total
 
-def get_temperatures():
+# /proc/vmstat counters shown as per-second rates; "allocstall" sums the per-zone allocstall_* lines.
+VMSTAT_RATES = ("pgfault", "pgmajfault", "pswpin", "pswpout", "pgscan", "pgsteal", "allocstall")
+
+def parse_psi(text):
+    """{"some"/"full": (avg10, avg60, avg300)} from a PSI file (/proc/pressure/* or a cgroup's *.pressure)."""
+    kinds = {}
+    for line in text.splitlines():
+        kind, _, rest = line.partition(" ")
+        fields = dict(f.split("=", 1) for f in rest.split() if "=" in f)
+        try:
+            kinds[kind] = tuple(float(fields[k]) for k in ("avg10", "avg60", "avg300"))
+        except (KeyError, ValueError):
+            continue
+    return kinds
+
+def read_psi():
+    """{resource: {"some"/"full": (avg10, avg60, avg300)}} from /proc/pressure; empty without CONFIG_PSI."""
+    psi = {}
+    for resource in ("cpu", "memory", "io"):
+        try:
+            kinds = parse_psi(sysfs.read(host_path(f"/proc/pressure/{resource}")))
+        except OSError:
+            continue
+        if kinds:
+            psi[resource] = kinds
+    return psi
+
+def read_dma_bufs():
+    """Bytes held per dma-buf exporter (a dma-heap such as "system" or "cma", or a driver) from
+    debugfs dma_buf/bufinfo; None when it cannot be read (it needs root)."""
     try:
-        output = subprocess.check_output("sensors", shell=True, stderr=subprocess.DEVNULL).decode("utf-8")
-        lines = output.splitlines()
-        temp_items = []
-        current_name = None
-        for line in lines:
-            if ":" not in line and len(line.split()) == 1:
-                current_name = line.strip()
+        text = read_file(host_path("/sys/kernel/debug/dma_buf/bufinfo"))
+    except Exception:
+        return None
+    usage = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 5 and parts[0].isdigit():
+            usage[parts[4]] = usage.get(parts[4], 0) + int(parts[0])
+    return usage
+
+def get_memory_pressure():
+    """PSI averages, /proc/vmstat rates, CMA and dma-buf usage.
+
+    Returns {"psi": read_psi(), "rates": {VMSTAT_RATES name: per second}, "cma": (used, total)
+    bytes or None, "cma_failures": failed CMA page allocations since the last sample or None,
+    "dmabuf": read_dma_bufs()}. Rates are deltas against the previous sample, 0 on the first.
+    """
+    counters = dict.fromkeys(VMSTAT_RATES, 0)
+    try:
+        lines = sysfs.read(host_path("/proc/vmstat")).splitlines()
+    except Exception:
+        lines = []
+    for line in lines:
+        name, _, value = line.partition(" ")
+        key = name
+        if name not in counters:
+            # pgscan/pgsteal are split by reclaimer (the _anon/_file lines repeat the same
+            # pages), allocstall by zone.
+            base, _, kind = name.partition("_")
+            if base in ("pgscan", "pgsteal") and kind in ("kswapd", "direct", "khugepaged"):
+                key = base
+            elif base == "allocstall":
+                key = base
+            else:
                 continue
-            if line.startswith("temp1:") or line.startswith("Composite:"):
-                fields = line.split()
-                if len(fields) < 2:
-                    continue
-                raw_temp = fields[1]
-                if len(raw_temp) >= 5:
-                    try:
-                        temp_val = int(float(raw_temp[1:len(raw_temp)-4]))
-                    except Exception:
-                        temp_val = 0
-                    if temp_val >= 70:
-                        attr = 'temp_red'
-                    elif temp_val >= 60:
-                        attr = 'temp_yellow'
-                    else:
-                        attr = 'temp_green'
-                    sensor_name = current_name if current_name is not None else fields[0]
-                    formatted = f"{sensor_name:<30} {temp_val:2d}°C"
-                    temp_items.append((attr, formatted))
-                else:
-                    temp_items.append(("default", line))
-        if not temp_items:
-            temp_items = [("default", "No temperature data.")]
+        try:
+            counters[key] += int(value)
+        except ValueError:
+            pass
+    cma_failures = None
+    cma_class = host_path("/sys/kernel/mm/cma")
+    try:
+        areas = os.listdir(cma_class)
+    except Exception:
+        areas = []
+    for area in areas:
+        try:
+            failed = int(sysfs.read(os.path.join(cma_class, area, "alloc_pages_fail")))
+        except Exception:
+            continue
+        counters["cma_fail"] = counters.get("cma_fail", 0) + failed
+    current_time = time.time()
+    rates = dict.fromkeys(VMSTAT_RATES, 0.0)
+    if prev_vmstat:
+        dt = current_time - prev_vmstat["time"]
+        if dt > 0:
+            for key in VMSTAT_RATES:
+                rates[key] = (counters[key] - prev_vmstat[key]) / dt
+        if "cma_fail" in counters and "cma_fail" in prev_vmstat:
+            cma_failures = counters["cma_fail"] - prev_vmstat["cma_fail"]
+    elif "cma_fail" in counters:
+        cma_failures = 0
+    prev_vmstat.clear()
+    prev_vmstat.update(counters, time=current_time)
+    try:
+        meminfo = read_meminfo()
+        cma = (meminfo["CmaTotal"] - meminfo.get("CmaFree", 0), meminfo["CmaTotal"])
+    except Exception:
+        cma = None
+    return {"psi": read_psi(), "rates": rates, "cma": cma, "cma_failures": cma_failures,
+            "dmabuf": read_dma_bufs()}
+
+def get_temperatures():
+    """Return [(sensor_name, celsius)] from hwmon chips plus thermal zones without a hwmon twin."""
+    temps = []
+    seen = set()
+    hwmon_class = host_path("/sys/class/hwmon")
+    try:
+        hwmons = sorted(os.listdir(hwmon_class), key=lambda h: int(re.sub(r"\D", "", h) or 0))
+    except Exception:
+        hwmons = []
+    for hwmon in hwmons:
+        base = os.path.join(hwmon_class, hwmon)
+        try:
+            name = read_file(os.path.join(base, "name")).strip()
+            temp = int(sysfs.read(os.path.join(base, "temp1_input"))) / 1000.0
+        except Exception:
+            continue
+        seen.add(name.replace("-", "_"))
+        label = name
+        count = 2
+        while any(label == t[0] for t in temps):
+            label = f"{name}-{count}"
+            count += 1
+        temps.append((label, temp))
+    thermal_class = host_path("/sys/class/thermal")
+    try:
+        zones = sorted((z for z in os.listdir(thermal_class) if z.startswith("thermal_zone")),
+                       key=lambda z: int(z[len("thermal_zone"):] or 0))
     except Exception:
-        temp_items = [("default", "No temperature data.")]
-    return temp_items
+        zones = []
+    for zone in zones:
+        base = os.path.join(thermal_class, zone)
+        try:
+            name = read_file(os.path.join(base, "type")).strip()
+            temp = int(sysfs.read(os.path.join(base, "temp"))) / 1000.0
+        except Exception:
+            continue
+        if name.replace("-", "_") in seen:
+            continue
+        seen.add(name.replace("-", "_"))
+        temps.append((name, temp))
+    return temps
 
 def get_network_traffic():
-    global prev_net
     interfaces = []
-    net_class = "/sys/class/net"
+    net_class = host_path("/sys/class/net")
     try:
         for iface in os.listdir(net_class):
             if os.path.exists(os.path.join(net_class, iface, "device")):
@@ -215,8 +601,7 @@ def get_network_traffic():
         interfaces = []
     net_stats = {}
     try:
-        with open("/proc/net/dev", "r") as f:
-            lines = f.readlines()
+        lines = sysfs.read(host_path("/proc/net/dev")).splitlines()
     except Exception:
         lines = []
     for line in lines[2:]:
@@ -249,10 +634,85 @@ def get_network_traffic():
         prev_net[iface] = (rx, tx, current_time)
     return rates
 
+# /proc/diskstats fields after the device name, as indexes into the parsed counters.
+DISKSTAT_READS, DISKSTAT_READ_SECTORS, DISKSTAT_READ_MS = 0, 2, 3
+DISKSTAT_WRITES, DISKSTAT_WRITE_SECTORS, DISKSTAT_WRITE_MS = 4, 6, 7
+DISKSTAT_IO_MS, DISKSTAT_WEIGHTED_MS = 9, 10
+
+block_devices = None  # {disk: [partition, ...]}, discovered on first use
+
+def discover_block_devices():
+    """Return {disk: [partition, ...]} from /sys/block, skipping loop, ram and zram devices."""
+    devices = {}
+    block = host_path("/sys/block")
+    try:
+        disks = sorted(os.listdir(block))
+    except Exception:
+        return devices
+    for disk in disks:
+        if disk.startswith(("loop", "ram", "zram")):
+            continue
+        try:
+            entries = os.listdir(os.path.join(block, disk))
+        except Exception:
+            entries = []
+        devices[disk] = sorted(e for e in entries if e.startswith(disk)
+                               and os.path.exists(os.path.join(block, disk, e, "partition")))
+    return devices
+
+def get_disk_io():
+    """Per-device I/O rates from /proc/diskstats deltas, partitions grouped under their disk.
+
+    Returns [(disk, stats, [(partition, stats), ...])]. stats holds read/write MB/s,
+    read/write IOPS, await (ms per completed request), queue (average requests in
+    flight) and util (% of the interval the device was busy); all 0 on the first sample.
+    """
+    global block_devices
+    if block_devices is None:
+        block_devices = discover_block_devices()
+    try:
+        lines = sysfs.read(host_path("/proc/diskstats")).splitlines()
+    except Exception:
+        lines = []
+    counters = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) < 14:
+            continue
+        try:
+            counters[parts[2]] = [int(v) for v in parts[3:14]]
+        except ValueError:
+            continue
+    current_time = time.time()
+    def rates(name):
+        stats = {"read": 0.0, "write": 0.0, "read_iops": 0.0, "write_iops": 0.0,
+                 "await": 0.0, "queue": 0.0, "util": 0.0}
+        now = counters.get(name)
+        if now is None:
+            return stats
+        if name in prev_disk:
+            prev, prev_time = prev_disk[name]
+            dt = current_time - prev_time
+            if dt > 0:
+                d = [a - b for a, b in zip(now, prev)]
+                ios = d[DISKSTAT_READS] + d[DISKSTAT_WRITES]
+                stats["read"] = d[DISKSTAT_READ_SECTORS] * 512 / (1e6 * dt)
+                stats["write"] = d[DISKSTAT_WRITE_SECTORS] * 512 / (1e6 * dt)
+                stats["read_iops"] = d[DISKSTAT_READS] / dt
+                stats["write_iops"] = d[DISKSTAT_WRITES] / dt
+                stats["await"] = (d[DISKSTAT_READ_MS] + d[DISKSTAT_WRITE_MS]) / ios if ios > 0 else 0.0
+                stats["queue"] = d[DISKSTAT_WEIGHTED_MS] / (1000 * dt)
+                stats["util"] = min(100.0, d[DISKSTAT_IO_MS] / (10 * dt))
+        prev_disk[name] = (now, current_time)
+        return stats
+    return [(disk, rates(disk), [(part, rates(part)) for part in partitions])
+            for disk, partitions in block_devices.items()]
+
 def get_fstab_disk_usage():
+    """Return [(mount_point, total, used, free)] in bytes for /etc/fstab mounts (Nones if statvfs fails)."""
     mountpoints = []
     try:
-        with open("/etc/fstab", "r") as f:
+        with open(host_path("/etc/fstab"), "r") as f:
             for line in f:
                 line = line.strip()
                 if not line or line.startswith("#"):
@@ -267,373 +727,3519 @@ def get_fstab_disk_usage():
                     mountpoints.append(mount)
     except Exception:
         mountpoints = []
-    usage_lines = []
-    header = f"{'Mount Point':<20} {'Total':>8} {'Used':>8} {'Free':>8}"
-    usage_lines.append(header)
+    usage = []
     for m in mountpoints:
         try:
-            df_output = subprocess.check_output(f"df -h {m}", shell=True, stderr=subprocess.DEVNULL).decode("utf-8")
-            df_lines = df_output.splitlines()
-            if len(df_lines) >= 2:
-                parts = df_lines[1].split()
-                if len(parts) >= 6:
-                    mp = parts[5]
-                    total = parts[1]
-                    used = parts[2]
-                    free = parts[3]
-                    line_usage = f"{mp:<20} {total:>8} {used:>8} {free:>8}"
-                    usage_lines.append(line_usage)
-                else:
-                    usage_lines.append(f"{m}: No info")
-            else:
-                usage_lines.append(f"{m}: No info")
+            st = os.statvfs(host_path(m))
+            total = st.f_blocks * st.f_frsize
+            used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            free = st.f_bavail * st.f_frsize
         except Exception:
-            usage_lines.append(f"{m}: No info")
-    if not usage_lines:
-        usage_lines = ["No disk usage info from /etc/fstab."]
-    return usage_lines
+            total = used = free = None
+        usage.append((m, total, used, free))
+    return usage
 
 # -------------------------------
-# New SMART/Storage Debug Code
+# Per-Process Top View
 # -------------------------------
 
-def run_all_smartctl(dev):
-    """Run all three smartctl command variants and return a dict mapping command to output (full output)."""
-    commands = [
-        f"sudo smartctl -a -d auto /dev/{dev}",
-        f"sudo smartctl -a -d sat /dev/{dev}",
-        f"sudo smartctl -a /dev/{dev}"
-    ]
-    results = {}
-    for cmd in commands:
-        try:
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            output = (result.stdout + "\n" + result.stderr).strip()
-            results[cmd] = output  # Store full output without truncation.
-        except Exception as e:
-            results[cmd] = f"Exception: {str(e)}"
-    return results
-
-def run_smartctl(dev):
-    # Run all commands and choose one that looks usable; also return full outputs for debug.
-    all_results = run_all_smartctl(dev)
-    chosen_output = None
-    chosen_cmd = None
-    for cmd, output in all_results.items():
-        if output and "Usage:" not in output[:50] and "Unknown USB bridge" not in output:
-            chosen_output = output
-            chosen_cmd = cmd
-            break
-    if not chosen_output:
-        chosen_cmd = list(all_results.keys())[-1] if all_results else "None"
-        chosen_output = all_results.get(chosen_cmd, "No output")
-    return chosen_output, chosen_cmd, all_results
-
-def parse_nvme_info(output):
-    info = {}
-    m = re.search(r"Model Number:\s+(.*)", output)
-    info["model"] = m.group(1).strip() if m else "Unknown"
-    m = re.search(r"Temperature Sensor 1:\s+(\d+)\s*Celsius", output)
-    info["temp"] = m.group(1).strip() if m else "N/A"
-    m = re.search(r"Power On Hours:\s+([\d,]+)", output)
-    info["power_hours"] = m.group(1).replace(",", "").strip() if m else "N/A"
-    m = re.search(r"Available Spare:\s+(\d+)%", output)
-    info["avail_spare"] = m.group(1).strip() + "%" if m else "N/A"
-    return info
-
-def parse_ata_info(output):
-    info = {}
-    m = re.search(r"Device Model:\s+(.*)", output)
-    info["model"] = m.group(1).strip() if m else "Unknown"
-    # Get Power_On_Hours by iterating over lines
-    power_hours = "N/A"
-    for line in output.splitlines():
-        if "Power_On_Hours" in line:
-            tokens = line.split()
-            for token in reversed(tokens):
-                if token.isdigit():
-                    power_hours = token
-                    break
-            if power_hours != "N/A":
-                break
-    info["power_hours"] = power_hours
-    # Temperature: look for a line with "Temperature_Celsius"
-    temp = "N/A"
-    for line in output.splitlines():
-        if "emperature" in line:
-            tokens = line.split()
-            for token in reversed(tokens):
-                if token.isdigit():
-                    temp = token
-                    break
-            if temp != "N/A":
-                break
-    info["temp"] = temp
-    # Wear_Leveling_Count
-    wear = None
-    for line in output.splitlines():
-        if "Wear_Leveling_Count" in line:
-            tokens = line.split()
-            for token in reversed(tokens):
-                if token.isdigit():
-                    wear = token
-                    break
-            break
-    info["wear_level"] = wear
-    # Rotation Rate
-    rotation = None
-    for line in output.splitlines():
-        if "Rotation Rate:" in line:
-            if "solid state device" in line.lower():
-                rotation = None
-            else:
-                m = re.search(r"Rotation Rate:\s+(.*)", line)
-                if m:
-                    rotation = m.group(1).strip()
-            break
-    info["rotation"] = rotation
-    return info
+def read_small(path):
+    """One-shot read of a small procfs file with the fewest syscalls (no Python file object)."""
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        return os.read(fd, 4096)
+    finally:
+        os.close(fd)
 
-def get_drive_smart_info(dev):
-    output, used_cmd, all_outputs = run_smartctl(dev)
-    debug_data = {"cmd": used_cmd if used_cmd else "None", "all": {k: v[:300] + "..." if len(v) > 300 else v for k, v in all_outputs.items()}}
-    if output is None or output.startswith("Error:"):
-        debug_data["raw"] = output if output else "No output"
-        return ("unknown", {"model": "Unknown", "temp": "N/A", "power_hours": "N/A", 
-                             "avail_spare": "N/A", "debug": debug_data})
-    # For parsing we use the full output.
-    debug_data["raw"] = output[:300] + "..." if len(output) > 300 else output
-    # If device name starts with "nvme", treat it as NVMe.
-    if dev.startswith("nvme") or re.search(r"NVMe Version:", output, re.IGNORECASE):
-        info = parse_nvme_info(output)
-        info["debug"] = debug_data
-        return ("nvme", info)
-    else:
-        info = parse_ata_info(output)
-        info["debug"] = debug_data
-        if info.get("model", "Unknown") == "Unknown":
-            return ("unknown", info)
-        return ("ata", info)
+class ProcState:
+    __slots__ = ("start", "comm", "ticks", "cpu", "rss", "io_total", "io_time", "io_rate", "idle_scans")
 
-def get_storage_info():
-    devices = []
-    try:
-        lsblk_output = subprocess.check_output("lsblk -dno NAME", shell=True, stderr=subprocess.DEVNULL).decode("utf-8")
-        for line in lsblk_output.splitlines():
-            name = line.strip()
-            if re.match(r"^sd[a-z]+$", name) or name.startswith("nvme"):
-                devices.append(name)
-    except Exception:
-        devices = []
-    nvme_list = []
-    ata_list = []
-    for dev in devices:
-        dtype, info = get_drive_smart_info(dev)
-        if dtype == "nvme":
-            line = f"/dev/{dev} - {info.get('model', 'Unknown')}"
-            if info.get("temp") and info.get("temp") != "N/A":
-                line += f" {info.get('temp')}°C"
-            if info.get("power_hours") and info.get("power_hours") != "N/A":
-                line += f" {info.get('power_hours')}H"
-            if info.get("avail_spare") and info.get("avail_spare") != "N/A":
-                line += f" {info.get('avail_spare')}"
-            nvme_list.append(line)
-        elif dtype == "ata":
-            line = f"/dev/{dev} - {info.get('model', 'Unknown')}"
-            if info.get("temp") and info.get("temp") != "N/A":
-                line += f" {info.get('temp')}°C"
-            if info.get("power_hours") and info.get("power_hours") != "N/A":
-                line += f" {info.get('power_hours')}H"
-            if info.get("rotation"):
-                line += f" {info.get('rotation')}"
-            if info.get("wear_level"):
-                line += f" {info.get('wear_level')}%"
-            ata_list.append(line)
-        else:
-            debug_info = info.get("debug", {})
-            all_cmds = debug_info.get("all", {})
-            debug_str = ""
-            for cmd, out in all_cmds.items():
-                debug_str += f"\n(cmd: {cmd}) -> {out}"
-            line = f"/dev/{dev} - Unknown SMART data (Selected cmd: {debug_info.get('cmd','')}){debug_str}"
-            ata_list.append(line)
-    return nvme_list, ata_list
+    def __init__(self, start, comm, ticks, rss):
+        self.start = start
+        self.comm = comm
+        self.ticks = ticks
+        self.cpu = 0.0
+        self.rss = rss
+        self.io_total = None
+        self.io_time = None
+        self.io_rate = 0.0
+        self.idle_scans = 0
 
-# -------------------------------
-# Dashboard Display (Urwid)
-# -------------------------------
+class ProcessScanner:
+    """Incremental /proc/[pid] scanner computing per-process CPU%, RSS and I/O rate.
 
-palette = [
-    ('header', 'dark blue,bold', ''),
-    ('title', 'yellow,bold', ''),
-    ('default', 'default,bold', ''),
-    ('good', 'dark green,bold', ''),
-    ('bad', 'dark red,bold', ''),
-    ('temp_red', 'light red,bold', ''),
-    ('temp_yellow', 'yellow,bold', ''),
-    ('temp_green', 'light green,bold', ''),
-    ('freq', 'light green,bold', ''),
-    ('footer', 'dark gray,bold', '')
-]
+    Like get_cpu_info with prev_cpu, rates are deltas against the previous scan,
+    kept per pid and keyed on the process start time so reused pids start over.
+    One read of /proc/[pid]/stat gives both CPU ticks and RSS. /proc/[pid]/io is
+    re-read only for processes that used CPU since the last scan, or every
+    IO_REFRESH scans for idle ones, so thousands of sleeping workers cost one
+    small read each. Top-N uses heaps instead of sorting every process.
+    """
+    IO_REFRESH = 5
 
-class DashboardWidget(urwid.ListBox):
     def __init__(self):
-        self.walker = urwid.SimpleListWalker([])
-        super().__init__(self.walker)
-        self.update_content()
-    def update_content(self):
-        focus_widget, focus_pos = self.get_focus()
-        if focus_pos is None:
-            focus_pos = 0
-        new_items = []
-        for item in build_dashboard():
-            new_items.append(urwid.Text(item))
-        self.walker[:] = new_items
-        if focus_pos < len(new_items):
-            self.set_focus(focus_pos)
-
-def build_dashboard():
-    lines = []
-    sep = "─" * 50
-    # Header
-    lines.append(("header", sep))
-    lines.append(("header", "🔥 System Monitor"))
-    lines.append(("header", sep))
-    device_info, npu_version, uptime, docker_status = get_device_info()
-    lines.append(("default", f"Device: {device_info}"))
-    if npu_version:
-        lines.append(("default", f"NPU Version: {npu_version}"))
-    lines.append(("default", f"System Uptime: {uptime}"))
-    if docker_status == "active":
-        lines.append(("good", "Docker Status: Running ✅"))
-    elif docker_status:
-        lines.append(("bad", f"Docker Status: {docker_status}"))
-    lines.append(("header", sep))
-    cpu_loads, cpu_freqs = get_cpu_info()
-    lines.append(("title", "📊 CPU Usage & Frequency:"))
-    cores = sorted(cpu_loads.keys())
-    for i in range(0, len(cores), 2):
-        if i + 1 < len(cores):
-            attr1 = 'temp_red' if cpu_loads[cores[i]] >= 80 else ('temp_yellow' if cpu_loads[cores[i]] >= 60 else 'default')
-            attr2 = 'temp_red' if cpu_loads[cores[i+1]] >= 80 else ('temp_yellow' if cpu_loads[cores[i+1]] >= 60 else 'default')
-            markup = [
-                ("default", f"Core {cores[i]}: "), (attr1, f"{cpu_loads[cores[i]]:3d}%"), ("default", " "),
-                ("freq", f"{cpu_freqs[cores[i]]:4d} MHz   "),
-                ("default", f"Core {cores[i+1]}: "), (attr2, f"{cpu_loads[cores[i+1]]:3d}%"), ("default", " "),
-                ("freq", f"{cpu_freqs[cores[i+1]]:4d} MHz")
-            ]
-            lines.append(markup)
-        else:
-            attr1 = 'temp_red' if cpu_loads[cores[i]] >= 70 else ('temp_yellow' if cpu_loads[cores[i]] >= 60 else 'default')
-            markup = [
-                ("default", f"Core {cores[i]}: "), (attr1, f"{cpu_loads[cores[i]]:3d}%"), ("default", " "),
-                ("freq", f"{cpu_freqs[cores[i]]:4d} MHz")
-            ]
-            lines.append(markup)
-    lines.append(("header", sep))
-    gpu_load, gpu_freq = get_gpu_info()
-    if gpu_load is not None and gpu_freq is not None:
-        gpu_attr = 'temp_red' if gpu_load >= 80 else ('temp_yellow' if gpu_load >= 60 else 'default')
-        gpu_markup = [
-            ("title", "🎮 GPU Load: "), (gpu_attr, f"{gpu_load:3d}%"),
-            ("default", "   "), ("freq", f"{gpu_freq:4d} MHz")
-        ]
-        lines.append(gpu_markup)
-        lines.append(("header", sep))
-    npu_load, npu_freq = get_npu_info()
-    if npu_load is not None and npu_freq is not None:
+        self.procs = {}
+        self.prev_time = None
+        self.clk_tck = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def read_io(self, base, entry, now):
         try:
-            npu_numeric = int(re.search(r'(\d+)%', npu_load).group(1))
-        except Exception:
-            npu_numeric = 0
-        npu_attr = 'temp_red' if npu_numeric >= 80 else ('temp_yellow' if npu_numeric >= 60 else 'default')
-        npu_markup = [
-            ("title", "🧠 NPU Load: "), (npu_attr, f"{npu_load}"),
-            ("default", "   "), ("freq", f"{npu_freq:4d} MHz")
-        ]
-        lines.append(npu_markup)
-        lines.append(("header", sep))
-    rga_info = get_rga_info()
-    if rga_info is not None:
+            data = read_small(base + "/io")
+        except OSError:
+            return
+        total = 0
+        for line in data.splitlines():
+            if line.startswith((b"read_bytes:", b"write_bytes:")):
+                total += int(line.split()[1])
+        if entry.io_total is not None and now > entry.io_time:
+            entry.io_rate = (total - entry.io_total) / (now - entry.io_time)
+        entry.io_total = total
+        entry.io_time = now
+
+    def scan(self, top_n=5):
+        now = time.monotonic()
+        dt = now - self.prev_time if self.prev_time is not None else None
+        self.prev_time = now
+        proc_dir = host_path("/proc")
         try:
-            rga_numeric = int(re.search(r'(\d+)%', rga_info).group(1))
-        except Exception:
-            rga_numeric = 0
-        rga_attr = 'temp_red' if rga_numeric >= 80 else ('temp_yellow' if rga_numeric >= 60 else 'default')
-        rga_markup = [("title", "🖼️  RGA Load: "), (rga_attr, f"{rga_info}")]
-        lines.append(rga_markup)
-        lines.append(("header", sep))
-    ram_used, ram_total, swap_used, swap_total = get_ram_swap_info()
-    lines.append(("title", "🖥️  RAM & Swap Usage:"))
-    lines.append(("default", f"RAM Used: {ram_used} / {ram_total}"))
-    lines.append(("default", f"Swap Used: {swap_used} / {swap_total}"))
-    lines.append(("header", sep))
-    temp_items = get_temperatures()
-    lines.append(("title", "🌡️  Temperatures:"))
-    for attr, text in temp_items:
-        lines.append((attr, text))
-    lines.append(("header", sep))
-    rates = get_network_traffic()
-    lines.append(("title", "🌐 Network Traffic:"))
-    for iface, (rx_rate, tx_rate) in rates.items():
-        lines.append(("default", f"{iface}: Down {rx_rate:.2f} Mbps | Up {tx_rate:.2f} Mbps"))
-    lines.append(("header", sep))
-    disk_lines = get_fstab_disk_usage()
-    lines.append(("title", "💾 Storage Usage (/etc/fstab):"))
-    for d in disk_lines:
-        lines.append(("default", d))
-    lines.append(("header", sep))
-    nvme_info, ata_info = get_storage_info()
-    if nvme_info:
-        lines.append(("good", "NVMe Devices:"))
-        for info in nvme_info:
-            lines.append(("default", info))
-    if ata_info:
-        lines.append(("good", "ATA Devices:"))
-        for info in ata_info:
-            lines.append(("default", info))
-    else:
-        lines.append(("bad", "No ATA devices detected."))
-    lines.append(("header", sep))
-    lines.append(("footer", "Press 'q' to exit. Use arrows or mouse to scroll."))
-    return lines
+            pids = [int(p) for p in os.listdir(proc_dir) if p.isdigit()]
+        except OSError:
+            pids = []
+        procs = self.procs
+        alive = {}
+        hz = self.clk_tck
+        for pid in pids:
+            base = f"{proc_dir}/{pid}"
+            try:
+                stat = read_small(base + "/stat")
+            except OSError:
+                continue  # exited between listdir and open
+            rparen = stat.rfind(b")")
+            fields = stat[rparen + 2:].split()
+            try:
+                ticks = int(fields[11]) + int(fields[12])
+                start = int(fields[19])
+                rss = int(fields[21]) * self.page_size
+            except (IndexError, ValueError):
+                continue
+            entry = procs.get(pid)
+            if entry is None or entry.start != start:
+                comm = stat[stat.find(b"(") + 1:rparen].decode("utf-8", "replace")
+                entry = ProcState(start, comm, ticks, rss)
+                self.read_io(base, entry, now)
+            else:
+                delta = ticks - entry.ticks
+                entry.ticks = ticks
+                entry.rss = rss
+                entry.cpu = 100.0 * delta / hz / dt if dt else 0.0
+                entry.idle_scans = 0 if delta else entry.idle_scans + 1
+                if delta or entry.idle_scans % self.IO_REFRESH == 0:
+                    self.read_io(base, entry, now)
+            alive[pid] = entry
+        self.procs = alive
+        def top(key):
+            return [(pid, p.comm, p.cpu, p.rss, p.io_rate)
+                    for pid, p in heapq.nlargest(top_n, alive.items(), key=lambda kv: key(kv[1]))]
+        return {
+            "count": len(alive),
+            "cpu": top(lambda p: p.cpu),
+            "rss": top(lambda p: p.rss),
+            "io": top(lambda p: p.io_rate),
+        }
+
+process_scanner = ProcessScanner()
+
+def get_top_processes():
+    return process_scanner.scan()
 
 # -------------------------------
-# Urwid Dashboard Classes
+# Containers (cgroup v2)
 # -------------------------------
 
-class DashboardWidget(urwid.ListBox):
+CGROUP_ROOT = "/sys/fs/cgroup"
+DOCKER_SOCKET = "/run/docker.sock"
+DOCKER_TIMEOUT = 1.0
+# A container's cgroup is named docker-<id>.scope (systemd driver), <id> under docker/
+# (cgroupfs driver), or libpod-/cri-containerd-/crio-<id>.scope for other runtimes.
+CONTAINER_CGROUP_RE = re.compile(r"^(?:(?:docker|libpod|cri-containerd|crio)-)?([0-9a-f]{64})(?:\.scope)?$")
+CONTAINER_SCAN_DEPTH = 4      # deep enough for kubepods.slice/<qos>.slice/<pod>.slice/<container>.scope
+CONTAINER_NAME_RETRY = 30.0   # seconds before asking the Docker socket again about unnamed ids
+CGROUP_FILES = ("cpu.stat", "memory.current", "memory.max", "io.stat",
+                "cpu.pressure", "memory.pressure", "io.pressure")
+
+prev_cgroup = {}  # {container id: (cgroup dir, usage_usec, read bytes, write bytes, time)}
+
+class ContainerNames:
+    """Container id -> name, from the Docker Engine API on its Unix socket.
+
+    The socket is only asked when an id without a name shows up, and at most once per
+    CONTAINER_NAME_RETRY seconds, so an unreachable socket (no docker group, not
+    Docker at all) costs nothing per sample. Unnamed containers show their short id.
+    """
     def __init__(self):
+        self.names = {}
+        self.queried = None
+
+    def reset(self):
+        self.names = {}
+        self.queried = None
+
+    def query(self):
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(DOCKER_TIMEOUT)
+            sock.connect(host_path(DOCKER_SOCKET))
+            # HTTP/1.0 so the daemon sends a plain body and closes the connection.
+            sock.sendall(b"GET /containers/json HTTP/1.0\r\nHost: docker\r\n\r\n")
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        head, _, body = b"".join(chunks).partition(b"\r\n\r\n")
+        status = head.split(b"\r\n", 1)[0].split()
+        if len(status) < 2 or status[1] != b"200":
+            raise OSError(f"Docker API answered {head[:40]!r}")
+        return {c["Id"]: c["Names"][0].lstrip("/") for c in json.loads(body) if c.get("Names")}
+
+    def lookup(self, ids):
+        now = time.monotonic()
+        if any(i not in self.names for i in ids) and (
+                self.queried is None or now - self.queried >= CONTAINER_NAME_RETRY):
+            self.queried = now
+            try:
+                self.names = self.query()
+            except Exception:
+                pass
+        return {i: self.names.get(i, i[:12]) for i in ids}
+
+container_names = ContainerNames()
+
+def find_container_cgroups():
+    """{container id: cgroup directory} for every container scope under the cgroup v2 root."""
+    found = {}
+    def scan(path, depth):
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return
+        with entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                match = CONTAINER_CGROUP_RE.match(entry.name)
+                if match:
+                    found[match.group(1)] = entry.path
+                elif depth < CONTAINER_SCAN_DEPTH:
+                    scan(entry.path, depth + 1)
+    scan(host_path(CGROUP_ROOT), 1)
+    return found
+
+def read_cgroup(path):
+    """Raw counters of one cgroup: {"usage": cpu usec, "read"/"write": bytes, "mem", "mem_max", "psi"}.
+
+    Files of controllers not enabled for the cgroup are skipped (mem None, I/O 0, no PSI).
+    """
+    def text(name):
+        try:
+            return sysfs.read(os.path.join(path, name))
+        except OSError:
+            return ""
+    stats = {"usage": 0, "read": 0, "write": 0, "mem": None, "mem_max": None, "psi": {}}
+    for line in text("cpu.stat").splitlines():
+        if line.startswith("usage_usec "):
+            stats["usage"] = int(line.split()[1])
+            break
+    for line in text("io.stat").splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key == "rbytes":
+                stats["read"] += int(value)
+            elif key == "wbytes":
+                stats["write"] += int(value)
+    mem = text("memory.current").strip()
+    if mem.isdigit():
+        stats["mem"] = int(mem)
+    mem_max = text("memory.max").strip()
+    if mem_max.isdigit():
+        stats["mem_max"] = int(mem_max)
+    for resource in ("cpu", "memory", "io"):
+        some = parse_psi(text(f"{resource}.pressure")).get("some")
+        if some:
+            stats["psi"][resource] = some[0]
+    return stats
+
+def get_containers():
+    """Per-container CPU, memory, I/O and PSI from cgroup v2, named through the Docker socket.
+
+    Returns {"cgroup2": bool, "containers": [dict, ...]}, busiest first. Each dict holds id, name, cpu (% of one core), mem and mem_max bytes
+    (None when unknown or unlimited), read/write MB/s and psi {resource: some avg10}.
+    Rates are deltas against the previous sample, 0 on the first.
+    """
+    cgroup2 = os.path.exists(host_path(CGROUP_ROOT + "/cgroup.controllers"))
+    cgroups = find_container_cgroups() if cgroup2 else {}
+    names = container_names.lookup(sorted(cgroups))
+    current_time = time.time()
+    containers = []
+    for cid, path in cgroups.items():
+        try:
+            stats = read_cgroup(path)
+        except Exception:
+            continue
+        entry = {"id": cid, "name": names[cid], "cpu": 0.0, "mem": stats["mem"], "mem_max": stats["mem_max"],
+                 "read": 0.0, "write": 0.0, "psi": stats["psi"]}
+        prev = prev_cgroup.get(cid)
+        if prev is not None and prev[0] == path:
+            dt = current_time - prev[4]
+            if dt > 0:
+                entry["cpu"] = (stats["usage"] - prev[1]) / (1e4 * dt)
+                entry["read"] = (stats["read"] - prev[2]) / (1e6 * dt)
+                entry["write"] = (stats["write"] - prev[3]) / (1e6 * dt)
+        prev_cgroup[cid] = (path, stats["usage"], stats["read"], stats["write"], current_time)
+        containers.append(entry)
+    # Drop the baselines and held-open files of containers that have exited.
+    for cid in [c for c in prev_cgroup if c not in cgroups]:
+        path = prev_cgroup.pop(cid)[0]
+        for name in CGROUP_FILES:
+            sysfs.close(os.path.join(path, name))
+    containers.sort(key=lambda c: -c["cpu"])
+    return {"cgroup2": cgroup2, "containers": containers}
+
+# -------------------------------
+# High-Frequency Accelerator Sampler
+# -------------------------------
+
+ACCEL_LOAD_FILES = (
+    ("gpu", "/sys/class/devfreq/fb000000.gpu/load", r'^(\d+)'),
+    ("npu", "/sys/kernel/debug/rknpu/load", r'(\d+)%'),
+    ("rga", "/sys/kernel/debug/rkrga/load", r'load = (\d+)%'),
+)
+
+class AcceleratorSampler:
+    """Polls the GPU/NPU/RGA load files at a high rate in a background thread.
+
+    Samples accumulate per core in a fixed 256-bucket histogram of load values until
+    drain() is called once per display interval, which turns them into mean / p95 / peak
+    and the fraction of samples at or above busy_threshold. Memory stays constant when
+    nothing drains (headless modes, accel panel hidden). The thread measures its own CPU time (time.thread_time) every
+    second and lowers the rate whenever it exceeds `budget` of one core, creeping
+    back towards the requested rate when there is headroom.
+    """
+    def __init__(self, rate=100.0, budget=0.02, busy_threshold=5):
+        self.target_rate = rate
+        self.rate = rate
+        self.budget = budget
+        self.busy_threshold = busy_threshold
+        self.reader = SysfsReader(missing_retry=60.0)  # private buffer: no contention with collectors
+        self.patterns = [(name, host_path(path), re.compile(pattern, re.M)) for name, path, pattern in ACCEL_LOAD_FILES]
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.overhead = 0.0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="accel-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def sample_once(self):
+        values = {}
+        for name, path, pattern in self.patterns:
+            try:
+                text = self.reader.read(path)
+            except OSError:
+                continue
+            loads = pattern.findall(text)
+            if name == "gpu":
+                values["gpu"] = int(loads[0]) if loads else 0
+            else:
+                for core, load in enumerate(loads[:3]):
+                    values[f"{name}{core}"] = int(load)
+        with self.lock:
+            for key, value in values.items():
+                counts = self.samples.get(key)
+                if counts is None:
+                    counts = self.samples[key] = array.array("Q", bytes(8 * 256))
+                counts[min(value, 255)] += 1
+
+    def run(self):
+        next_tick = time.monotonic()
+        window_start = next_tick
+        window_cpu = time.thread_time()
+        while not self.stopped.is_set():
+            self.sample_once()
+            now = time.monotonic()
+            if now - window_start >= 1.0:
+                cpu = time.thread_time()
+                self.overhead = (cpu - window_cpu) / (now - window_start)
+                if self.overhead > self.budget:
+                    self.rate = max(5.0, self.rate * self.budget / self.overhead * 0.9)
+                elif self.overhead < self.budget / 2 and self.rate < self.target_rate:
+                    self.rate = min(self.target_rate, self.rate * 1.25)
+                window_start, window_cpu = now, cpu
+            next_tick += 1.0 / self.rate
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self.stopped.wait(delay)
+            else:
+                next_tick = time.monotonic()  # fell behind: don't burst to catch up
+
+    def drain(self):
+        """Statistics for the samples taken since the last drain, per accelerator core."""
+        with self.lock:
+            samples, self.samples = self.samples, {}
+        stats = {}
+        for key in sorted(samples):
+            counts = samples[key]
+            n = sum(counts)
+            if not n:
+                continue
+            rank = max(1, math.ceil(0.95 * n))  # nearest-rank, as percentile()
+            seen = 0
+            p95 = 0
+            for value, count in enumerate(counts):
+                seen += count
+                if seen >= rank:
+                    p95 = value
+                    break
+            stats[key] = {
+                "mean": sum(value * count for value, count in enumerate(counts)) / n,
+                "p95": p95,
+                "peak": max(value for value, count in enumerate(counts) if count),
+                "busy": sum(counts[self.busy_threshold:]) / n,
+                "n": n,
+            }
+        return {"rate": self.rate, "overhead": self.overhead, "cores": stats}
+
+accel_sampler = None
+
+def get_accel_stats():
+    if accel_sampler is None:
+        return None
+    return accel_sampler.drain()
+
+# -------------------------------
+# Thermal Throttling Detector
+# -------------------------------
+
+THROTTLE_DEVFREQ = ("gpu", "npu")  # devfreq devices (by name suffix) watched besides the cpufreq policies
+THROTTLE_EPISODE_PCT = 25.0        # an interval counts as throttled at or above this share of time
+THROTTLE_SUSTAIN = 5.0             # seconds of throttled intervals before an episode is reported
+
+class FreqDomain:
+    """One cpufreq policy or devfreq device: where its cap, hardware max and residency live."""
+    __slots__ = ("name", "metric", "cap_path", "cur_path", "stats_path", "governor_path", "hw_max", "scale",
+                 "cooling", "prev_stats", "capped", "run_start", "episode")
+
+    def __init__(self, name, metric, cap_path, cur_path, stats_path, governor_path, hw_max, scale, cooling):
+        self.name = name
+        self.metric = metric
+        self.cap_path = cap_path
+        self.cur_path = cur_path
+        self.stats_path = stats_path
+        self.governor_path = governor_path
+        self.hw_max = hw_max
+        self.scale = scale  # frequency units per MHz
+        self.cooling = cooling
+        self.prev_stats = None
+        self.capped = False
+        self.run_start = None
+        self.episode = None
+
+def read_residency(text):
+    """Parse cpufreq stats/time_in_state or devfreq trans_stat into {freq: time}."""
+    residency = {}
+    for line in text.splitlines():
+        parts = line.replace("*", " ").replace(":", " ").split()
+        if len(parts) >= 2 and parts[0].isdigit() and parts[-1].isdigit():
+            residency[int(parts[0])] = int(parts[-1])
+    return residency
+
+class ThrottleDetector:
+    """Tells thermal throttling apart from ordinary idle downclocking.
+
+    Per cpufreq policy and GPU/NPU devfreq device, a sample compares the current
+    cap (scaling_max_freq / max_freq) with the hardware maximum and diffs the
+    time_in_state / trans_stat residency. The share of the interval spent below the
+    hardware maximum counts as throttled only while the cap was lowered and
+    something thermal explains it: a matching cooling device is active or a thermal
+    zone has reached its passive trip point. Domains and trip points are
+    discovered once.
+    """
+    def __init__(self):
+        self.domains = None
+        self.zones = None
+
+    def reset(self):
+        self.domains = None
+        self.zones = None
+
+    def discover(self):
+        global cpu_policies
+        if cpu_policies is None:
+            cpu_policies = discover_cpu_policies()
+        cooling = []
+        thermal_class = host_path("/sys/class/thermal")
+        try:
+            entries = sorted(os.listdir(thermal_class))
+        except Exception:
+            entries = []
+        self.zones = []
+        for entry in entries:
+            base = os.path.join(thermal_class, entry)
+            if entry.startswith("cooling_device"):
+                try:
+                    cooling.append((read_file(os.path.join(base, "type")).strip(), os.path.join(base, "cur_state")))
+                except Exception:
+                    pass
+            elif entry.startswith("thermal_zone"):
+                try:
+                    name = read_file(os.path.join(base, "type")).strip()
+                except Exception:
+                    continue
+                passive = []
+                for trip in range(16):
+                    try:
+                        trip_type = read_file(os.path.join(base, f"trip_point_{trip}_type")).strip()
+                        trip_temp = int(read_file(os.path.join(base, f"trip_point_{trip}_temp"))) / 1000.0
+                    except Exception:
+                        break
+                    if trip_type == "passive":
+                        passive.append(trip_temp)
+                if passive:
+                    self.zones.append((name, os.path.join(base, "temp"), min(passive)))
+        self.domains = []
+        for name, span, base, cpus in cpu_policies:
+            try:
+                hw_max = int(read_file(os.path.join(base, "cpuinfo_max_freq")))
+            except Exception:
+                continue
+            self.domains.append(FreqDomain(
+                name, span, os.path.join(base, "scaling_max_freq"), os.path.join(base, "scaling_cur_freq"),
+                os.path.join(base, "stats", "time_in_state"), os.path.join(base, "scaling_governor"), hw_max, 1000,
+                [path for ctype, path in cooling if ctype == f"cpufreq-cpu{cpus[0]}"]))
+        devfreq = host_path("/sys/class/devfreq")
+        try:
+            devices = sorted(os.listdir(devfreq))
+        except Exception:
+            devices = []
+        for dev in devices:
+            kind = dev.rpartition(".")[2]
+            if kind not in THROTTLE_DEVFREQ:
+                continue
+            base = os.path.join(devfreq, dev)
+            try:
+                hw_max = max(int(f) for f in read_file(os.path.join(base, "available_frequencies")).split())
+            except Exception:
+                continue
+            self.domains.append(FreqDomain(
+                kind.upper(), kind, os.path.join(base, "max_freq"), os.path.join(base, "cur_freq"),
+                os.path.join(base, "trans_stat"), os.path.join(base, "governor"), hw_max, 1000000,
+                [path for ctype, path in cooling if dev in ctype]))
+
+    def sample(self):
+        if self.domains is None:
+            self.discover()
+        now = time.time()
+        zones = []
+        hot = []
+        for name, path, trip in self.zones:
+            try:
+                temp = int(sysfs.read(path)) / 1000.0
+            except Exception:
+                continue
+            zones.append((name, temp, trip))
+            if temp >= trip:
+                hot.append((name, temp, trip))
+        domains = []
+        for dom in self.domains:
+            try:
+                cap = int(sysfs.read(dom.cap_path))
+                cur = int(sysfs.read(dom.cur_path))
+            except Exception:
+                continue
+            try:
+                stats = read_residency(sysfs.read(dom.stats_path))
+            except Exception:
+                stats = {}
+            try:
+                governor = sysfs.read(dom.governor_path).strip()
+            except Exception:
+                governor = ""
+            cooling = False
+            for path in dom.cooling:
+                try:
+                    cooling = cooling or int(sysfs.read(path)) > 0
+                except Exception:
+                    pass
+            capped = cap < dom.hw_max and (cooling or bool(hot))
+            below = throttled = 0.0
+            if dom.prev_stats is not None:
+                deltas = [(f, t - dom.prev_stats.get(f, t)) for f, t in stats.items()]
+                total = sum(d for _, d in deltas)
+                if total > 0:
+                    below = 100.0 * sum(d for f, d in deltas if f < dom.hw_max) / total
+                    if capped or dom.capped:
+                        throttled = below
+            dom.prev_stats = stats
+            dom.capped = capped
+            if throttled >= THROTTLE_EPISODE_PCT:
+                if dom.run_start is None:
+                    dom.run_start = now
+                if dom.episode is None and now - dom.run_start >= THROTTLE_SUSTAIN:
+                    dom.episode = dom.run_start
+            else:
+                dom.run_start = dom.episode = None
+            domains.append({"name": dom.name, "metric": dom.metric, "cur": cur // dom.scale,
+                            "cap": cap // dom.scale, "max": dom.hw_max // dom.scale, "below": below,
+                            "throttled": throttled, "episode": dom.episode, "governor": governor})
+        return {"domains": domains, "zones": zones, "hot": hot}
+
+    def state(self):
+        """Each domain's last residency and cap state as JSON-able data, for restore()."""
+        return {dom.metric: [dom.prev_stats, dom.capped] for dom in self.domains or ()}
+
+    def restore(self, state):
+        if self.domains is None:
+            self.discover()
+        for dom in self.domains:
+            if dom.metric in state:
+                stats, dom.capped = state[dom.metric]
+                dom.prev_stats = {int(f): t for f, t in stats.items()} if stats is not None else None
+
+throttle_detector = ThrottleDetector()
+
+def get_throttling():
+    return throttle_detector.sample()
+
+# -------------------------------
+# Power & Energy
+# -------------------------------
+
+# Rails are matched to a load domain by name (vdd_npu, vdd_gpu, vdd_cpu_big0, ...); the rest
+# are taken as whole-board input.
+POWER_DOMAINS = (("NPU", ("npu",)), ("GPU", ("gpu",)), ("CPU", ("cpu", "big", "lit")))
+POWER_WASTE_LOAD = 30    # a domain below this load %...
+POWER_WASTE_FREQ = 0.75  # ...while clocked at or above this share of its max frequency is flagged
+
+power_rails = None  # [(name, paths, divisor)], discovered on first use
+
+def discover_power_rails():
+    """[(name, paths, divisor)] of every readable power rail; watts = product of the files / divisor.
+
+    hwmon chips (INA2xx, INA3221 and the like) give power*_input in uW, or curr*_input (mA)
+    and in*_input (mV) with the same index; power_supply devices give power_now (uW) or
+    current_now x voltage_now (uA x uV).
+    """
+    rails = []
+    def add(name, paths, divisor):
+        try:
+            for path in paths:
+                int(read_file(path))
+        except Exception:
+            return
+        label = name
+        count = 2
+        while any(label == r[0] for r in rails):
+            label = f"{name}-{count}"
+            count += 1
+        rails.append((label, paths, divisor))
+    hwmon_class = host_path("/sys/class/hwmon")
+    try:
+        hwmons = sorted(os.listdir(hwmon_class), key=lambda h: int(re.sub(r"\D", "", h) or 0))
+    except Exception:
+        hwmons = []
+    for hwmon in hwmons:
+        base = os.path.join(hwmon_class, hwmon)
+        try:
+            chip = read_file(os.path.join(base, "name")).strip()
+            files = set(os.listdir(base))
+        except Exception:
+            continue
+        indexes = sorted({int(m.group(2)) for m in map(re.compile(r"^(power|curr)(\d+)_input$").match, files) if m})
+        for index in indexes:
+            label = chip if len(indexes) == 1 else f"{chip}.{index}"
+            for kind in ("power", "curr", "in"):
+                if f"{kind}{index}_label" in files:
+                    try:
+                        label = read_file(os.path.join(base, f"{kind}{index}_label")).strip() or label
+                    except Exception:
+                        pass
+                    break
+            if f"power{index}_input" in files:
+                add(label, (os.path.join(base, f"power{index}_input"),), 1e6)
+            elif f"in{index}_input" in files:
+                add(label, (os.path.join(base, f"curr{index}_input"), os.path.join(base, f"in{index}_input")), 1e6)
+    supply_class = host_path("/sys/class/power_supply")
+    try:
+        supplies = sorted(os.listdir(supply_class))
+    except Exception:
+        supplies = []
+    for supply in supplies:
+        base = os.path.join(supply_class, supply)
+        if os.path.exists(os.path.join(base, "power_now")):
+            add(supply, (os.path.join(base, "power_now"),), 1e6)
+        else:
+            add(supply, (os.path.join(base, "current_now"), os.path.join(base, "voltage_now")), 1e12)
+    return rails
+
+def power_domain(rail):
+    """The load domain ("NPU", "GPU", "CPU") a rail feeds, or None for a board-level rail."""
+    lowered = rail.lower()
+    for domain, keys in POWER_DOMAINS:
+        if any(key in lowered for key in keys):
+            return domain
+    return None
+
+def get_power():
+    """Watts per power rail, with the energy it used since the previous sample and since start.
+
+    Returns [(rail, watts, joules this interval, joules total)]. Energy is integrated with
+    the trapezoidal rule between samples, so the first sample of a rail reports 0.
+    """
+    global power_rails
+    if power_rails is None:
+        power_rails = discover_power_rails()
+    now = time.time()
+    rails = []
+    for name, paths, divisor in power_rails:
+        try:
+            watts = abs(math.prod(int(sysfs.read(path)) for path in paths)) / divisor
+        except Exception:
+            continue
+        joules = total = 0.0
+        prev = prev_power.get(name)
+        if prev is not None:
+            joules = (watts + prev[0]) / 2 * (now - prev[1])
+            total = prev[2] + joules
+        prev_power[name] = (watts, now, total)
+        rails.append((name, watts, joules, total))
+    return rails
+
+def power_efficiency(rails, cpu, gpu, npu, domains):
+    """Load per watt for CPU, GPU and NPU: [(domain, load %, MHz, max MHz, governor, watts, own rail, waste)].
+
+    A domain without a rail of its own is rated against the largest board-level rail
+    (own rail False). waste is True when the governor holds the domain near its maximum
+    frequency at a low load, i.e. it burns power without doing work.
+    """
+    watts = {}
+    board = 0.0
+    for name, rail_watts, _, _ in rails:
+        domain = power_domain(name)
+        if domain is None:
+            board = max(board, rail_watts)
+        else:
+            watts[domain] = watts.get(domain, 0.0) + rail_watts
+    cpu_loads, cpu_freqs, _, _ = cpu
+    gpu_load, gpu_freq = gpu
+    npu_load, npu_freq = npu
+    loads = {}
+    if cpu_loads:
+        loads["CPU"] = (sum(cpu_loads.values()) / len(cpu_loads), max(cpu_freqs.values(), default=0))
+    if gpu_load is not None:
+        loads["GPU"] = (gpu_load, gpu_freq)
+    npu_cores = parse_percentages(npu_load)
+    if npu_cores:
+        loads["NPU"] = (sum(npu_cores) / len(npu_cores), npu_freq)
+    rows = []
+    for domain, _ in reversed(POWER_DOMAINS):
+        if domain not in loads:
+            continue
+        load, freq = loads[domain]
+        members = [d for d in domains if d["metric"].startswith(domain.lower())]
+        max_freq = max((d["max"] for d in members), default=0)
+        governor = "/".join(sorted({d["governor"] for d in members if d["governor"]}))
+        own = domain in watts
+        domain_watts = watts[domain] if own else board
+        waste = load < POWER_WASTE_LOAD and max_freq > 0 and freq >= POWER_WASTE_FREQ * max_freq
+        rows.append((domain, load, freq, max_freq, governor, domain_watts, own, waste))
+    return rows
+
+# -------------------------------
+# Interrupts & Softirqs
+# -------------------------------
+
+IRQ_TOP = 8                  # interrupt sources listed, busiest first
+IRQ_IMBALANCE_SHARE = 0.5    # a core taking at least this share of device interrupts...
+IRQ_IMBALANCE_RATE = 1000.0  # ...while they total at least this many per second is flagged
+IRQ_BUSY_PCT = 20.0          # or a core spending this much of its time in irq + softirq
+
+class CpuCounterTable:
+    """Per-CPU counter table (/proc/interrupts, /proc/softirqs) turned into per-second rates.
+
+    The CPU column layout comes from the header line and is reused while the header is
+    unchanged (it only changes on CPU hotplug). Each sample is one pass over the rows,
+    splitting a row just into its id, one field per CPU and the trailing description;
+    a row whose text is the same as last time (an idle IRQ) is not parsed at all.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self.cpus = []
+        self.prev = {}  # {row id: (raw line, counts, description)}
+        self.prev_time = None
+
+    def reset(self):
+        self.header = None
+        self.cpus = []
+        self.prev = {}
+        self.prev_time = None
+
+    def sample(self):
+        """(cpus, [(row id, description, rate, [rate per CPU])]); rates are 0 on the first sample."""
+        try:
+            text = sysfs.read(host_path(self.path))
+        except OSError:
+            return [], []
+        header, _, body = text.partition("\n")
+        if header != self.header:
+            self.header = header
+            self.cpus = [int(c[3:]) for c in header.split() if c.startswith("CPU")]
+            self.prev = {}
+            self.prev_time = None
+        ncpus = len(self.cpus)
+        now = time.time()
+        dt = now - self.prev_time if self.prev_time is not None else 0.0
+        prev = self.prev
+        counts = {}
+        rows = []
+        idle = [0.0] * ncpus
+        for line in body.splitlines():
+            key, colon, _ = line.partition(":")
+            if not colon:
+                continue
+            key = key.strip()
+            old = prev.get(key)
+            if old is not None and old[0] == line:
+                counts[key] = old
+                rows.append((key, old[2], 0.0, idle))
+                continue
+            parts = line.split(None, ncpus + 1)
+            if len(parts) <= ncpus:
+                continue  # ERR:/MIS: carry one total, not a column per CPU
+            try:
+                values = [int(v) for v in parts[1:ncpus + 1]]
+            except ValueError:
+                continue
+            description = parts[ncpus + 1].strip() if len(parts) > ncpus + 1 else ""
+            counts[key] = (line, values, description)
+            if old is not None and dt > 0:
+                per_cpu = [(v - o) / dt for v, o in zip(values, old[1])]
+            else:
+                per_cpu = idle
+            rows.append((key, description, sum(per_cpu), per_cpu))
+        self.prev = counts
+        self.prev_time = now
+        return self.cpus, rows
+
+    def state(self):
+        """The last sample's counters as JSON-able data, for restore() in a later process."""
+        return {"header": self.header, "time": self.prev_time, "rows": self.prev}
+
+    def restore(self, state):
+        if state["header"] is None:
+            return
+        self.header = state["header"]
+        self.cpus = [int(c[3:]) for c in self.header.split() if c.startswith("CPU")]
+        self.prev = {key: tuple(row) for key, row in state["rows"].items()}
+        self.prev_time = state["time"]
+
+interrupt_table = CpuCounterTable("/proc/interrupts")
+softirq_table = CpuCounterTable("/proc/softirqs")
+
+def irq_name(key, description):
+    """Short label for an interrupt row: the device (last word of the description) or the IPI's name."""
+    if key.isdigit():
+        return description.split()[-1] if description else key
+    return description or key
+
+def per_cpu_interrupt(key, description):
+    """True for interrupts that fire on every core by design (IPIs, the arch timer and other GIC PPIs)."""
+    if not key.isdigit():
+        return True
+    words = description.split()
+    if "timer" in description:
+        return True
+    return len(words) >= 2 and words[0].startswith("GIC") and words[1].isdigit() and int(words[1]) < 32
+
+def get_interrupts():
+    """Interrupt and softirq rates from /proc/interrupts and /proc/softirqs deltas.
+
+    Returns {"cpus": [cpu, ...], "irqs": IRQ_TOP busiest [(id, name, rate, [rate per CPU])],
+    "softirqs": [(name, rate, [rate per CPU])], "device": [device interrupts/s per CPU]}.
+    "device" leaves out per-CPU interrupts, so it shows where device IRQs land.
+    """
+    cpus, rows = interrupt_table.sample()
+    device = [0.0] * len(cpus)
+    for key, description, rate, per_cpu in rows:
+        if rate and not per_cpu_interrupt(key, description):
+            device = [d + r for d, r in zip(device, per_cpu)]
+    top = heapq.nlargest(IRQ_TOP, (row for row in rows if row[2] > 0), key=lambda row: row[2])
+    softirq_cpus, softirqs = softirq_table.sample()
+    return {"cpus": cpus,
+            "irqs": [(key, irq_name(key, description), rate, per_cpu) for key, description, rate, per_cpu in top],
+            "softirqs": [(name, rate, per_cpu) for name, _, rate, per_cpu in softirqs] if softirq_cpus == cpus else [],
+            "device": device}
+
+def irq_imbalance(interrupts, cpu_times):
+    """Cores carrying a lopsided interrupt load: [(cpu, device IRQ share, irq + softirq time %)].
+
+    A core is flagged when it takes IRQ_IMBALANCE_SHARE of all device interrupts (at
+    IRQ_IMBALANCE_RATE or more in total, on a machine with more than one core) or spends
+    IRQ_BUSY_PCT of its time in irq and softirq context.
+    """
+    total = sum(interrupts["device"])
+    flagged = []
+    for cpu, rate in zip(interrupts["cpus"], interrupts["device"]):
+        share = rate / total if total else 0.0
+        times = cpu_times.get(cpu)
+        busy = times["irq"] + times["softirq"] if times else 0.0
+        if (len(interrupts["cpus"]) > 1 and total >= IRQ_IMBALANCE_RATE and share >= IRQ_IMBALANCE_SHARE) \
+                or busy >= IRQ_BUSY_PCT:
+            flagged.append((cpu, share, busy))
+    return flagged
+
+# -------------------------------
+# Self-Instrumentation
+# -------------------------------
+
+class Profiler:
+    """Timings of myrktop's own work plus its CPU time, RSS and subprocess spawns.
+
+    Every collector run, build_dashboard and urwid render is recorded by name in
+    a rolling window, so the panel (and --profile) show recent averages and p99
+    rather than lifetime figures.
+    """
+    def __init__(self, window=200):
+        self.window = window
+        self.timings = {}
+        self.runs = {}
+        self.subprocesses = 0
+        self.tick_mark = 0
+        self.tick_spawns = collections.deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.visible = False
+        self.started = time.monotonic()
+        self.cpu_mark = (self.started, self.cpu_time())
+        self.cpu_percent = 0.0
+
+    @staticmethod
+    def cpu_time():
+        t = os.times()
+        return t.user + t.system
+
+    @staticmethod
+    def rss():
+        try:
+            with open("/proc/self/statm", "r") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except Exception:
+            return None
+
+    def record(self, name, seconds):
+        with self.lock:
+            series = self.timings.get(name)
+            if series is None:
+                series = self.timings[name] = collections.deque(maxlen=self.window)
+            series.append(seconds)
+            self.runs[name] = self.runs.get(name, 0) + 1
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def spawned(self):
+        with self.lock:
+            self.subprocesses += 1
+
+    def end_tick(self):
+        """Close one refresh: count its subprocess spawns and update the CPU percentage."""
+        with self.lock:
+            self.tick_spawns.append(self.subprocesses - self.tick_mark)
+            self.tick_mark = self.subprocesses
+        now, cpu = time.monotonic(), self.cpu_time()
+        last_time, last_cpu = self.cpu_mark
+        if now - last_time >= 1.0:
+            self.cpu_percent = 100.0 * (cpu - last_cpu) / (now - last_time)
+            self.cpu_mark = (now, cpu)
+
+    def stats(self):
+        """[(name, runs, last, avg, p99, max)] in seconds, slowest average first."""
+        with self.lock:
+            items = [(name, self.runs[name], list(series)) for name, series in self.timings.items()]
+        rows = []
+        for name, runs, values in items:
+            ordered = sorted(values)
+            rows.append((name, runs, values[-1], sum(values) / len(values), percentile(ordered, 99), ordered[-1]))
+        rows.sort(key=lambda r: r[3], reverse=True)
+        return rows
+
+    def summary(self):
+        rss = self.rss()
+        spawns = list(self.tick_spawns)
+        return (f"CPU {self.cpu_percent:.1f}% (total {self.cpu_time():.1f}s)  "
+                f"RSS {human_size(rss, iec=True) if rss is not None else 'N/A'}  "
+                f"subprocesses {spawns[-1] if spawns else 0} last tick, "
+                f"{sum(spawns) / len(spawns) if spawns else 0:.1f}/tick avg, {self.subprocesses} total")
+
+    def report(self):
+        lines = [f"{'name':<18} {'runs':>6} {'last ms':>9} {'avg ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for name, runs, last, avg, p99, peak in self.stats():
+            lines.append(f"{name:<18} {runs:>6d} {last * 1e3:>9.2f} {avg * 1e3:>9.2f} {p99 * 1e3:>9.2f} {peak * 1e3:>9.2f}")
+        lines.append(self.summary())
+        return lines
+
+profiler = Profiler()
+
+def run_command(cmd, **kwargs):
+    """subprocess.run wrapper so every spawn is counted by the profiler."""
+    import subprocess
+    profiler.spawned()
+    return subprocess.run(cmd, **kwargs)
+
+# -------------------------------
+# New SMART/Storage Debug Code
+# -------------------------------
+
+# smartctl -d types tried in order until one can read the drive. "auto" is also what
+# plain `smartctl -a` uses; "sat" is needed behind many USB-SATA bridges.
+SMART_DEVICE_TYPES = ("auto", "sat")
+SMART_TIMEOUT = 15
+
+# Working -d type per drive, keyed by the drive's sysfs device path (its port/bridge),
+# so a drive is probed once and not again after restarts.
+smart_probe = None
+smart_probe_lock = threading.Lock()
+
+def smart_probe_key(dev):
+    return os.path.realpath(host_path(f"/sys/block/{dev}/device"))
+
+def remembered_smart_type(key):
+    global smart_probe
+    with smart_probe_lock:
+        if smart_probe is None:
+            cached = read_cache("smart-probe.json")
+            smart_probe = cached if isinstance(cached, dict) else {}
+        return smart_probe.get(key)
+
+def remember_smart_type(key, dev_type):
+    with smart_probe_lock:
+        smart_probe[key] = dev_type
+        write_cache("smart-probe.json", smart_probe)
+
+def run_smartctl(dev, dev_type):
+    """Run `smartctl -j -a -d dev_type /dev/dev`; return (parsed JSON or None if unusable, debug text)."""
+    cmd = ["smartctl", "-j", "-a", "-d", dev_type, f"/dev/{dev}"]
+    if os.geteuid() != 0:
+        cmd = ["sudo", "-n"] + cmd
+    try:
+        result = run_command(cmd, capture_output=True, text=True, timeout=SMART_TIMEOUT)
+    except Exception as e:
+        return None, f"Exception: {str(e)}"
+    try:
+        data = json.loads(result.stdout)
+    except ValueError:
+        return None, (result.stdout + "\n" + result.stderr).strip()
+    messages = "; ".join(m.get("string", "") for m in data.get("smartctl", {}).get("messages", []))
+    # Exit status bit 0: bad command line, bit 1: device could not be opened.
+    if result.returncode & 3 or not data.get("model_name"):
+        return None, messages or f"exit status {result.returncode}"
+    return data, messages
+
+def parse_smart_json(dev, data):
+    """Single pass over smartctl's JSON report; returns (dtype, info) with the fields format_storage_info shows."""
+    def field(value, suffix=""):
+        return "N/A" if value is None else f"{value}{suffix}"
+    info = {"model": data.get("model_name") or "Unknown",
+            "temp": field(data.get("temperature", {}).get("current")),
+            "power_hours": field(data.get("power_on_time", {}).get("hours"))}
+    if dev.startswith("nvme") or data.get("device", {}).get("protocol") == "NVMe":
+        health = data.get("nvme_smart_health_information_log", {})
+        info["avail_spare"] = field(health.get("available_spare"), "%")
+        return "nvme", info
+    rpm = data.get("rotation_rate")
+    info["rotation"] = f"{rpm} rpm" if rpm else None  # 0 = solid state
+    info["wear_level"] = None
+    for attr in data.get("ata_smart_attributes", {}).get("table", []):
+        if attr.get("name") == "Wear_Leveling_Count":
+            info["wear_level"] = str(attr.get("value"))
+            break
+    return "ata", info
+
+def get_drive_smart_info(dev):
+    """SMART details for one drive, trying the remembered -d type first and probing only if it fails."""
+    key = smart_probe_key(dev)
+    known = remembered_smart_type(key)
+    order = ((known,) if known else ()) + tuple(t for t in SMART_DEVICE_TYPES if t != known)
+    tried = {}
+    for dev_type in order:
+        data, debug = run_smartctl(dev, dev_type)
+        tried[f"smartctl -d {dev_type}"] = debug[:300] + "..." if len(debug) > 300 else debug
+        if data is not None:
+            if dev_type != known:
+                remember_smart_type(key, dev_type)
+            return parse_smart_json(dev, data)
+    return ("unknown", {"model": "Unknown", "temp": "N/A", "power_hours": "N/A", "avail_spare": "N/A",
+                        "debug": {"cmd": "None", "all": tried}})
+
+def get_storage_info():
+    """Return [(dev, dtype, info)] with SMART details for every SATA/NVMe disk."""
+    devices = []
+    if ROOT != "/":
+        # smartctl talks to the real /dev nodes, which a synthetic root does not have.
+        return []
+    try:
+        for name in sorted(os.listdir(host_path("/sys/block"))):
+            if re.match(r"^sd[a-z]+$", name) or name.startswith("nvme"):
+                devices.append(name)
+    except Exception:
+        devices = []
+    # One thread per drive: a slow USB bridge or spun-down disk no longer delays the rest,
+    # and every smartctl call is bounded by SMART_TIMEOUT.
+    results = {}
+    def probe(dev):
+        results[dev] = get_drive_smart_info(dev)
+    threads = [threading.Thread(target=probe, args=(dev,), daemon=True) for dev in devices]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [(dev,) + results[dev] for dev in devices if dev in results]
+
+def format_storage_info(storage):
+    """Split SMART results into display lines for NVMe and ATA devices."""
+    nvme_list = []
+    ata_list = []
+    for dev, dtype, info in storage:
+        if dtype == "nvme":
+            line = f"/dev/{dev} - {info.get('model', 'Unknown')}"
+            if info.get("temp") and info.get("temp") != "N/A":
+                line += f" {info.get('temp')}°C"
+            if info.get("power_hours") and info.get("power_hours") != "N/A":
+                line += f" {info.get('power_hours')}H"
+            if info.get("avail_spare") and info.get("avail_spare") != "N/A":
+                line += f" {info.get('avail_spare')}"
+            nvme_list.append(line)
+        elif dtype == "ata":
+            line = f"/dev/{dev} - {info.get('model', 'Unknown')}"
+            if info.get("temp") and info.get("temp") != "N/A":
+                line += f" {info.get('temp')}°C"
+            if info.get("power_hours") and info.get("power_hours") != "N/A":
+                line += f" {info.get('power_hours')}H"
+            if info.get("rotation"):
+                line += f" {info.get('rotation')}"
+            if info.get("wear_level"):
+                line += f" {info.get('wear_level')}%"
+            ata_list.append(line)
+        else:
+            debug_info = info.get("debug", {})
+            all_cmds = debug_info.get("all", {})
+            debug_str = ""
+            for cmd, out in all_cmds.items():
+                debug_str += f"\n(cmd: {cmd}) -> {out}"
+            line = f"/dev/{dev} - Unknown SMART data (Selected cmd: {debug_info.get('cmd','')}){debug_str}"
+            ata_list.append(line)
+    return nvme_list, ata_list
+
+# -------------------------------
+# Collector Scheduler
+# -------------------------------
+
+class CachedCollector:
+    """A collector function with its own refresh interval and the last value it returned.
+
+    interval=0 refreshes once per tick (see CollectorScheduler.next_tick), interval=None
+    collects only once. A value is stale when its last run failed or the current run
+    is past its timeout.
+    """
+    def __init__(self, name, func, interval, default=None, timeout=2.0):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.timeout = timeout
+        self.value = default
+        self.updated = None
+        self.tick = None
+        self.pending = False
+        self.started = None
+        self.failed = False
+
+    def due(self, now, tick):
+        if self.updated is None:
+            return True
+        if self.interval is None:
+            return False
+        if self.interval == 0:
+            return tick != self.tick
+        return now - self.updated >= self.interval
+
+    def stale(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        if self.failed:
+            return True
+        return self.pending and now - self.started > self.timeout
+
+    def call(self):
+        with profiler.timed(self.name):
+            return self.func()
+
+    def refresh(self, now=None, tick=None):
+        self.value = self.call()
+        self.updated = time.monotonic() if now is None else now
+        self.tick = tick
+        self.failed = False
+        return self.value
+
+    def get(self, tick, now=None):
+        if now is None:
+            now = time.monotonic()
+        if self.due(now, tick):
+            self.refresh(now, tick)
+        return self.value
+
+    async def refresh_async(self, aloop):
+        """Run the collector in a worker thread without blocking the event loop.
+
+        A run that outlives its timeout marks the value stale but is not abandoned:
+        no second run is started until it returns, so a hung df or smartctl cannot
+        pile up threads.
+        """
+        import asyncio
+        self.pending = True
+        self.started = time.monotonic()
+        future = run_in_thread(aloop, self.call)
+        try:
+            try:
+                value = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                self.failed = True
+                value = await future
+        except Exception:
+            self.failed = True
+            self.updated = time.monotonic()
+        else:
+            self.value = value
+            self.updated = time.monotonic()
+            self.failed = False
+        finally:
+            self.pending = False
+
+def run_in_thread(aloop, func):
+    """Run func in a daemon thread and return an asyncio future for its result.
+
+    Daemon threads (rather than an executor) so that quitting is never held up
+    by a collector stuck in uninterruptible I/O.
+    """
+    future = aloop.create_future()
+    def deliver(setter, arg):
+        if not future.done():
+            setter(arg)
+    def worker():
+        try:
+            result = func()
+        except Exception as e:
+            callback = (deliver, future.set_exception, e)
+        else:
+            callback = (deliver, future.set_result, result)
+        try:
+            aloop.call_soon_threadsafe(*callback)
+        except RuntimeError:
+            pass  # event loop already closed
+    threading.Thread(target=worker, daemon=True).start()
+    return future
+
+class CollectorScheduler:
+    def __init__(self):
+        self.collectors = {}
+        self.background = False
+        self.tick = 0
+
+    def next_tick(self):
+        """Start a new sampling pass: interval-0 collectors run again, at most once per pass."""
+        self.tick += 1
+
+    def register(self, name, func, interval, default=None, timeout=2.0):
+        self.collectors[name] = CachedCollector(name, func, interval, default, timeout)
+
+    def get(self, name):
+        """Return the cached value, collecting synchronously if due unless running in the background."""
+        collector = self.collectors[name]
+        if self.background:
+            return collector.value
+        return collector.get(self.tick)
+
+    def stale(self, *names):
+        now = time.monotonic()
+        return any(self.collectors[n].stale(now) for n in names)
+
+    def poll(self, aloop, names=None, on_done=None):
+        """Start a background refresh for every collector (or each of names) that is due and not already running.
+
+        on_done, if given, is called on the event loop as each of those refreshes finishes.
+        """
+        self.background = True
+        self.next_tick()
+        now = time.monotonic()
+        for collector in self.collectors.values():
+            if names is not None and collector.name not in names:
+                continue
+            if not collector.pending and collector.due(now, self.tick):
+                collector.tick = self.tick
+                task = aloop.create_task(collector.refresh_async(aloop))
+                if on_done is not None:
+                    task.add_done_callback(lambda _: on_done())
+
+# Refresh interval in seconds per collector (0 = every tick, None = once).
+collectors = CollectorScheduler()
+collectors.register("device", get_device_info, None, ("N/A", ""))
+collectors.register("uptime", get_uptime, 30, "N/A")
+collectors.register("docker", get_docker_status, 10, "")
+collectors.register("cpu", get_cpu_info, 0, ({}, {}, {}, []))
+collectors.register("gpu", get_gpu_info, 0, (None, None))
+collectors.register("npu", get_npu_info, 0, (None, None))
+collectors.register("rga", get_rga_info, 0, None)
+collectors.register("ram", get_ram_swap_info, 2, (None, None, None, None))
+collectors.register("memory", get_memory_pressure, 2,
+                    {"psi": {}, "rates": {}, "cma": None, "cma_failures": None, "dmabuf": None})
+collectors.register("temps", get_temperatures, 2, [])
+collectors.register("throttle", get_throttling, 1, {"domains": [], "zones": [], "hot": []})
+collectors.register("power", get_power, 1, [])
+collectors.register("interrupts", get_interrupts, 1, {"cpus": [], "irqs": [], "softirqs": [], "device": []})
+collectors.register("net", get_network_traffic, 0, {})
+collectors.register("diskio", get_disk_io, 0, [])
+collectors.register("accel", get_accel_stats, 0, None)
+collectors.register("procs", get_top_processes, 1, {"count": 0, "cpu": [], "rss": [], "io": []})
+collectors.register("containers", get_containers, 2, {"cgroup2": False, "containers": []}, timeout=5)
+collectors.register("disk_usage", get_fstab_disk_usage, 30, [], timeout=5)
+collectors.register("smart", get_storage_info, 300, [], timeout=60)
+
+# -------------------------------
+# Numeric Samples
+# -------------------------------
+
+def parse_percentages(text):
+    """Per-core loads from an NPU/RGA load string such as "12% 0% 3%"."""
+    if not text:
+        return []
+    return [int(p) for p in re.findall(r'(\d+)%', text)]
+
+def collect_metrics():
+    """Flatten the current collector values into {metric: number} with dotted names.
+
+    Names are "<group>.<field>[.<instance>]", e.g. cpu.load.3, npu.load.0, temp.soc_thermal,
+    net.rx.eth0 (Mbps), disk.read.nvme0n1 (MB/s), container.cpu.<name> (% of one core). Values that are unavailable are None.
+    """
+    metrics = {}
+    cpu_loads, cpu_freqs, _, _ = collectors.get("cpu")
+    for core in sorted(cpu_loads):
+        metrics[f"cpu.load.{core}"] = cpu_loads[core]
+        metrics[f"cpu.freq.{core}"] = cpu_freqs.get(core)
+    gpu_load, gpu_freq = collectors.get("gpu")
+    if gpu_load is not None:
+        metrics["gpu.load"] = gpu_load
+        metrics["gpu.freq"] = gpu_freq
+    npu_load, npu_freq = collectors.get("npu")
+    if npu_load is not None:
+        for core, load in enumerate(parse_percentages(npu_load)):
+            metrics[f"npu.load.{core}"] = load
+        metrics["npu.freq"] = npu_freq
+    rga_info = collectors.get("rga")
+    if rga_info is not None:
+        for core, load in enumerate(parse_percentages(rga_info)):
+            metrics[f"rga.load.{core}"] = load
+    ram_used, ram_total, swap_used, swap_total = collectors.get("ram")
+    metrics["ram.used"] = ram_used
+    metrics["ram.total"] = ram_total
+    metrics["swap.used"] = swap_used
+    metrics["swap.total"] = swap_total
+    memory = collectors.get("memory")
+    for resource, kinds in memory["psi"].items():
+        for kind, averages in kinds.items():
+            metrics[f"psi.{kind}.{resource}"] = averages[0]
+    for name, rate in memory["rates"].items():
+        metrics[f"vm.{name}"] = rate
+    if memory["cma"] is not None:
+        metrics["cma.used"], metrics["cma.total"] = memory["cma"]
+    for sensor_name, temp in collectors.get("temps"):
+        metrics[f"temp.{sensor_name}"] = temp
+    for iface, (rx_rate, tx_rate) in collectors.get("net").items():
+        metrics[f"net.rx.{iface}"] = rx_rate
+        metrics[f"net.tx.{iface}"] = tx_rate
+    for domain in collectors.get("throttle")["domains"]:
+        metrics[f"throttle.{domain['metric']}"] = domain["throttled"]
+    interrupts = collectors.get("interrupts")
+    for cpu, rate in zip(interrupts["cpus"], interrupts["device"]):
+        metrics[f"irq.cpu{cpu}"] = rate
+    for name, rate, _ in interrupts["softirqs"]:
+        metrics[f"softirq.{name}"] = rate
+    for rail, watts, _, total in collectors.get("power"):
+        metrics[f"power.{rail}"] = watts
+        metrics[f"energy.{rail}"] = total
+    for container in collectors.get("containers")["containers"]:
+        metrics[f"container.cpu.{container['name']}"] = container["cpu"]
+        metrics[f"container.memory.{container['name']}"] = container["mem"]
+        metrics[f"container.read.{container['name']}"] = container["read"]
+        metrics[f"container.write.{container['name']}"] = container["write"]
+    for disk, stats, _ in collectors.get("diskio"):
+        metrics[f"disk.read.{disk}"] = stats["read"]
+        metrics[f"disk.write.{disk}"] = stats["write"]
+        metrics[f"disk.iops.{disk}"] = stats["read_iops"] + stats["write_iops"]
+        metrics[f"disk.await.{disk}"] = stats["await"]
+        metrics[f"disk.util.{disk}"] = stats["util"]
+    return metrics
+
+def summary_metrics(metrics):
+    """Board-wide aggregates of collect_metrics(): cpu.avg, temp.max and total network/disk throughput."""
+    cpu = [v for k, v in metrics.items() if k.startswith("cpu.load.") and v is not None]
+    temps = [v for k, v in metrics.items() if k.startswith("temp.") and v is not None]
+    summary = {"cpu.avg": sum(cpu) / len(cpu) if cpu else None, "temp.max": max(temps, default=None)}
+    for total, prefix in (("net.rx", "net.rx."), ("net.tx", "net.tx."),
+                          ("disk.read", "disk.read."), ("disk.write", "disk.write.")):
+        summary[total] = sum(v for k, v in metrics.items() if k.startswith(prefix) and v is not None)
+    return summary
+
+# -------------------------------
+# History Recorder (--record / --query)
+# -------------------------------
+#
+# File layout: a HISTORY_HEADER_SIZE-aligned header followed by fixed-size chunks of
+# HISTORY_CHUNK_ROWS rows. Inside a chunk the data is columnar: the timestamps
+# (float64) first, then one block per metric column, each block padded to 8 bytes.
+# Every metric column has a fixed-width struct type and a scale, so loads take
+# one byte per sample and memory two. The row count in the header is only
+# advanced after a row is fully written, so readers never see a torn sample.
+
+HISTORY_MAGIC = b"MRKTREC1"
+HISTORY_HEADER_SIZE = 4096
+HISTORY_HEADER = struct.Struct("<8sIIIQ")  # magic, version, chunk_rows, ncols, rows
+HISTORY_COLUMN = struct.Struct("<56sc3xf")  # name, typecode, scale
+HISTORY_CHUNK_ROWS = 4096
+HISTORY_MISSING = {"B": 0xFF, "H": 0xFFFF, "h": -0x8000, "I": 0xFFFFFFFF}
+
+def history_column_format(name):
+    """(struct typecode, scale) used to store a metric; stored value = round(value * scale)."""
+    if ".load" in name or name == "cpu.avg" or name.startswith("throttle."):
+        return "B", 1.0
+    if ".freq" in name:
+        return "H", 1.0
+    if name.startswith("temp."):
+        return "h", 10.0
+    if name.startswith(("ram.", "swap.", "cma.", "container.memory.")):
+        return "I", 1.0 / 1048576  # MiB
+    if name.startswith(("psi.", "power.")):
+        return "H", 100.0  # hundredths of a percent / 10 mW
+    return "f", 1.0
+
+def _align(n, to):
+    return (n + to - 1) // to * to
+
+class HistoryFile:
+    """Append-only, memory-mapped columnar sample history."""
+    def __init__(self, path, columns=None):
+        """Open an existing history file, or create one with the given metric columns."""
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if not exists and columns is None:
+            raise FileNotFoundError(path)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT if columns is not None else os.O_RDONLY, 0o644)
+        self.writable = columns is not None
+        if exists:
+            self._load_header()
+        else:
+            self._create(columns)
+        self._layout()
+        self.mm = None
+        self._map()
+
+    def _create(self, columns):
+        self.columns = [(name.encode("utf-8")[:56].decode("utf-8", "ignore"),) + history_column_format(name)
+                        for name in columns]
+        limit = (HISTORY_HEADER_SIZE * 16 - HISTORY_HEADER.size) // HISTORY_COLUMN.size
+        if len(self.columns) > limit:
+            raise ValueError(f"{len(self.columns)} metric columns, a history file holds at most {limit}")
+        self.chunk_rows = HISTORY_CHUNK_ROWS
+        self.rows = 0
+        header = bytearray(self._header_size())
+        HISTORY_HEADER.pack_into(header, 0, HISTORY_MAGIC, 1, self.chunk_rows, len(self.columns), 0)
+        for i, (name, typecode, scale) in enumerate(self.columns):
+            HISTORY_COLUMN.pack_into(header, HISTORY_HEADER.size + i * HISTORY_COLUMN.size,
+                                     name.encode("utf-8"), typecode.encode(), scale)
+        os.pwrite(self.fd, bytes(header), 0)
+
+    def _load_header(self):
+        raw = os.pread(self.fd, HISTORY_HEADER.size, 0)
+        magic, version, self.chunk_rows, ncols, self.rows = HISTORY_HEADER.unpack(raw)
+        if magic != HISTORY_MAGIC or version != 1:
+            raise ValueError(f"{self.path} is not a myrktop history file")
+        table = os.pread(self.fd, ncols * HISTORY_COLUMN.size, HISTORY_HEADER.size)
+        self.columns = []
+        for i in range(ncols):
+            name, typecode, scale = HISTORY_COLUMN.unpack_from(table, i * HISTORY_COLUMN.size)
+            self.columns.append((name.rstrip(b"\x00").decode("utf-8"), typecode.decode(), scale))
+
+    def _header_size(self):
+        return _align(HISTORY_HEADER.size + len(self.columns) * HISTORY_COLUMN.size, HISTORY_HEADER_SIZE)
+
+    def _layout(self):
+        self.header_size = self._header_size()
+        self.index = {name: i for i, (name, _, _) in enumerate(self.columns)}
+        self.offsets = []
+        offset = _align(8 * self.chunk_rows, 8)  # timestamps come first
+        for _, typecode, _ in self.columns:
+            self.offsets.append(offset)
+            offset += _align(struct.calcsize(typecode) * self.chunk_rows, 8)
+        self.chunk_size = offset
+
+    def _map(self):
+        if self.mm is not None:
+            self.mm.close()
+        size = os.fstat(self.fd).st_size
+        chunks = max(1, -(-(size - self.header_size) // self.chunk_size))
+        if self.writable and size < self.header_size + chunks * self.chunk_size:
+            os.ftruncate(self.fd, self.header_size + chunks * self.chunk_size)
+        access = mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ
+        self.mm = mmap.mmap(self.fd, self.header_size + chunks * self.chunk_size, access=access)
+        self.capacity = chunks * self.chunk_rows
+
+    def _grow(self):
+        os.ftruncate(self.fd, self.header_size + (self.capacity // self.chunk_rows + 1) * self.chunk_size)
+        self._map()
+
+    def append(self, timestamp, metrics):
+        if self.rows >= self.capacity:
+            self._grow()
+        chunk, row = divmod(self.rows, self.chunk_rows)
+        base = self.header_size + chunk * self.chunk_size
+        struct.pack_into("<d", self.mm, base + 8 * row, timestamp)
+        for (name, typecode, scale), offset in zip(self.columns, self.offsets):
+            value = metrics.get(name)
+            if value is None:
+                stored = HISTORY_MISSING.get(typecode, float("nan"))
+            elif typecode == "f":
+                stored = value * scale
+            else:
+                stored = min(max(round(value * scale), 0 if typecode in "BHI" else -0x7FFF),
+                             HISTORY_MISSING[typecode] - 1 if typecode in "BHI" else 0x7FFF)
+            struct.pack_into("<" + typecode, self.mm, base + offset + struct.calcsize(typecode) * row, stored)
+        self.rows += 1
+        struct.pack_into("<Q", self.mm, HISTORY_HEADER.size - 8, self.rows)
+
+    def timestamp(self, row):
+        chunk, row = divmod(row, self.chunk_rows)
+        return struct.unpack_from("<d", self.mm, self.header_size + chunk * self.chunk_size + 8 * row)[0]
+
+    def find_row(self, timestamp):
+        """First row whose timestamp is >= timestamp (rows are in time order)."""
+        lo, hi = 0, self.rows
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def column_values(self, name, start, end):
+        """Stored values of one column for rows [start, end), scaled back and without gaps.
+
+        Each chunk's block is read through a cast memoryview of the mapping, so only
+        the requested column and range are touched.
+        """
+        i = self.index[name]
+        _, typecode, scale = self.columns[i]
+        missing = HISTORY_MISSING.get(typecode)
+        values = array.array("d")
+        view = memoryview(self.mm)
+        try:
+            row = start
+            while row < end:
+                chunk, first = divmod(row, self.chunk_rows)
+                last = min(self.chunk_rows, first + end - row)
+                base = self.header_size + chunk * self.chunk_size + self.offsets[i]
+                itemsize = struct.calcsize(typecode)
+                block = view[base + first * itemsize:base + last * itemsize].cast(typecode)
+                if typecode == "f":
+                    values.extend(v for v in block if v == v)
+                elif scale == 1.0:
+                    values.extend(v for v in block if v != missing)
+                else:
+                    values.extend(v / scale for v in block if v != missing)
+                block.release()
+                row += last - first
+        finally:
+            view.release()
+        return values
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.flush()
+            self.mm.close()
+            self.mm = None
+        os.close(self.fd)
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def parse_time_arg(text, now=None):
+    """Accept epoch seconds, an ISO date/time, or an offset into the past such as 8h, 30m, 2d."""
+    if now is None:
+        now = time.time()
+    m = re.fullmatch(r"-?(\d+(?:\.\d+)?)\s*([smhdw])(?:\s*ago)?", text.strip())
+    if m:
+        return now - float(m.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[m.group(2)]
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.datetime.fromisoformat(text).timestamp()
+
+# Series written by --record. Per-core, per-IRQ, per-NIC, per-disk and per-container
+# metrics come and go (and scale with the board), so only their board-wide totals from
+# summary_metrics() are kept; the prefixed series name fixed hardware (NPU/RGA cores,
+# thermal zones, cpufreq domains, power rails) and are all present from the first sample.
+RECORD_SERIES = ("cpu.avg", "gpu.load", "gpu.freq", "npu.freq", "ram.used", "swap.used", "cma.used",
+                 "temp.max", "net.rx", "net.tx", "disk.read", "disk.write")
+RECORD_PREFIXES = ("npu.load.", "rga.load.", "temp.", "throttle.", "psi.some.", "power.")
+
+def record_sample(metrics):
+    """The RECORD_SERIES / RECORD_PREFIXES subset of a sample, with its summary_metrics() totals."""
+    sample = summary_metrics(metrics)
+    for name, value in metrics.items():
+        if name in RECORD_SERIES or name.startswith(RECORD_PREFIXES):
+            sample[name] = value
+    return sample
+
+# Storage tiers: FILE gets one row of RECORD_ROLLUP-second means (under 1 MB a week on
+# an RK3588), while the raw samples go to FILE.raw, which is rotated to FILE.raw.1
+# every RECORD_RAW_HOURS, so between that and twice that of raw history is kept.
+RECORD_ROLLUP = 60
+RECORD_RAW_HOURS = 6
+
+def raw_history_paths(path):
+    """The raw-sample files of a --record FILE, oldest first."""
+    return [path + ".raw.1", path + ".raw"]
+
+class HistoryRollup:
+    """Averages samples into one HistoryFile row per period seconds."""
+    def __init__(self, history, period=RECORD_ROLLUP):
+        self.history = history
+        self.period = period
+        self.bucket = None
+        self.sums = {}
+        self.counts = {}
+
+    def add(self, timestamp, sample):
+        bucket = int(timestamp // self.period)
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+        for name, value in sample.items():
+            if value is not None and name in self.history.index:
+                self.sums[name] = self.sums.get(name, 0.0) + value
+                self.counts[name] = self.counts.get(name, 0) + 1
+
+    def flush(self):
+        if self.counts:
+            self.history.append(self.bucket * self.period,
+                                {name: total / self.counts[name] for name, total in self.sums.items()})
+        self.sums = {}
+        self.counts = {}
+
+def run_recorder(path, interval, raw_hours=RECORD_RAW_HOURS):
+    """Headless mode: sample every interval seconds into the history tiers until interrupted."""
+    rollup = raw = None
+    unrecorded = set()
+    old_raw_path, raw_path = raw_history_paths(path)
+    next_tick = time.monotonic()
+    try:
+        while True:
+            collectors.next_tick()
+            metrics = collect_metrics()
+            sample = record_sample(metrics)
+            now = time.time()
+            if rollup is None:
+                try:
+                    rollup = HistoryRollup(HistoryFile(path, columns=list(sample)))
+                    raw = HistoryFile(raw_path, columns=list(sample))
+                except ValueError as e:
+                    sys.exit(f"myrktop: cannot record to {path}: {e}")
+            elif raw.rows and now - raw.timestamp(0) >= raw_hours * 3600:
+                raw.close()
+                os.replace(raw_path, old_raw_path)  # drops the oldest raw samples
+                raw = HistoryFile(raw_path, columns=[name for name, _, _ in rollup.history.columns])
+            for name in sample.keys() - rollup.history.index.keys() - unrecorded:
+                unrecorded.add(name)
+                sys.stderr.write(f"myrktop: {name} appeared after {path} was created and is not recorded\n")
+            # Files from older versions may hold per-instance columns, so pass the full sample too.
+            row = {**metrics, **sample}
+            raw.append(now, row)
+            rollup.add(now, row)
+            next_tick += interval
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if rollup is not None:
+            rollup.flush()
+            rollup.history.close()
+        if raw is not None:
+            raw.close()
+
+def run_query(path, since=None, until=None, patterns=None):
+    """Print statistics for a --record FILE: from its raw samples when since lies within them, else from the means."""
+    raw = []
+    for raw_path in raw_history_paths(path):
+        try:
+            history = HistoryFile(raw_path)
+        except FileNotFoundError:
+            continue
+        if history.rows:
+            raw.append(history)
+        else:
+            history.close()
+    if raw and since is not None and since >= raw[0].timestamp(0):
+        files, kind = raw, "raw samples"
+    else:
+        for history in raw:
+            history.close()
+        files, kind = [HistoryFile(path)], f"{RECORD_ROLLUP}s means"
+    try:
+        ranges = []
+        for history in files:
+            start = history.find_row(since) if since is not None else 0
+            end = history.find_row(until) if until is not None else history.rows
+            if start < end:
+                ranges.append((history, start, end))
+        if not ranges:
+            print("No samples in the requested time range.")
+            return
+        first = ranges[0][0].timestamp(ranges[0][1])
+        last = ranges[-1][0].timestamp(ranges[-1][2] - 1)
+        print(f"{sum(end - start for _, start, end in ranges)} {kind} from "
+              f"{datetime.datetime.fromtimestamp(first):%Y-%m-%d %H:%M:%S}"
+              f" to {datetime.datetime.fromtimestamp(last):%Y-%m-%d %H:%M:%S}")
+        print(f"{'Metric':<32} {'Min':>12} {'Max':>12} {'Mean':>12} {'p50':>12} {'p95':>12} {'p99':>12}")
+        names = list(dict.fromkeys(name for history, _, _ in ranges for name, _, _ in history.columns))
+        for name in names:
+            if patterns and not any(fnmatch.fnmatchcase(name, p) for p in patterns):
+                continue
+            values = sorted(v for history, start, end in ranges if name in history.index
+                            for v in history.column_values(name, start, end))
+            if not values:
+                print(f"{name:<32} {'no data':>12}")
+                continue
+            stats = [values[0], values[-1], sum(values) / len(values),
+                     percentile(values, 50), percentile(values, 95), percentile(values, 99)]
+            print(f"{name:<32} " + " ".join(f"{v:>12.2f}" for v in stats))
+    finally:
+        for history in files:
+            history.close()
+
+# -------------------------------
+# Prometheus / OpenMetrics Exporter (--serve)
+# -------------------------------
+
+# metric prefix -> (family name, instance label, help); longest prefix wins.
+METRIC_FAMILIES = {
+    "cpu.load": ("myrktop_cpu_load_percent", "core", "CPU core load"),
+    "cpu.freq": ("myrktop_cpu_frequency_mhz", "core", "CPU core frequency"),
+    "gpu.load": ("myrktop_gpu_load_percent", None, "GPU load"),
+    "gpu.freq": ("myrktop_gpu_frequency_mhz", None, "GPU frequency"),
+    "npu.load": ("myrktop_npu_load_percent", "core", "NPU core load"),
+    "npu.freq": ("myrktop_npu_frequency_mhz", None, "NPU frequency"),
+    "rga.load": ("myrktop_rga_load_percent", "core", "RGA core load"),
+    "ram.used": ("myrktop_memory_used_bytes", None, "RAM in use (total minus available)"),
+    "ram.total": ("myrktop_memory_total_bytes", None, "Total RAM"),
+    "swap.used": ("myrktop_swap_used_bytes", None, "Swap in use"),
+    "swap.total": ("myrktop_swap_total_bytes", None, "Total swap"),
+    "cma.used": ("myrktop_cma_used_bytes", None, "Contiguous memory (CMA) in use; NPU/RGA buffers come from here"),
+    "cma.total": ("myrktop_cma_total_bytes", None, "Total contiguous memory (CMA)"),
+    "psi.some": ("myrktop_pressure_some_avg10_percent", "resource",
+                 "Share of time some task stalled on the resource, 10 s average (PSI)"),
+    "psi.full": ("myrktop_pressure_full_avg10_percent", "resource",
+                 "Share of time all non-idle tasks stalled on the resource, 10 s average (PSI)"),
+    "vm": ("myrktop_vmstat_events_per_second", "event", "Rate of /proc/vmstat events (faults, swap, reclaim)"),
+    "temp": ("myrktop_temperature_celsius", "sensor", "Sensor temperature"),
+    "net.rx": ("myrktop_network_receive_mbps", "interface", "Receive rate in megabits per second"),
+    "net.tx": ("myrktop_network_transmit_mbps", "interface", "Transmit rate in megabits per second"),
+    "irq": ("myrktop_device_interrupts_per_second", "cpu", "Device interrupts (IPIs and per-CPU timers excluded) handled per second"),
+    "softirq": ("myrktop_softirqs_per_second", "type", "Softirqs raised per second, all CPUs"),
+    "power": ("myrktop_power_watts", "rail", "Power drawn through a hwmon or power_supply rail"),
+    "energy": ("myrktop_energy_joules_total", "rail", "Energy drawn through the rail since myrktop started"),
+    "throttle": ("myrktop_thermal_throttled_percent", "domain",
+                 "Share of time a CPU cluster, GPU or NPU ran below its maximum frequency under a thermal cap"),
+    "disk.read": ("myrktop_disk_read_mbytes_per_second", "device", "Disk read rate in megabytes per second"),
+    "disk.write": ("myrktop_disk_write_mbytes_per_second", "device", "Disk write rate in megabytes per second"),
+    "disk.iops": ("myrktop_disk_iops", "device", "Completed disk reads plus writes per second"),
+    "disk.await": ("myrktop_disk_await_milliseconds", "device", "Average time per completed disk request"),
+    "disk.util": ("myrktop_disk_utilization_percent", "device", "Share of time the disk was busy"),
+    "container.cpu": ("myrktop_container_cpu_percent", "container", "Container CPU use in percent of one core"),
+    "container.memory": ("myrktop_container_memory_bytes", "container", "Memory charged to the container's cgroup"),
+    "container.read": ("myrktop_container_read_mbytes_per_second", "container", "Container block-device read rate"),
+    "container.write": ("myrktop_container_write_mbytes_per_second", "container", "Container block-device write rate"),
+}
+
+def metric_family(name):
+    """Map a dotted metric name to (family, label, help, instance), or None if unknown."""
+    prefix = name
+    while prefix:
+        family = METRIC_FAMILIES.get(prefix)
+        if family is not None:
+            instance = name[len(prefix) + 1:] or None
+            return family + (instance,)
+        prefix = prefix.rpartition(".")[0]
+    return None
+
+def label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def render_metrics(metrics, storage, timestamp, openmetrics=False):
+    """Render a flat metrics dict plus SMART results in the Prometheus text exposition format."""
+    families = {}
+    def add(family, help_text, labels, value):
+        entry = families.setdefault(family, (help_text, []))
+        entry[1].append((labels, value))
+    for name, value in metrics.items():
+        mapped = metric_family(name)
+        if mapped is None or value is None:
+            continue
+        family, label, help_text, instance = mapped
+        labels = {label: instance} if label and instance is not None else {}
+        add(family, help_text, labels, value)
+    for dev, dtype, info in storage:
+        labels = {"device": dev, "model": info.get("model", "Unknown"), "type": dtype}
+        for key, family, help_text in (
+                ("temp", "myrktop_disk_temperature_celsius", "Drive temperature from SMART"),
+                ("power_hours", "myrktop_disk_power_on_hours", "Drive power-on hours from SMART"),
+                ("avail_spare", "myrktop_disk_available_spare_percent", "NVMe available spare")):
+            try:
+                value = float(str(info.get(key)).rstrip("%"))
+            except (TypeError, ValueError):
+                continue
+            add(family, help_text, labels, value)
+    for name, collector in collectors.collectors.items():
+        add("myrktop_collector_stale", "1 if the collector's last run failed or is overdue",
+            {"collector": name}, 1 if collector.stale() else 0)
+    add("myrktop_sample_timestamp_seconds", "Wall-clock time of the cached sample", {}, timestamp)
+    out = []
+    for family, (help_text, samples) in families.items():
+        # Families named *_total are counters; OpenMetrics names the family without the suffix.
+        counter = family.endswith("_total")
+        meta = family[:-len("_total")] if counter and openmetrics else family
+        out.append(f"# HELP {meta} {help_text}")
+        out.append(f"# TYPE {meta} {'counter' if counter else 'gauge'}")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{label_value(v)}"' for k, v in labels.items())
+            out.append(f"{family}{{{label_text}}} {value}" if label_text else f"{family} {value}")
+    if openmetrics:
+        out.append("# EOF")
+    return "\n".join(out) + "\n"
+
+class MetricsExporter:
+    """Holds the latest rendered sample; scrapes only ever read it."""
+    def __init__(self):
+        self.body = b""
+        self.openmetrics_body = b""
+
+    def update(self):
+        metrics = collect_metrics()
+        storage = collectors.get("smart")
+        now = time.time()
+        # Swap whole bytes objects so concurrent scrapes always see a complete sample.
+        self.body = render_metrics(metrics, storage, now).encode("utf-8")
+        self.openmetrics_body = render_metrics(metrics, storage, now, openmetrics=True).encode("utf-8")
+
+    def handler(self):
+        import http.server
+        exporter = self
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                if "application/openmetrics-text" in self.headers.get("Accept", ""):
+                    body = exporter.openmetrics_body
+                    content_type = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+                else:
+                    body = exporter.body
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, format, *args):
+                pass
+        return Handler
+
+async def collect_forever(interval, on_tick):
+    """Headless collection loop: refresh due collectors in the background every interval."""
+    import asyncio
+    aloop = asyncio.get_running_loop()
+    while True:
+        collectors.poll(aloop)
+        on_tick()
+        await asyncio.sleep(interval)
+
+def parse_address(text, default_host="127.0.0.1"):
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port)
+
+def run_exporter(address, interval):
+    import asyncio
+    import http.server
+    exporter = MetricsExporter()
+    def collect():
+        asyncio.run(collect_forever(interval, exporter.update))
+    threading.Thread(target=collect, daemon=True).start()
+    server = http.server.ThreadingHTTPServer(parse_address(address), exporter.handler())
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# -------------------------------
+# Fleet Mode (--agent / --fleet)
+# -------------------------------
+#
+# Protocol: the viewer sends a one-byte request and the agent answers with one
+# frame: a 4-byte big-endian length followed by zlib-compressed JSON.
+#   b"S" -> summary dict (fleet_summary), b"D" -> full build_dashboard() markup.
+
+FLEET_FRAME = struct.Struct(">I")
+FLEET_MAX_FRAME = 4 * 1024 * 1024
+
+def encode_frame(obj):
+    payload = zlib.compress(json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+    return FLEET_FRAME.pack(len(payload)) + payload
+
+async def read_frame(reader):
+    """Read one frame; both its compressed and decompressed size are capped at FLEET_MAX_FRAME."""
+    (length,) = FLEET_FRAME.unpack(await reader.readexactly(FLEET_FRAME.size))
+    if length > FLEET_MAX_FRAME:
+        raise ValueError(f"frame of {length} bytes is too large")
+    inflater = zlib.decompressobj()
+    payload = inflater.decompress(await reader.readexactly(length), FLEET_MAX_FRAME)
+    if inflater.unconsumed_tail:
+        raise ValueError(f"frame expands to more than {FLEET_MAX_FRAME} bytes")
+    if not inflater.eof:
+        raise ValueError("truncated frame")
+    return json.loads(payload)
+
+def markup_from_json(line):
+    """Undo JSON's tuple-to-list conversion on one line of urwid markup."""
+    if isinstance(line, list) and len(line) == 2 and all(isinstance(p, str) for p in line):
+        return tuple(line)
+    if isinstance(line, list):
+        return [tuple(p) if isinstance(p, list) else p for p in line]
+    return line
+
+def fleet_summary():
+    """One board's headline numbers for the fleet overview row."""
+    import socket
+    metrics = collect_metrics()
+    cpu = [v for k, v in metrics.items() if k.startswith("cpu.load.") and v is not None]
+    npu = [v for k, v in metrics.items() if k.startswith("npu.load.") and v is not None]
+    temps = [(v, k[len("temp."):]) for k, v in metrics.items() if k.startswith("temp.") and v is not None]
+    hottest = max(temps, default=(None, None))
+    return {
+        "host": socket.gethostname(),
+        "time": time.time(),
+        "cpu_max": max(cpu, default=None),
+        "cpu_avg": sum(cpu) / len(cpu) if cpu else None,
+        "gpu": metrics.get("gpu.load"),
+        "npu": npu,
+        "temp_max": hottest[0],
+        "temp_sensor": hottest[1],
+        "net_rx": sum(v for k, v in metrics.items() if k.startswith("net.rx.")),
+        "net_tx": sum(v for k, v in metrics.items() if k.startswith("net.tx.")),
+        "stale": [name for name, c in collectors.collectors.items() if c.stale()],
+    }
+
+class FleetAgent:
+    """Serves the cached collector results; requests never trigger collection."""
+    def __init__(self):
+        self.summary_frame = encode_frame(None)
+        self.dashboard_frame = None
+
+    def update(self):
+        self.summary_frame = encode_frame(fleet_summary())
+        self.dashboard_frame = None  # rebuilt on the first "D" request after each tick
+
+    async def handle(self, reader, writer):
+        import asyncio
+        try:
+            while True:
+                request = await reader.read(1)
+                if request == b"S":
+                    writer.write(self.summary_frame)
+                elif request == b"D":
+                    if self.dashboard_frame is None:
+                        # The agent's key help and refresh rate mean nothing in the viewer.
+                        self.dashboard_frame = encode_frame(build_dashboard(footer=False))
+                    writer.write(self.dashboard_frame)
+                else:
+                    break
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+def run_agent(address, interval):
+    import asyncio
+    load_panel_layout()
+    agent = FleetAgent()
+    async def serve():
+        host, port = parse_address(address)
+        server = await asyncio.start_server(agent.handle, host, port)
+        async with server:
+            await collect_forever(interval, agent.update)
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+class AgentConnection:
+    """Viewer side of one agent: polls it on a persistent connection and reconnects with backoff."""
+    def __init__(self, address):
+        self.address = address
+        self.name = address
+        self.summary = None
+        self.dashboard = None
+        self.want_dashboard = False
+        self.error = "connecting"
+        self.updated = None
+
+    async def request(self, reader, writer, command, timeout):
+        import asyncio
+        writer.write(command)
+        await writer.drain()
+        return await asyncio.wait_for(read_frame(reader), timeout)
+
+    async def run(self, interval, timeout=5.0):
+        import asyncio
+        backoff = 1.0
+        while True:
+            writer = None
+            try:
+                host, port = parse_address(self.address)
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                backoff = 1.0
+                while True:
+                    self.summary = await self.request(reader, writer, b"S", timeout)
+                    if self.summary and self.summary.get("host"):
+                        self.name = self.summary["host"]
+                    if self.want_dashboard:
+                        self.dashboard = [markup_from_json(line) for line in
+                                          await self.request(reader, writer, b"D", timeout)]
+                    self.updated = time.monotonic()
+                    self.error = None
+                    await asyncio.sleep(interval)
+            except (OSError, ValueError, EOFError, zlib.error, asyncio.TimeoutError,
+                    asyncio.IncompleteReadError) as e:
+                self.error = str(e) or type(e).__name__
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+def fleet_row(conn):
+    """Markup for a board's summary row."""
+    s = conn.summary
+    if conn.error or not s:
+        if conn.error:
+            status = f"offline ({conn.error})"
+        elif conn.updated is None:
+            status = "never connected"
+        else:
+            status = "no sample yet"
+        return [("default", f"{conn.name:<20.20} "), ("bad", status)]
+    def load_attr(v):
+        return 'temp_red' if v >= 80 else ('temp_yellow' if v >= 60 else 'default')
+    row = [("default", f"{conn.name:<20.20} CPU ")]
+    if s["cpu_max"] is not None:
+        row.append((load_attr(s["cpu_max"]), f"{s['cpu_max']:3d}%"))
+    else:
+        row.append(("default", " N/A"))
+    row.append(("default", "  GPU "))
+    row.append((load_attr(s["gpu"]), f"{s['gpu']:3d}%") if s["gpu"] is not None else ("default", " N/A"))
+    row.append(("default", "  NPU "))
+    row.append((load_attr(max(s["npu"])), f"{max(s['npu']):3d}%") if s["npu"] else ("default", " N/A"))
+    row.append(("default", "  Hot "))
+    if s["temp_max"] is not None:
+        temp = s["temp_max"]
+        row.append(('temp_red' if temp >= 70 else ('temp_yellow' if temp >= 60 else 'temp_green'), f"{temp:4.1f}°C"))
+    else:
+        row.append(("default", "  N/A "))
+    row.append(("default", f"  Net ↓{s['net_rx']:7.2f} ↑{s['net_tx']:7.2f} Mbps"))
+    if s.get("stale"):
+        row.append(("bad", " (stale)"))
+    return row
+
+# -------------------------------
+# Shared-Memory Sample Segment (--daemon / --attach)
+# -------------------------------
+#
+# One root-run daemon collects, any number of unprivileged viewers render. The
+# segment is a file on tmpfs: a SHM_HEADER at offset 0 and, from SHM_DATA_OFFSET,
+# the latest sample as a marshal-encoded {collector: (value, age, stale)} dict.
+# A seqlock guards it: the writer makes seq odd, writes the payload and its
+# length, then makes seq even again. A reader copies the payload bytes out of the
+# mapping and decodes the copy only if seq was even and unchanged across the copy.
+# This is not a fixed in-place layout: collector values are nested, variable-length
+# structures (process lists, drive tables), so each new sample costs one copy and
+# one marshal.loads in every viewer; a viewer skips both while seq has not moved.
+
+SHM_PATH = "/dev/shm/myrktop"
+SHM_MAGIC = b"MRKTSHM1"
+SHM_HEADER = struct.Struct("<8sIIQQdd")  # magic, layout version, marshal version, seq, length, time, interval
+SHM_SEQ_OFFSET = 16
+SHM_DATA_OFFSET = 4096
+SHM_SIZE = 8 * 1024 * 1024  # tmpfs only backs the pages actually written
+SHM_FRESH = 10.0            # auto-attach only to a sample younger than this (seconds)
+
+class SampleWriter:
+    """Daemon side: publishes the collectors' cached values into the segment."""
+    def __init__(self, path, interval, size=SHM_SIZE):
+        # Always a fresh root-owned file: never write into one somebody else created.
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_CLOEXEC, 0o644)
+        try:
+            os.fchmod(fd, 0o644)
+            os.ftruncate(fd, size)
+            self.mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.path = path
+        self.seq = 0
+        SHM_HEADER.pack_into(self.mm, 0, SHM_MAGIC, 1, marshal.version, 0, 0, 0.0, interval)
+
+    def update(self):
+        now = time.monotonic()
+        sample = {}
+        for name, c in collectors.collectors.items():
+            if c.updated is None:
+                continue
+            try:
+                marshal.dumps(c.value)
+            except ValueError:
+                continue
+            sample[name] = (c.value, now - c.updated, c.stale(now))
+        payload = marshal.dumps(sample)
+        if len(payload) > len(self.mm) - SHM_DATA_OFFSET:
+            return
+        self.seq += 1
+        struct.pack_into("<Q", self.mm, SHM_SEQ_OFFSET, self.seq)
+        self.mm[SHM_DATA_OFFSET:SHM_DATA_OFFSET + len(payload)] = payload
+        struct.pack_into("<Qd", self.mm, SHM_SEQ_OFFSET + 8, len(payload), time.time())
+        self.seq += 1
+        struct.pack_into("<Q", self.mm, SHM_SEQ_OFFSET, self.seq)
+
+    def close(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+        self.mm.close()
+
+class SampleReader:
+    """Viewer side: maps the segment read-only and installs the latest sample into the local collectors."""
+    def __init__(self, path):
+        self.path = path
+        self.mm = None
+        self.last_seq = None
+        self.interval = 0.5
+        self._open()
+
+    def _open(self):
+        st = os.stat(self.path)
+        if st.st_uid not in (0, os.getuid()):
+            raise ValueError(f"owned by uid {st.st_uid}, not root")
+        fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        try:
+            mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        magic, layout, version, _, _, _, interval = SHM_HEADER.unpack_from(mm, 0)
+        if magic != SHM_MAGIC or layout != 1 or version != marshal.version:
+            mm.close()
+            raise ValueError("not a myrktop sample segment from this Python version")
+        if self.mm is not None:
+            self.mm.close()
+        self.mm = mm
+        self.inode = st.st_ino
+        self.interval = interval
+        self.last_seq = None
+
+    def age(self):
+        return time.time() - struct.unpack_from("<d", self.mm, SHM_SEQ_OFFSET + 16)[0]
+
+    def read(self, known_seq=None, retries=100):
+        """Return (sample, seq), or (None, None) if no consistent sample could be read.
+
+        If the segment still holds known_seq, nothing is copied and (None, known_seq) is returned.
+        """
+        for _ in range(retries):
+            seq = struct.unpack_from("<Q", self.mm, SHM_SEQ_OFFSET)[0]
+            if seq == 0 or seq & 1:
+                time.sleep(0.001)
+                continue
+            if seq == known_seq:
+                return None, seq
+            length = struct.unpack_from("<Q", self.mm, SHM_SEQ_OFFSET + 8)[0]
+            # Copy first and only decode once the seq shows the copy was not torn by a write.
+            payload = self.mm[SHM_DATA_OFFSET:SHM_DATA_OFFSET + length]
+            if struct.unpack_from("<Q", self.mm, SHM_SEQ_OFFSET)[0] != seq:
+                continue
+            try:
+                return marshal.loads(payload), seq
+            except (ValueError, EOFError, TypeError):
+                return None, None
+        return None, None
+
+    def apply(self):
+        """Copy the newest sample into the collectors; everything is marked stale if the daemon stopped."""
+        collectors.background = True
+        dead = self.age() > max(SHM_FRESH, 3 * self.interval)
+        if dead:
+            try:
+                if os.stat(self.path).st_ino != self.inode:
+                    self._open()  # the daemon was restarted
+                    dead = self.age() > max(SHM_FRESH, 3 * self.interval)
+            except (OSError, ValueError):
+                pass
+        seq = None
+        if not dead:
+            sample, seq = self.read(self.last_seq)
+            if sample is not None:
+                now = time.monotonic()
+                for name, (value, age, stale) in sample.items():
+                    c = collectors.collectors.get(name)
+                    if c is not None:
+                        c.value = value
+                        c.updated = now - age
+                        c.failed = stale
+                self.last_seq = seq
+        if dead:
+            for c in collectors.collectors.values():
+                c.failed = True
+
+sample_reader = None  # set when this process displays a daemon's samples instead of collecting
+
+def attach_daemon(path, explicit):
+    """Return a SampleReader for a live daemon segment, or None to collect locally."""
+    try:
+        reader = SampleReader(path)
+    except (OSError, ValueError) as e:
+        if explicit:
+            sys.exit(f"myrktop: cannot attach to {path}: {e}")
+        return None
+    if not explicit and reader.age() > SHM_FRESH:
+        return None
+    return reader
+
+def run_daemon(path, interval):
+    import asyncio
+    import signal
+    writer = SampleWriter(path, interval)
+    # systemd stops services with SIGTERM; exit through the finally so the segment is removed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        asyncio.run(collect_forever(interval, writer.update))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+
+# -------------------------------
+# One-Shot Snapshot (--once)
+# -------------------------------
+#
+# Meant for cron jobs and readiness probes, so the whole run has to stay cheap:
+# nothing here imports urwid or asyncio, collectors run synchronously, and the
+# devicetree/NPU-version lookup is served from a small on-disk cache that is
+# keyed by boot id, so it is redone after every reboot.
+
+ONCE_SAMPLE_GAP = 0.05  # seconds between the two samples that rate metrics need
+ONCE_COUNTERS_MAX_AGE = 2.0  # saved counters older than this are ignored and --once samples twice
+
+def static_cache_key():
+    try:
+        boot_id = read_file(host_path("/proc/sys/kernel/random/boot_id")).strip()
+    except Exception:
+        boot_id = ""
+    return f"{ROOT}|{boot_id}"
+
+def load_static_facts():
+    """Return (device_info, npu_version), from the on-disk cache when it is for this boot."""
+    key = static_cache_key()
+    cached = read_cache("static.json")
+    if isinstance(cached, dict) and cached.get("key") == key:
+        return tuple(cached["device"])
+    device = get_device_info()
+    if not device[1].startswith("Permission denied"):  # a later sudo run can do better
+        write_cache("static.json", {"key": key, "device": device})
+    return device
+
+def save_once_counters():
+    """Keep this run's counters in the cache, so a --once right after it can take its rates against them.
+
+    The power baselines are left out: energy totals count from the start of each process.
+    """
+    write_cache("counters.json", {
+        "key": static_cache_key(), "time": time.time(),
+        "cpu": prev_cpu, "net": prev_net, "disk": prev_disk, "vmstat": prev_vmstat, "cgroup": prev_cgroup, "interrupts": interrupt_table.state(), "softirqs": softirq_table.state(),
+        "throttle": throttle_detector.state()})
+
+def restore_once_counters():
+    """Install the previous --once run's counters as rate baselines; False on a cold or outdated cache.
+
+    Only counters at most ONCE_COUNTERS_MAX_AGE old are used, so the rates stay a
+    current snapshot; a run in a watch loop or tight script then gets them over a
+    longer interval than ONCE_SAMPLE_GAP (1 jiffy is 20% of a core over 50 ms at
+    USER_HZ=100) without sleeping.
+    """
+    saved = read_cache("counters.json")
+    if not isinstance(saved, dict) or saved.get("key") != static_cache_key():
+        return False
+    age = time.time() - saved.get("time", 0)
+    if not 0 <= age <= ONCE_COUNTERS_MAX_AGE:
+        return False
+    try:
+        prev_cpu.update((int(core), tuple(v)) for core, v in saved["cpu"].items())
+        prev_net.update((iface, tuple(v)) for iface, v in saved["net"].items())
+        prev_disk.update((name, tuple(v)) for name, v in saved["disk"].items())
+        prev_vmstat.update(saved["vmstat"])
+        prev_cgroup.update((cid, tuple(v)) for cid, v in saved["cgroup"].items())
+        interrupt_table.restore(saved["interrupts"])
+        softirq_table.restore(saved["softirqs"])
+        throttle_detector.restore(saved["throttle"])
+    except Exception:
+        set_root(ROOT)  # drop whatever was half restored
+        return False
+    get_power()
+    time.sleep(max(0.0, ONCE_SAMPLE_GAP - age))  # back-to-back runs still need some interval
+    return True
+
+def snapshot():
+    """One sample of every cheap metric, plus the static facts, as a flat dict."""
+    if sample_reader is not None:
+        sample_reader.apply()
+        device_info, npu_version = collectors.get("device")
+    else:
+        device_info, npu_version = snapshot_local()
+    result = {"time": round(time.time(), 3), "device": device_info, "npu_version": npu_version,
+              "uptime": collectors.get("uptime")}
+    result.update(collect_metrics())
+    if sample_reader is None:
+        save_once_counters()
+    return result
+
+def snapshot_local():
+    device_info, npu_version = load_static_facts()
+    if restore_once_counters():
+        return device_info, npu_version
+    # Cold cache: prime the rate baselines directly (not through the collectors'
+    # TTL caches), then take the real sample a moment later.
+    get_cpu_info()
+    get_network_traffic()
+    get_disk_io()
+    get_memory_pressure()
+    get_containers()
+    get_interrupts()
+    get_throttling()
+    get_power()
+    time.sleep(ONCE_SAMPLE_GAP)
+    return device_info, npu_version
+
+def run_once(as_json):
+    result = snapshot()
+    if as_json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    for key, value in result.items():
+        if value is None:
+            value = ""
+        elif isinstance(value, str):
+            value = shlex.quote(value)
+        print(f"{key}={value}")
+
+# -------------------------------
+# In-Memory History (sparklines)
+# -------------------------------
+
+HISTORY_RESOLUTIONS = (1, 10, 60)  # rollup bucket sizes in seconds
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+class RingBuffer:
+    """Fixed-capacity ring of floats backed by a preallocated array('d')."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array.array("d", [0.0]) * capacity
+        self.count = 0
+        self.head = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.data[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def values(self, n=None):
+        """The newest n values (all by default), oldest first."""
+        n = self.count if n is None else min(n, self.count)
+        start = (self.head - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.data[start:start + n]
+        return self.data[start:] + self.data[:start + n - self.capacity]
+
+class Rollup:
+    """min/max/avg of a metric per bucket of `resolution` seconds, newest buckets in rings."""
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.min = RingBuffer(capacity)
+        self.max = RingBuffer(capacity)
+        self.avg = RingBuffer(capacity)
+        self.bucket = None
+        self.b_min = self.b_max = self.b_sum = 0.0
+        self.b_count = 0
+
+    def add(self, timestamp, value):
+        bucket = int(timestamp // self.resolution)
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+            self.b_min = self.b_max = self.b_sum = value
+            self.b_count = 1
+            return
+        self.b_min = min(self.b_min, value)
+        self.b_max = max(self.b_max, value)
+        self.b_sum += value
+        self.b_count += 1
+
+    def flush(self):
+        if self.b_count:
+            self.min.append(self.b_min)
+            self.max.append(self.b_max)
+            self.avg.append(self.b_sum / self.b_count)
+            self.b_count = 0
+
+    def series(self, n):
+        """(avg, min, max) arrays of the newest n buckets, including the one still filling."""
+        partial = self.b_count > 0
+        k = n - 1 if partial else n
+        avg, lo, hi = self.avg.values(k), self.min.values(k), self.max.values(k)
+        if partial:
+            avg.append(self.b_sum / self.b_count)
+            lo.append(self.b_min)
+            hi.append(self.b_max)
+        return avg, lo, hi
+
+class MetricHistory:
+    """Raw samples plus 1 s / 10 s / 1 min rollups for one metric; memory is fixed."""
+    def __init__(self, raw_capacity=240, rollup_capacity=120):
+        self.raw = RingBuffer(raw_capacity)
+        self.rollups = [Rollup(r, rollup_capacity) for r in HISTORY_RESOLUTIONS]
+        self.updated = None
+
+    def add(self, timestamp, value):
+        self.raw.append(value)
+        for rollup in self.rollups:
+            rollup.add(timestamp, value)
+        self.updated = timestamp
+
+    def series(self, level, n):
+        """(values, min, max) for display: raw samples at level 0, rollup averages above."""
+        if level == 0:
+            values = self.raw.values(n)
+            return values, min(values, default=0.0), max(values, default=0.0)
+        avg, lo, hi = self.rollups[level - 1].series(n)
+        return avg, min(lo, default=0.0), max(hi, default=0.0)
+
+class HistoryStore:
+    """Histories for the series the History panel draws; metrics not seen for `expire` seconds are dropped.
+
+    Only cpu.avg, temp.max and the GPU/NPU/RGA load and network series get a ring (see
+    tracked()), so per-core, per-IRQ and per-container metrics on a large board cannot
+    use up max_metrics before them.
+    """
+    LEVEL_NAMES = ("raw", "1s", "10s", "1m")
+    SERIES = ("cpu.avg", "gpu.load", "temp.max")
+    SERIES_PREFIXES = ("npu.load.", "rga.load.", "net.rx.", "net.tx.")
+
+    def __init__(self, max_metrics=512, expire=300):
+        self.metrics = {}
+        self.max_metrics = max_metrics
+        self.expire = expire
+        self.level = 0
+
+    def record(self, metrics, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        for name, value in list(summary_metrics(metrics).items()) + list(metrics.items()):
+            if value is None or not self.tracked(name):
+                continue
+            history = self.metrics.get(name)
+            if history is None:
+                if len(self.metrics) >= self.max_metrics:
+                    continue
+                history = self.metrics[name] = MetricHistory()
+            history.add(timestamp, float(value))
+        for name in [n for n, h in self.metrics.items() if timestamp - h.updated > self.expire]:
+            del self.metrics[name]
+
+    def tracked(self, name):
+        return name in self.SERIES or name.startswith(self.SERIES_PREFIXES)
+
+    def cycle_level(self):
+        self.level = (self.level + 1) % len(self.LEVEL_NAMES)
+
+    def series(self, name, n):
+        history = self.metrics.get(name)
+        if history is None:
+            return None
+        return history.series(self.level, n)
+
+history = HistoryStore()
+
+def sparkline(values, lo, hi):
+    span = hi - lo
+    if span <= 0:
+        return SPARK_CHARS[0] * len(values)
+    return "".join(SPARK_CHARS[min(7, max(0, int((v - lo) / span * 8)))] for v in values)
+
+def mini_graph(values, lo, hi, height=4):
+    """Multi-row bar graph of values, top row first, with eighth-block resolution."""
+    span = (hi - lo) or 1.0
+    levels = [max(0, min(height * 8, round((v - lo) / span * height * 8))) for v in values]
+    rows = []
+    for row in range(height - 1, -1, -1):
+        floor = row * 8
+        rows.append("".join("█" if lvl >= floor + 8 else (" " if lvl <= floor else SPARK_CHARS[lvl - floor - 1])
+                            for lvl in levels))
+    return rows
+
+def history_lines(width=48):
+    """Sparkline rows (and a CPU mini-graph) for the dashboard's history section."""
+    rows = []
+    names = ["cpu.avg", "gpu.load"]
+    names += sorted(n for n in history.metrics if n.startswith(("npu.load.", "rga.load.")))
+    names.append("temp.max")
+    names += sorted(n for n in history.metrics if n.startswith("net."))
+    for name in names:
+        series = history.series(name, width)
+        if series is None:
+            continue
+        values, lo, hi = series
+        if not values:
+            continue
+        is_load = "load" in name or name == "cpu.avg"
+        scale_lo, scale_hi = (0.0, 100.0) if is_load else (lo, hi)
+        avg = sum(values) / len(values)
+        rows.append([("default", f"{name:<12} "), ("freq", f"{sparkline(values, scale_lo, scale_hi):<{width}}"),
+                     ("default", f" {lo:6.1f} {avg:6.1f} {hi:6.1f}")])
+        if name == "cpu.avg":
+            for graph_row in mini_graph(values, 0.0, 100.0):
+                rows.append(("freq", f"{'':<12} {graph_row}"))
+    return rows
+
+# -------------------------------
+# Adaptive Refresh
+# -------------------------------
+
+class AdaptiveInterval:
+    """TUI refresh interval that backs off while readings are stable.
+
+    Every tick the new metrics are compared with the previous tick's. A load
+    moving by load_delta points, a temperature by temp_delta degrees, a network
+    rate by half its value, or any of them crossing a colour threshold snaps the
+    interval back to `minimum`; so does user input. Otherwise the interval grows
+    by `backoff` up to `maximum`, which makes an idle board almost free to watch.
+    """
+    LOAD_THRESHOLDS = (60, 80)
+    TEMP_THRESHOLDS = (60, 70)
+
+    def __init__(self, minimum=0.5, maximum=4.0, backoff=1.5, load_delta=10, temp_delta=2.0):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.backoff = backoff
+        self.load_delta = load_delta
+        self.temp_delta = temp_delta
+        self.current = minimum
+        self.prev = None
+        self.alarm = None
+
+    @staticmethod
+    def crossed(old, new, thresholds):
+        return any((old >= t) != (new >= t) for t in thresholds)
+
+    def active(self, metrics):
+        prev, self.prev = self.prev, metrics
+        if prev is None:
+            return True
+        for name, new in metrics.items():
+            if new is None:
+                continue
+            old = prev.get(name)
+            if old is None:
+                return True
+            if ".load" in name:
+                if abs(new - old) >= self.load_delta or self.crossed(old, new, self.LOAD_THRESHOLDS):
+                    return True
+            elif name.startswith("temp."):
+                if abs(new - old) >= self.temp_delta or self.crossed(old, new, self.TEMP_THRESHOLDS):
+                    return True
+            elif name.startswith("net."):
+                if abs(new - old) > max(1.0, 0.5 * old):
+                    return True
+        return False
+
+    def next_interval(self, metrics, screen_changed=True):
+        if self.active(metrics) and screen_changed:
+            self.current = self.minimum
+        else:
+            self.current = min(self.maximum, self.current * self.backoff)
+        return self.current
+
+    def reset(self):
+        """Drop back to the fastest rate; returns True if it was slower."""
+        slower = self.current > self.minimum
+        self.current = self.minimum
+        return slower
+
+refresh = AdaptiveInterval()
+
+# -------------------------------
+# Dashboard Display (Urwid)
+# -------------------------------
+
+palette = [
+    ('header', 'dark blue,bold', ''),
+    ('title', 'yellow,bold', ''),
+    ('default', 'default,bold', ''),
+    ('good', 'dark green,bold', ''),
+    ('bad', 'dark red,bold', ''),
+    ('temp_red', 'light red,bold', ''),
+    ('temp_yellow', 'yellow,bold', ''),
+    ('temp_green', 'light green,bold', ''),
+    ('freq', 'light green,bold', ''),
+    ('focus', 'standout', ''),
+    ('footer', 'dark gray,bold', '')
+]
+
+CPU_LIST_MAX_CORES = 16  # above this the CPU panel shows one line per cluster instead of per core
+CPU_STRIP_WIDTH = 64     # cores per line in that per-cluster load strip
+cpu_detailed = False     # 'c' toggles the per-core time breakdown
+SEPARATOR = "─" * 50
+
+def stale_markup(*names):
+    """Marker appended to a section heading whose collector is late or failing."""
+    if collectors.stale(*names):
+        return [("bad", " (stale)")]
+    return []
+
+def panel_header():
+    """Device, NPU driver, uptime, Docker and collector-daemon status."""
+    lines = []
+    lines.append(("header", SEPARATOR))
+    lines.append(("header", "🔥 System Monitor"))
+    lines.append(("header", SEPARATOR))
+    device_info, npu_version = collectors.get("device")
+    uptime = collectors.get("uptime")
+    docker_status = collectors.get("docker")
+    lines.append(("default", f"Device: {device_info}"))
+    if npu_version:
+        lines.append(("default", f"NPU Version: {npu_version}"))
+    lines.append([("default", f"System Uptime: {uptime}")] + stale_markup("uptime"))
+    if docker_status == "active":
+        lines.append(("good", "Docker Status: Running ✅"))
+    elif docker_status:
+        lines.append(("bad", f"Docker Status: {docker_status}"))
+    if sample_reader is not None:
+        age = sample_reader.age()
+        if age > max(SHM_FRESH, 3 * sample_reader.interval):
+            lines.append(("bad", f"Collector daemon stopped: last sample {age:.0f}s ago ({sample_reader.path})"))
+        else:
+            lines.append(("good", f"Collector daemon: {sample_reader.path} ✅"))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_cpu():
+    """Per-core or per-cluster CPU load and frequency ('c' for the time breakdown)."""
+    lines = []
+    cpu_loads, cpu_freqs, cpu_times, clusters = collectors.get("cpu")
+    lines.append([("title", "📊 CPU Usage & Frequency:")] + stale_markup("cpu"))
+    cores = sorted(cpu_loads.keys())
+    if not clusters and cores:
+        clusters = [("all cores", cores, sum(cpu_loads.values()) // len(cores), 0,
+                     {f: sum(cpu_times[c][f] for c in cores) / len(cores) for f in CPU_TIME_FIELDS})]
+    def load_attr(load):
+        return 'temp_red' if load >= 80 else ('temp_yellow' if load >= 60 else 'default')
+    if cpu_detailed:
+        # One row per core under its cluster, with the time breakdown that tells CPU- from I/O-bound.
+        lines.append(("default", f"{'':<16} {'load':>5} {'MHz':>5} {'usr':>5} {'sys':>5} {'iow':>5} "
+                                 f"{'irq':>5} {'sirq':>5} {'steal':>5}"))
+        def breakdown(times):
+            return (f" {times['user'] + times['nice']:5.1f} {times['system']:5.1f} {times['iowait']:5.1f} "
+                    f"{times['irq']:5.1f} {times['softirq']:5.1f} {times['steal']:5.1f}")
+        for name, members, load, freq, times in clusters:
+            lines.append([("good", f"{name:<16.16} "), (load_attr(load), f"{load:4d}%"),
+                          ("freq", f" {freq:5d}"), ("default", breakdown(times))])
+            for core in members:
+                lines.append([("default", f"  Core {core:<9d} "), (load_attr(cpu_loads[core]), f"{cpu_loads[core]:4d}%"),
+                              ("freq", f" {cpu_freqs[core]:5d}"), ("default", breakdown(cpu_times[core]))])
+    elif len(cores) <= CPU_LIST_MAX_CORES:
+        for i in range(0, len(cores), 2):
+            if i + 1 < len(cores):
+                attr1 = load_attr(cpu_loads[cores[i]])
+                attr2 = load_attr(cpu_loads[cores[i+1]])
+                markup = [
+                    ("default", f"Core {cores[i]}: "), (attr1, f"{cpu_loads[cores[i]]:3d}%"), ("default", " "),
+                    ("freq", f"{cpu_freqs[cores[i]]:4d} MHz   "),
+                    ("default", f"Core {cores[i+1]}: "), (attr2, f"{cpu_loads[cores[i+1]]:3d}%"), ("default", " "),
+                    ("freq", f"{cpu_freqs[cores[i+1]]:4d} MHz")
+                ]
+                lines.append(markup)
+            else:
+                attr1 = 'temp_red' if cpu_loads[cores[i]] >= 70 else ('temp_yellow' if cpu_loads[cores[i]] >= 60 else 'default')
+                markup = [
+                    ("default", f"Core {cores[i]}: "), (attr1, f"{cpu_loads[cores[i]]:3d}%"), ("default", " "),
+                    ("freq", f"{cpu_freqs[cores[i]]:4d} MHz")
+                ]
+                lines.append(markup)
+        for name, members, load, freq, times in clusters:
+            lines.append([("good", f"{name:<16.16} "), (load_attr(load), f"{load:3d}%"), ("default", " "),
+                          ("freq", f"{freq:4d} MHz"),
+                          ("default", f"   iowait {times['iowait']:4.1f}%  irq {times['irq'] + times['softirq']:4.1f}%")])
+    else:
+        # Too many cores for a row each: one line per cluster with a character per core.
+        for name, members, load, freq, times in clusters:
+            strip = sparkline([cpu_loads[c] for c in members], 0, 100)
+            lines.append([("good", f"{name:<16.16} "), (load_attr(load), f"{load:3d}%"), ("default", " "),
+                          ("freq", f"{freq:4d} MHz "), ("default", strip[:CPU_STRIP_WIDTH])])
+            for i in range(CPU_STRIP_WIDTH, len(strip), CPU_STRIP_WIDTH):
+                lines.append(("default", " " * 31 + strip[i:i + CPU_STRIP_WIDTH]))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_interrupts():
+    """Busiest interrupt sources and softirqs with their spread over the CPUs, and imbalanced cores."""
+    lines = []
+    interrupts = collectors.get("interrupts")
+    cpus = interrupts["cpus"]
+    if not cpus:
+        return lines
+    lines.append([("title", "🔔 Interrupts & Softirqs:")] + stale_markup("interrupts"))
+    width = min(len(cpus), CPU_STRIP_WIDTH)
+    column = max(width, len("per CPU"))
+    lines.append(("default", f"{'IRQ':<6} {'Source':<20} {'per s':>9}  {'per CPU':<{column}}  busiest"))
+    def spread(per_cpu):
+        busiest = max(range(len(per_cpu)), key=per_cpu.__getitem__)
+        total = sum(per_cpu)
+        share = per_cpu[busiest] / total if total else 0.0
+        return sparkline(per_cpu[:width], 0, max(per_cpu)), f"cpu{cpus[busiest]} {share * 100:3.0f}%"
+    for key, name, rate, per_cpu in interrupts["irqs"]:
+        strip, busiest = spread(per_cpu)
+        lines.append(("default", f"{key:<6.6} {name:<20.20} {rate:9.0f}  {strip:<{column}}  {busiest}"))
+    for name, rate, per_cpu in sorted(interrupts["softirqs"], key=lambda s: -s[1]):
+        if rate >= 1:
+            strip, busiest = spread(per_cpu)
+            lines.append(("default", f"{'soft':<6} {name:<20.20} {rate:9.0f}  {strip:<{column}}  {busiest}"))
+    cpu_loads, _, cpu_times, _ = collectors.get("cpu")
+    for cpu, share, busy in irq_imbalance(interrupts, cpu_times):
+        lines.append(("temp_red", f"⚠️  cpu{cpu} takes {share * 100:.0f}% of device interrupts, {busy:.1f}% of its time "
+                                  f"in irq/softirq (load {cpu_loads.get(cpu, 0)}%): spread IRQ affinity or enable RPS"))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_gpu():
+    """GPU load and frequency."""
+    lines = []
+    gpu_load, gpu_freq = collectors.get("gpu")
+    if gpu_load is not None and gpu_freq is not None:
+        gpu_attr = 'temp_red' if gpu_load >= 80 else ('temp_yellow' if gpu_load >= 60 else 'default')
+        gpu_markup = [
+            ("title", "🎮 GPU Load: "), (gpu_attr, f"{gpu_load:3d}%"),
+            ("default", "   "), ("freq", f"{gpu_freq:4d} MHz")
+        ] + stale_markup("gpu")
+        lines.append(gpu_markup)
+        lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_npu():
+    """NPU per-core load and frequency."""
+    lines = []
+    npu_load, npu_freq = collectors.get("npu")
+    if npu_load is not None and npu_freq is not None:
+        try:
+            npu_numeric = int(re.search(r'(\d+)%', npu_load).group(1))
+        except Exception:
+            npu_numeric = 0
+        npu_attr = 'temp_red' if npu_numeric >= 80 else ('temp_yellow' if npu_numeric >= 60 else 'default')
+        npu_markup = [
+            ("title", "🧠 NPU Load: "), (npu_attr, f"{npu_load}"),
+            ("default", "   "), ("freq", f"{npu_freq:4d} MHz")
+        ] + stale_markup("npu")
+        lines.append(npu_markup)
+        lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_rga():
+    """RGA per-core load."""
+    lines = []
+    rga_info = collectors.get("rga")
+    if rga_info is not None:
+        try:
+            rga_numeric = int(re.search(r'(\d+)%', rga_info).group(1))
+        except Exception:
+            rga_numeric = 0
+        rga_attr = 'temp_red' if rga_numeric >= 80 else ('temp_yellow' if rga_numeric >= 60 else 'default')
+        rga_markup = [("title", "🖼️  RGA Load: "), (rga_attr, f"{rga_info}")] + stale_markup("rga")
+        lines.append(rga_markup)
+        lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_power():
+    """Per-rail power and energy, and load per watt for CPU, GPU and NPU."""
+    lines = []
+    rails = collectors.get("power")
+    if not rails:
+        return lines
+    lines.append([("title", "🔌 Power & Energy:")] + stale_markup("power"))
+    lines.append(("default", f"{'Rail':<20} {'Watts':>8} {'Interval':>10} {'Since start':>12}"))
+    for name, watts, joules, total in rails:
+        lines.append(("default", f"{name:<20.20} {watts:7.2f}W {joules:9.2f}J {total / 3600:10.4f}Wh"))
+    rows = power_efficiency(rails, collectors.get("cpu"), collectors.get("gpu"), collectors.get("npu"),
+                            collectors.get("throttle")["domains"])
+    if rows:
+        lines.append(("default", f"{'Load per watt':<14} {'Load':>5} {'MHz':>11} {'Governor':<16} {'Watts':>7} {'%/W':>6}"))
+    for domain, load, freq, max_freq, governor, watts, own, waste in rows:
+        per_watt = f"{load / watts:6.1f}" if watts > 0 else f"{'-':>6}"
+        rail = f"{watts:6.2f}W" if own else f"{watts:5.2f}W*"
+        lines.append(('temp_yellow' if waste else 'default',
+                      f"{domain:<14} {load:4.0f}% {freq:>5}/{max_freq:<5} {governor:<16.16} {rail:>7} {per_watt}"))
+        if waste:
+            lines.append(("temp_yellow", f"  ⚠️  {governor or 'governor'} holds {domain} at {freq} MHz for {load:.0f}% load: "
+                                         "a lower clock would do the same work for less energy"))
+    if any(not row[6] for row in rows):
+        lines.append(("footer", "* no rail of its own: rated against the whole-board rail"))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_accel():
+    """High-rate accelerator sampling statistics (--accel-hz)."""
+    lines = []
+    accel = collectors.get("accel")
+    if accel is not None and accel["cores"]:
+        lines.append([("title", f"⚡ Accelerator Sampling @ {accel['rate']:.0f} Hz"),
+                      ("default", f" (sampler CPU {accel['overhead'] * 100:.1f}%)")] + stale_markup("accel"))
+        lines.append(("default", f"{'Core':<8} {'Mean':>6} {'p95':>6} {'Peak':>6} {'Busy':>6} {'Samples':>8}"))
+        for core, st in accel["cores"].items():
+            peak_attr = 'temp_red' if st["peak"] >= 80 else ('temp_yellow' if st["peak"] >= 60 else 'default')
+            lines.append([("default", f"{core:<8} {st['mean']:5.1f}% {st['p95']:5d}% "),
+                          (peak_attr, f"{st['peak']:5d}%"),
+                          ("default", f" {st['busy'] * 100:5.1f}% {st['n']:>8d}")])
+        lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_history():
+    """Sparklines of recent load, temperature and network history."""
+    lines = []
+    if history.metrics:
+        level = HistoryStore.LEVEL_NAMES[history.level]
+        lines.append(("title", f"📈 History ({level}, 'h' to change)        {'min':>6} {'avg':>6} {'max':>6}"))
+        lines.extend(history_lines())
+        lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_ram():
+    """RAM and swap usage."""
+    lines = []
+    ram_used, ram_total, swap_used, swap_total = collectors.get("ram")
+    lines.append([("title", "🖥️  RAM & Swap Usage:")] + stale_markup("ram"))
+    if ram_total is not None:
+        lines.append(("default", f"RAM Used: {human_size(ram_used, iec=True)} / {human_size(ram_total, iec=True)}"))
+        lines.append(("default", f"Swap Used: {human_size(swap_used, iec=True)} / {human_size(swap_total, iec=True)}"))
+    else:
+        lines.append(("default", "RAM Used: N/A / N/A"))
+        lines.append(("default", "Swap Used: N/A / N/A"))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_memory():
+    """PSI, vmstat rates, CMA and dma-buf usage."""
+    lines = []
+    memory = collectors.get("memory")
+    lines.append([("title", "🧮 Memory Pressure:")] + stale_markup("memory"))
+    if memory["psi"]:
+        lines.append(("default", f"{'PSI %':<8} {'some 10s':>9} {'60s':>6} {'300s':>6}   {'full 10s':>9} {'60s':>6} {'300s':>6}"))
+        for resource, kinds in memory["psi"].items():
+            some = kinds.get("some")
+            full = kinds.get("full")
+            row = f"{resource:<8} " + (f"{some[0]:9.2f} {some[1]:6.2f} {some[2]:6.2f}" if some else f"{'-':>23}")
+            row += "   " + (f"{full[0]:9.2f} {full[1]:6.2f} {full[2]:6.2f}" if full else f"{'-':>23}")
+            worst = max(some[0] if some else 0, full[0] if full else 0)
+            lines.append(('temp_red' if worst >= 10 else ('temp_yellow' if worst >= 1 else 'default'), row))
+    else:
+        lines.append(("default", "PSI: not available (kernel built without CONFIG_PSI)"))
+    rates = memory["rates"]
+    if rates:
+        lines.append(("default", f"Faults {rates['pgfault']:.0f}/s (major {rates['pgmajfault']:.0f}/s)  "
+                                 f"Swap in {rates['pswpin']:.0f}/s out {rates['pswpout']:.0f}/s pages"))
+        reclaim_attr = 'temp_yellow' if rates['allocstall'] > 0 else 'default'
+        lines.append((reclaim_attr, f"Reclaim: scanned {rates['pgscan']:.0f}/s, stolen {rates['pgsteal']:.0f}/s pages  "
+                                    f"Direct-reclaim stalls {rates['allocstall']:.0f}/s"))
+    if memory["cma"] is not None:
+        cma_used, cma_total = memory["cma"]
+        pct = 100 * cma_used / cma_total if cma_total else 0
+        row = f"CMA: {human_size(cma_used, iec=True)} / {human_size(cma_total, iec=True)} used ({pct:.0f}%)"
+        if memory["cma_failures"] is not None:
+            row += f"  alloc failures +{memory['cma_failures']}"
+        bad = pct >= 90 or memory["cma_failures"]
+        lines.append(('temp_red' if bad else ('temp_yellow' if pct >= 75 else 'default'), row))
+    if memory["dmabuf"] is None:
+        lines.append(("default", "DMA-BUF: run as root to read debugfs dma_buf/bufinfo"))
+    elif memory["dmabuf"]:
+        heaps = sorted(memory["dmabuf"].items(), key=lambda kv: -kv[1])
+        lines.append(("default", "DMA-BUF: " + ", ".join(f"{name} {human_size(size, iec=True)}" for name, size in heaps)))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_procs():
+    """Top processes by CPU, memory and I/O."""
+    lines = []
+    procs = collectors.get("procs")
+    lines.append([("title", f"⚙️  Top Processes ({procs['count']} total):")] + stale_markup("procs"))
+    for key, heading in (("cpu", "by CPU"), ("rss", "by memory"), ("io", "by I/O")):
+        if not procs[key]:
+            continue
+        lines.append(("good", f"{heading:<10} {'PID':>7} {'Command':<16} {'CPU%':>6} {'RSS':>7} {'I/O':>9}"))
+        for pid, comm, cpu, rss, io_rate in procs[key]:
+            lines.append(("default", f"{'':<10} {pid:>7} {comm:<16.16} {cpu:6.1f} {human_size(rss):>7} "
+                                     f"{human_size(io_rate):>7}/s"))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_containers():
+    """Per-container CPU, memory, I/O and PSI."""
+    lines = []
+    containers = collectors.get("containers")
+    lines.append([("title", "🐳 Containers (cgroup v2):")] + stale_markup("containers"))
+    if containers["containers"]:
+        lines.append(("default", f"{'Container':<20} {'CPU%':>6} {'Memory / limit':>17} {'Read MB/s':>9} "
+                                 f"{'Write MB/s':>10}  {'PSI cpu/mem/io %':>17}"))
+    for container in containers["containers"]:
+        mem, mem_max = container["mem"], container["mem_max"]
+        memory = human_size(mem, iec=True) if mem is not None else "-"
+        if mem_max is not None:
+            memory += f" / {human_size(mem_max, iec=True)}"
+        psi = container["psi"]
+        pressure = "/".join(f"{psi[r]:.1f}" if r in psi else "-" for r in ("cpu", "memory", "io"))
+        worst = max(psi.values(), default=0)
+        near_limit = mem is not None and mem_max and mem >= 0.9 * mem_max
+        attr = 'temp_red' if near_limit or worst >= 10 else ('temp_yellow' if worst >= 1 else 'default')
+        lines.append((attr, f"{container['name']:<20.20} {container['cpu']:6.1f} {memory:>17} "
+                            f"{container['read']:9.2f} {container['write']:10.2f}  {pressure:>17}"))
+    if not containers["cgroup2"]:
+        lines.append(("default", f"cgroup v2 is not mounted at {CGROUP_ROOT}."))
+    elif not containers["containers"]:
+        lines.append(("default", "No running containers."))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_temps():
+    """Sensor temperatures."""
+    lines = []
+    temps = collectors.get("temps")
+    lines.append([("title", "🌡️  Temperatures:")] + stale_markup("temps"))
+    for sensor_name, temp in temps:
+        temp_val = int(temp)
+        if temp_val >= 70:
+            attr = 'temp_red'
+        elif temp_val >= 60:
+            attr = 'temp_yellow'
+        else:
+            attr = 'temp_green'
+        lines.append((attr, f"{sensor_name:<30} {temp_val:2d}°C"))
+    if not temps:
+        lines.append(("default", "No temperature data."))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_throttle():
+    """Thermal throttling per CPU cluster, GPU and NPU."""
+    lines = []
+    throttle = collectors.get("throttle")
+    lines.append([("title", "🔻 Thermal Throttling:")] + stale_markup("throttle"))
+    hottest = max(throttle["hot"], key=lambda z: z[1] - z[2], default=None)
+    for domain in throttle["domains"]:
+        if domain["episode"] is not None:
+            alert = (f"⚠️  {domain['name']} throttled for {time.time() - domain['episode']:.0f}s, "
+                     f"capped at {domain['cap']} of {domain['max']} MHz")
+            if hottest:
+                alert += f" ({hottest[0]} {hottest[1]:.0f}°C, passive trip {hottest[2]:.0f}°C)"
+            lines.append(("bad", alert))
+    for domain in throttle["domains"]:
+        if domain["throttled"] >= THROTTLE_EPISODE_PCT:
+            attr = 'temp_red'
+        elif domain["cap"] < domain["max"]:
+            attr = 'temp_yellow'
+        else:
+            attr = 'default'
+        lines.append((attr, f"{domain['name']:<12.12} {domain['cur']:>5} MHz  cap {domain['cap']:>5}/{domain['max']:<5} MHz"
+                            f"  below max {domain['below']:3.0f}%  throttled {domain['throttled']:3.0f}%"))
+    if throttle["zones"]:
+        name, temp, trip = min(throttle["zones"], key=lambda z: z[2] - z[1])
+        lines.append(("default", f"Closest to a passive trip: {name} {temp:.0f}°C / {trip:.0f}°C"))
+    if not throttle["domains"]:
+        lines.append(("default", "No cpufreq/devfreq data."))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_net():
+    """Network interface rates."""
+    lines = []
+    rates = collectors.get("net")
+    lines.append([("title", "🌐 Network Traffic:")] + stale_markup("net"))
+    for iface, (rx_rate, tx_rate) in rates.items():
+        lines.append(("default", f"{iface}: Down {rx_rate:.2f} Mbps | Up {tx_rate:.2f} Mbps"))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_diskio():
+    """Per-device disk I/O rates."""
+    lines = []
+    disk_io = collectors.get("diskio")
+    lines.append([("title", "💽 Disk I/O (/proc/diskstats):")] + stale_markup("diskio"))
+    if disk_io:
+        lines.append(("default", f"{'Device':<14} {'Read MB/s':>9} {'Write MB/s':>10} {'r/s':>7} {'w/s':>7} "
+                                 f"{'await':>8} {'queue':>6} {'util':>5}"))
+    for disk, stats, partitions in disk_io:
+        util_attr = 'temp_red' if stats["util"] >= 90 else ('temp_yellow' if stats["util"] >= 60 else 'default')
+        lines.append((util_attr, f"{disk:<14.14} {stats['read']:9.2f} {stats['write']:10.2f} "
+                                 f"{stats['read_iops']:7.0f} {stats['write_iops']:7.0f} {stats['await']:6.1f}ms "
+                                 f"{stats['queue']:6.2f} {stats['util']:4.0f}%"))
+        # Only partitions that moved data this interval, so idle disks stay one line.
+        for part, pstats in partitions:
+            if pstats["read_iops"] or pstats["write_iops"]:
+                lines.append(("default", f"  {part:<12.12} {pstats['read']:9.2f} {pstats['write']:10.2f} "
+                                         f"{pstats['read_iops']:7.0f} {pstats['write_iops']:7.0f} "
+                                         f"{pstats['await']:6.1f}ms {pstats['queue']:6.2f} {pstats['util']:4.0f}%"))
+    if not disk_io:
+        lines.append(("default", "No block devices found."))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_disk_usage():
+    """Usage of the filesystems in /etc/fstab."""
+    lines = []
+    disk_usage = collectors.get("disk_usage")
+    lines.append([("title", "💾 Storage Usage (/etc/fstab):")] + stale_markup("disk_usage"))
+    lines.append(("default", f"{'Mount Point':<20} {'Total':>8} {'Used':>8} {'Free':>8}"))
+    for mount, total, used, free in disk_usage:
+        if total is None:
+            lines.append(("default", f"{mount}: No info"))
+        else:
+            lines.append(("default", f"{mount:<20} {human_size(total):>8} {human_size(used):>8} {human_size(free):>8}"))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+def panel_smart():
+    """NVMe and ATA SMART summaries."""
+    lines = []
+    nvme_info, ata_info = format_storage_info(collectors.get("smart"))
+    if collectors.stale("smart"):
+        lines.append(("bad", "SMART data is stale (smartctl late or failing)"))
+    if collectors.collectors["smart"].updated is None:
+        lines.append(("default", "Scanning drives..."))
+    else:
+        if nvme_info:
+            lines.append(("good", "NVMe Devices:"))
+            for info in nvme_info:
+                lines.append(("default", info))
+        if ata_info:
+            lines.append(("good", "ATA Devices:"))
+            for info in ata_info:
+                lines.append(("default", info))
+        else:
+            lines.append(("bad", "No ATA devices detected."))
+    lines.append(("header", SEPARATOR))
+    return lines
+
+# Dashboard panels in default order: name -> Panel. sources are the collectors the panel
+# shows; a background panel (history, power's energy integral) needs them even while it
+# is scrolled out of view.
+Panel = collections.namedtuple("Panel", "name title render sources background")
+PANELS = {}
+
+def register_panel(name, title, render, sources, background=False):
+    PANELS[name] = Panel(name, title, render, tuple(sources), background)
+
+register_panel("header", "System info", panel_header, ("device", "uptime", "docker"))
+register_panel("cpu", "CPU usage & frequency", panel_cpu, ("cpu",))
+register_panel("interrupts", "Interrupts & softirqs", panel_interrupts, ("interrupts", "cpu"))
+register_panel("gpu", "GPU load", panel_gpu, ("gpu",))
+register_panel("npu", "NPU load", panel_npu, ("npu",))
+register_panel("rga", "RGA load", panel_rga, ("rga",))
+register_panel("power", "Power & load per watt", panel_power, ("power", "cpu", "gpu", "npu", "throttle"),
+               background=True)
+register_panel("accel", "Accelerator sampling", panel_accel, ("accel",))
+register_panel("history", "History", panel_history, ("cpu", "gpu", "npu", "rga", "temps", "net"), background=True)
+register_panel("ram", "RAM & swap", panel_ram, ("ram",))
+register_panel("memory", "Memory pressure", panel_memory, ("memory",))
+register_panel("procs", "Top processes", panel_procs, ("procs",))
+register_panel("containers", "Containers", panel_containers, ("containers",))
+register_panel("temps", "Temperatures", panel_temps, ("temps",))
+register_panel("throttle", "Thermal throttling", panel_throttle, ("throttle",))
+register_panel("net", "Network traffic", panel_net, ("net",))
+register_panel("diskio", "Disk I/O", panel_diskio, ("diskio",))
+register_panel("disk_usage", "Storage usage", panel_disk_usage, ("disk_usage",))
+register_panel("smart", "NVMe & ATA SMART", panel_smart, ("smart",))
+
+PANEL_CONFIG = "panels"
+panel_layout = [[name, True] for name in PANELS]  # [name, enabled] top to bottom
+panel_rows = []  # (name, first row, end row) of each panel in the last build_dashboard()
+
+def load_panel_layout():
+    """Read the panel order from the config file: one panel name per line, top to bottom,
+    "-name" to hide it, "#" comments. Panels the file does not mention are appended."""
+    global panel_layout
+    try:
+        with open(config_path(PANEL_CONFIG)) as f:
+            text = f.read()
+    except OSError:
+        return
+    layout = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        name = line.lstrip("-").strip()
+        if name in PANELS and name not in (n for n, _ in layout):
+            layout.append([name, not line.startswith("-")])
+    seen = {name for name, _ in layout}
+    panel_layout = layout + [[name, True] for name in PANELS if name not in seen]
+
+def save_panel_layout():
+    """Write the current panel order to the config file; return its path."""
+    path = config_path(PANEL_CONFIG)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# myrktop panels, top to bottom; prefix a name with '-' to hide the panel\n")
+        f.writelines(f"{'' if enabled else '-'}{name}\n" for name, enabled in panel_layout)
+    return path
+
+def needed_collectors(visible=None):
+    """Collectors behind the enabled panels, or with visible=(first, last) dashboard rows only
+    those of panels on screen (and the row either side of it) plus background panels."""
+    names = set()
+    for name, first, end in panel_rows:
+        panel = PANELS[name]
+        if visible is None or panel.background or (first <= visible[1] + 1 and end >= visible[0]):
+            names.update(panel.sources)
+    return names
+
+def build_dashboard(footer=True):
+    """The dashboard's markup lines; footer=False leaves out the key help and refresh rate (for fleet agents)."""
+    global panel_rows
+    lines = []
+    rows = []
+    for name, enabled in panel_layout:
+        if enabled:
+            first = len(lines)
+            lines.extend(PANELS[name].render())
+            rows.append((name, first, len(lines)))
+    panel_rows = rows
+    if profiler.visible:
+        lines.append(("title", "🩺 myrktop self-profile ('p' to hide):"))
+        for row in profiler.report():
+            lines.append(("default", row))
+        lines.append(("header", SEPARATOR))
+    if not footer:
+        return lines
+    lines.append(("footer", "Press 'q' to exit, 'c' for CPU detail, 'h' to cycle history resolution, 'p' for self-profile, "
+                            "'e' to choose panels. Use arrows or mouse to scroll."))
+    lines.append(("footer", f"Refresh every {refresh.current:.1f}s (adaptive {refresh.minimum:g}-{refresh.maximum:g}s)"))
+    return lines
+
+# -------------------------------
+# Urwid Dashboard Classes
+# -------------------------------
+
+class DashboardWidget:
+    """Dashboard rows kept as stable Text widgets inside a ListBox (self.listbox).
+
+    Each tick the new markup is compared row by row with what is on screen and
+    only rows whose markup changed get set_text, so an unchanged dashboard
+    invalidates nothing and urwid has nothing to repaint.
+    """
+    def __init__(self, source=None):
+        import urwid
+        self.source = source or build_dashboard
         self.walker = urwid.SimpleListWalker([])
-        super().__init__(self.walker)
+        self.listbox = urwid.ListBox(self.walker)
+        self.markup = []
         self.update_content()
+
     def update_content(self):
-        focus_widget, focus_pos = self.get_focus()
-        if focus_pos is None:
-            focus_pos = 0
-        new_items = []
-        for item in build_dashboard():
-            new_items.append(urwid.Text(item))
-        self.walker[:] = new_items
-        if focus_pos < len(new_items):
-            self.set_focus(focus_pos)
+        """Apply the source's markup (build_dashboard() by default); return True if any row changed."""
+        return self.apply(self.source())
+
+    def apply(self, new_markup):
+        import urwid
+        changed = False
+        for i, (old, new) in enumerate(zip(self.markup, new_markup)):
+            if old != new:
+                self.walker[i].set_text(new)
+                changed = True
+        if len(new_markup) > len(self.markup):
+            self.walker.extend(urwid.Text(item) for item in new_markup[len(self.markup):])
+            changed = True
+        elif len(new_markup) < len(self.markup):
+            del self.walker[len(new_markup):]
+            changed = True
+        self.markup = new_markup
+        return changed
+
+    def visible_rows(self, size):
+        """(first, last) row positions the ListBox shows at this size, or None if it is empty."""
+        middle, top, bottom = self.listbox.calculate_visible(size)
+        if middle is None:
+            return None
+        positions = [middle[2]] + [pos for _, pos, _ in top[1]] + [pos for _, pos, _ in bottom[1]]
+        return min(positions), max(positions)
+
+class PanelEditor:
+    """Overlay for choosing and ordering dashboard panels, opened with 'e'.
+
+    Changes apply to the dashboard at once; 's' writes them to the panel config file.
+    """
+    def __init__(self, loop, dashboard):
+        import urwid
+        self.loop = loop
+        self.dashboard = dashboard
+        self.rows = [urwid.SelectableIcon("", cursor_position=1 << 20) for _ in panel_layout]
+        self.walker = urwid.SimpleFocusListWalker([urwid.AttrMap(row, None, focus_map="focus") for row in self.rows])
+        self.footer = urwid.Text("")
+        frame = urwid.Frame(urwid.ListBox(self.walker), footer=self.footer)
+        self.overlay = urwid.Overlay(urwid.LineBox(frame, title="Panels"), dashboard.listbox,
+                                     "center", 46, "middle", ("relative", 80), min_height=8)
+        self.active = False
+
+    def refresh(self):
+        for row, (name, enabled) in zip(self.rows, panel_layout):
+            row.set_text(("default" if enabled else "footer", f"[{'x' if enabled else ' '}] {PANELS[name].title}"))
+
+    def open(self):
+        self.footer.set_text(("footer", "Space: show/hide  +/-: move  s: save  Esc: close"))
+        self.refresh()
+        self.loop.widget = self.overlay
+        self.active = True
+
+    def close(self):
+        self.loop.widget = self.dashboard.listbox
+        self.active = False
+
+    def keypress(self, key):
+        _, position = self.walker.get_focus()
+        if key in (' ', 'enter'):
+            panel_layout[position][1] = not panel_layout[position][1]
+        elif key in ('+', '-'):
+            target = position - 1 if key == '+' else position + 1
+            if 0 <= target < len(panel_layout):
+                panel_layout[position], panel_layout[target] = panel_layout[target], panel_layout[position]
+                self.walker.set_focus(target)
+        elif key in ('s', 'S'):
+            try:
+                self.footer.set_text(("good", f"Saved to {save_panel_layout()}"))
+            except OSError as e:
+                self.footer.set_text(("bad", f"Could not save: {e}"))
+        elif key in ('esc', 'e', 'E'):
+            self.close()
+        else:
+            return
+        self.refresh()
+        self.dashboard.update_content()
+
+def profile_draws(loop):
+    """Time every screen redraw of an urwid MainLoop under "urwid render"."""
+    draw_screen = loop.draw_screen
+    def timed_draw():
+        with profiler.timed("urwid render"):
+            draw_screen()
+    loop.draw_screen = timed_draw
+    return loop
+
+class FleetView:
+    """One summary row per agent, with drill-down into a board's full dashboard."""
+    FLEET_KEYS = "Enter: open board  q: exit. Use arrows or mouse to scroll."
+    DETAIL_KEYS = "Esc: back to fleet  q: exit. Use arrows or mouse to scroll."
+
+    def __init__(self, addresses):
+        import urwid
+        self.connections = [AgentConnection(a) for a in addresses]
+        # Focusable rows; the cursor is parked past the end of the text so none is drawn.
+        self.rows = [urwid.SelectableIcon("", cursor_position=1 << 20) for _ in self.connections]
+        self.row_markup = [None] * len(self.rows)
+        self.board_list = urwid.ListBox(urwid.SimpleFocusListWalker(
+            [urwid.AttrMap(row, None, focus_map="focus") for row in self.rows]))
+        self.header = urwid.Text("")
+        self.footer = urwid.Text(("footer", self.FLEET_KEYS))
+        self.frame = urwid.Frame(self.board_list, header=self.header, footer=self.footer)
+        self.detail = None
+        self.detail_widget = None
+
+    def refresh(self):
+        online = 0
+        for i, conn in enumerate(self.connections):
+            online += conn.error is None
+            markup = fleet_row(conn)
+            if markup != self.row_markup[i]:
+                self.rows[i].set_text(markup)
+                self.row_markup[i] = markup
+        if self.detail is None:
+            self.header.set_text(("header", f"🌐 Fleet: {online}/{len(self.connections)} boards online"))
+        else:
+            self.header.set_text(("header", f"🔎 {self.detail.name}"))
+            self.detail_widget.update_content()
+
+    def open_detail(self):
+        _, position = self.board_list.body.get_focus()
+        if position is None:
+            return
+        self.detail = self.connections[position]
+        self.detail.want_dashboard = True
+        conn = self.detail
+        self.detail_widget = DashboardWidget(
+            source=lambda: conn.dashboard or [("default", "Waiting for board...")])
+        self.frame.body = self.detail_widget.listbox
+        self.footer.set_text(("footer", self.DETAIL_KEYS))
+        self.refresh()
+
+    def close_detail(self):
+        if self.detail is not None:
+            self.detail.want_dashboard = False
+            self.detail.dashboard = None
+        self.detail = None
+        self.frame.body = self.board_list
+        self.footer.set_text(("footer", self.FLEET_KEYS))
+        self.refresh()
+
+    def unhandled_input(self, key):
+        import urwid
+        if key in ('q', 'Q'):
+            raise urwid.ExitMainLoop()
+        if key == 'enter' and self.detail is None:
+            self.open_detail()
+        elif key in ('esc', 'backspace') and self.detail is not None:
+            self.close_detail()
+
+def run_fleet(addresses, interval):
+    import asyncio
+    import urwid
+    aloop = asyncio.new_event_loop()
+    asyncio.set_event_loop(aloop)
+    view = FleetView(addresses)
+    for conn in view.connections:
+        aloop.create_task(conn.run(interval))
+    def tick(loop, _):
+        view.refresh()
+        loop.set_alarm_in(interval, tick)
+    loop = urwid.MainLoop(view.frame, palette, handle_mouse=True, unhandled_input=view.unhandled_input,
+                          event_loop=urwid.AsyncioEventLoop(loop=aloop))
+    profile_draws(loop)
+    loop.set_alarm_in(0, tick)
+    loop.run()
 
 def periodic_update(loop, widget):
-    widget.update_content()
-    loop.set_alarm_in(0.5, periodic_update, widget)
+    import asyncio
+    if sample_reader is not None:
+        sample_reader.apply()
+    else:
+        # Only collectors behind panels on screen; scrolling brings the next refresh forward.
+        visible = widget.visible_rows(loop.screen.get_cols_rows())
+        collectors.poll(asyncio.get_event_loop(), needed_collectors(visible),
+                        on_done=lambda: schedule_redraw(loop, widget))
+    metrics = collect_metrics()
+    history.record(metrics)
+    with profiler.timed("build_dashboard"):
+        changed = widget.update_content()
+    profiler.end_tick()
+    refresh.alarm = loop.set_alarm_in(refresh.next_interval(metrics, changed), periodic_update, widget)
+
+redraw_alarm = None
+
+def schedule_redraw(loop, widget):
+    """Rebuild the dashboard once the refreshes a tick started have landed.
+
+    The tick itself renders the values cached before it polled, so without this
+    fresh values (and the very first frame) would wait a whole refresh interval.
+    Completions that arrive together share one redraw.
+    """
+    global redraw_alarm
+    if redraw_alarm is not None:
+        return
+    def redraw(loop, widget):
+        global redraw_alarm
+        redraw_alarm = None
+        with profiler.timed("build_dashboard"):
+            widget.update_content()
+    redraw_alarm = loop.set_alarm_in(0, redraw, widget)
+
+panel_editor = None
 
 def unhandled_input(key):
+    import urwid
+    global cpu_detailed
     if key in ('q', 'Q'):
         raise urwid.ExitMainLoop()
+    if panel_editor is not None and panel_editor.active:
+        panel_editor.keypress(key)
+        return
+    if key in ('e', 'E') and panel_editor is not None:
+        panel_editor.open()
+    if key in ('c', 'C'):
+        cpu_detailed = not cpu_detailed
+    if key in ('h', 'H'):
+        history.cycle_level()
+    if key in ('p', 'P'):
+        profiler.visible = not profiler.visible
 
-def main():
-    global prev_cpu, prev_net
-    prev_cpu = {}
-    prev_net = {}
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Orange Pi 5 (RK3588) system monitor",
+                                     fromfile_prefix_chars="@")
+    parser.add_argument("--root", metavar="DIR", default=None,
+                        help="resolve /proc, /sys and /etc under DIR (default: $MYRKTOP_ROOT or /)")
+    parser.add_argument("--once", action="store_true",
+                        help="print one snapshot as key=value lines and exit (no TUI)")
+    parser.add_argument("--json", action="store_true",
+                        help="with --once, print the snapshot as a single JSON object")
+    parser.add_argument("--daemon", metavar="FILE", nargs="?", const=SHM_PATH,
+                        help=f"run headless (as root) and publish samples to unprivileged viewers via FILE (default: {SHM_PATH})")
+    parser.add_argument("--attach", metavar="FILE", nargs="?", const=SHM_PATH,
+                        help="show a --daemon's samples instead of collecting (automatic when a fresh default segment exists)")
+    parser.add_argument("--local", action="store_true",
+                        help="always collect in this process, even if a --daemon is running")
+    parser.add_argument("--record", metavar="FILE",
+                        help="run headless and append samples to a history file")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help="run headless and serve Prometheus metrics on http://HOST:PORT/metrics")
+    parser.add_argument("--agent", metavar="[HOST:]PORT",
+                        help="run headless and serve this board to --fleet viewers (use 0.0.0.0:PORT for remote)")
+    parser.add_argument("--fleet", metavar="HOST:PORT", nargs="+",
+                        help="show one row per agent; @FILE reads addresses from a file, one per line")
+    parser.add_argument("--accel-hz", type=float, default=0,
+                        help="poll GPU/NPU/RGA load at this rate (e.g. 100) and show mean/p95/peak per refresh")
+    parser.add_argument("--accel-budget", type=float, default=2.0,
+                        help="max CPU %% of one core the accelerator sampler may use (default: 2)")
+    parser.add_argument("--min-interval", type=float, default=0.5,
+                        help="fastest TUI refresh in seconds, used while values change (default: 0.5)")
+    parser.add_argument("--max-interval", type=float, default=4.0,
+                        help="slowest TUI refresh in seconds, reached while values are stable (default: 4)")
+    parser.add_argument("--profile", metavar="FILE", nargs="?", const="-",
+                        help="on exit, write per-collector timings and myrktop's own cost to FILE (default: stderr)")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="sampling/poll interval in seconds for headless and fleet modes (default: 0.5)")
+    parser.add_argument("--query", metavar="FILE",
+                        help="print min/max/mean/percentiles from a history file and exit")
+    parser.add_argument("--since", metavar="TIME",
+                        help="start of the --query range: epoch, ISO time, or age like 8h")
+    parser.add_argument("--until", metavar="TIME",
+                        help="end of the --query range: epoch, ISO time, or age like 30m")
+    parser.add_argument("--metrics", metavar="PATTERN", nargs="+",
+                        help="only report metrics matching these glob patterns, e.g. 'npu.load.*'")
+    return parser.parse_args(argv)
+
+def run_tui(args):
+    import asyncio
+    import urwid
+    aloop = asyncio.new_event_loop()
+    asyncio.set_event_loop(aloop)
+    collectors.background = True
+    global refresh, panel_editor
+    refresh = AdaptiveInterval(args.min_interval, args.max_interval)
+    load_panel_layout()
     dashboard = DashboardWidget()
-    loop = urwid.MainLoop(dashboard, palette, handle_mouse=True, unhandled_input=unhandled_input)
-    loop.set_alarm_in(0.5, periodic_update, dashboard)
+    def on_input(keys, raw):
+        # Any key or mouse event means someone is watching: refresh at full rate right away.
+        if keys and refresh.reset() and refresh.alarm is not None:
+            loop.remove_alarm(refresh.alarm)
+            refresh.alarm = loop.set_alarm_in(0, periodic_update, dashboard)
+        return keys
+    loop = urwid.MainLoop(dashboard.listbox, palette, handle_mouse=True, unhandled_input=unhandled_input,
+                          input_filter=on_input, event_loop=urwid.AsyncioEventLoop(loop=aloop))
+    profile_draws(loop)
+    panel_editor = PanelEditor(loop, dashboard)
+    refresh.alarm = loop.set_alarm_in(0, periodic_update, dashboard)
     loop.run()
 
+def dump_profile(path):
+    text = "\n".join(profiler.report()) + "\n"
+    if path == "-":
+        sys.stderr.write(text)
+    else:
+        with open(path, "w") as f:
+            f.write(text)
+
+def main():
+    global accel_sampler, sample_reader
+    args = parse_args()
+    if args.root:
+        set_root(args.root)
+    viewer = args.once or not (args.query or args.record or args.serve or args.agent or args.fleet or args.daemon)
+    if args.attach:
+        sample_reader = attach_daemon(args.attach, explicit=True)
+    elif viewer and not args.local and ROOT == "/":
+        sample_reader = attach_daemon(SHM_PATH, explicit=False)
+    if args.accel_hz > 0 and sample_reader is None:
+        accel_sampler = AcceleratorSampler(args.accel_hz, args.accel_budget / 100.0)
+        accel_sampler.start()
+    try:
+        if args.once:
+            run_once(args.json)
+        elif args.query:
+            run_query(args.query,
+                      since=parse_time_arg(args.since) if args.since else None,
+                      until=parse_time_arg(args.until) if args.until else None,
+                      patterns=args.metrics)
+        elif args.record:
+            run_recorder(args.record, args.interval)
+        elif args.serve:
+            run_exporter(args.serve, args.interval)
+        elif args.daemon:
+            run_daemon(args.daemon, args.interval)
+        elif args.agent:
+            run_agent(args.agent, args.interval)
+        elif args.fleet:
+            run_fleet(args.fleet, args.interval)
+        else:
+            run_tui(args)
+    finally:
+        if args.profile:
+            dump_profile(args.profile)
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,76 @@
+"""Container names from the Docker socket, against bench/fakeroot's fake Docker API."""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench"))
+
+import myrktop
+from fakeroot import FakeRoot
+
+
+class ContainerNamesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(prefix="myrktop-test-")
+        self.fake = FakeRoot(self.tmp.name, cores=2, nics=1, disks=1, procs=5, containers=2)
+        self.fake.build()
+        myrktop.set_root(self.tmp.name)
+        self.ids = sorted(self.fake.containers)
+        self.names = myrktop.ContainerNames()
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.fake.stop_docker(self.server)
+        myrktop.set_root("/")
+        self.tmp.cleanup()
+
+    def test_names_from_socket(self):
+        self.server = self.fake.start_docker()
+        expected = {cid: self.fake.containers[cid][0] for cid in self.ids}
+        self.assertEqual(self.names.lookup(self.ids), expected)
+        self.assertEqual(self.names.lookup(self.ids), expected)
+        self.assertEqual(self.server.requests, 1)  # every id already named: no second query
+
+    def test_get_containers_uses_names(self):
+        self.server = self.fake.start_docker()
+        containers = myrktop.get_containers()["containers"]
+        self.assertEqual(sorted(c["name"] for c in containers),
+                         sorted(self.fake.containers[cid][0] for cid in self.ids))
+
+    def test_requery_limit(self):
+        self.server = self.fake.start_docker()
+        unknown = "f" * 64
+        self.assertEqual(self.names.lookup([unknown]), {unknown: unknown[:12]})
+        self.assertEqual(self.names.lookup([unknown, self.ids[0]])[self.ids[0]], self.fake.containers[self.ids[0]][0])
+        self.assertEqual(self.server.requests, 1)
+        self.names.queried -= myrktop.CONTAINER_NAME_RETRY
+        self.names.lookup([unknown])
+        self.assertEqual(self.server.requests, 2)
+
+    def test_missing_socket(self):
+        start = time.monotonic()
+        self.assertEqual(self.names.lookup(self.ids), {cid: cid[:12] for cid in self.ids})
+        self.assertIsNotNone(self.names.queried)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_slow_socket(self):
+        timeout = myrktop.DOCKER_TIMEOUT
+        myrktop.DOCKER_TIMEOUT = 0.2
+        try:
+            self.server = self.fake.start_docker(delay=1.0)
+            start = time.monotonic()
+            self.assertEqual(self.names.lookup(self.ids), {cid: cid[:12] for cid in self.ids})
+            self.assertLess(time.monotonic() - start, 0.8)
+            self.names.lookup(self.ids)  # within CONTAINER_NAME_RETRY: not asked again
+            self.assertEqual(self.server.requests, 1)
+        finally:
+            myrktop.DOCKER_TIMEOUT = timeout
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Fleet protocol: frame encoding and the agent/viewer exchange over a real socket."""
+
+import asyncio
+import os
+import sys
+import unittest
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myrktop
+
+
+def read_frames(data, count):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [await myrktop.read_frame(reader) for _ in range(count)]
+    return asyncio.run(read())
+
+
+class FrameTest(unittest.TestCase):
+    def test_round_trip(self):
+        objs = [None, {"host": "board1", "npu": [1, 2, 3], "temp_max": 51.5}, [["title", "🔥 CPU"], "plain"]]
+        data = b"".join(myrktop.encode_frame(obj) for obj in objs)
+        self.assertEqual(read_frames(data, len(objs)), objs)
+
+    def test_oversized_frame_rejected(self):
+        data = myrktop.FLEET_FRAME.pack(myrktop.FLEET_MAX_FRAME + 1) + b"x"
+        with self.assertRaises(ValueError):
+            read_frames(data, 1)
+
+    def test_decompression_bomb_rejected(self):
+        payload = zlib.compress(b" " * (myrktop.FLEET_MAX_FRAME + 1), 9)
+        data = myrktop.FLEET_FRAME.pack(len(payload)) + payload
+        self.assertLess(len(payload), myrktop.FLEET_MAX_FRAME)
+        with self.assertRaises(ValueError):
+            read_frames(data, 1)
+
+    def test_truncated_frame(self):
+        data = myrktop.encode_frame({"host": "board1"})[:-1]
+        with self.assertRaises(asyncio.IncompleteReadError):
+            read_frames(data, 1)
+
+    def test_dashboard_markup_restored(self):
+        lines = [("title", "CPU"), [("default", "Core 0: "), ("temp_red", "99%")], "plain"]
+        (decoded,) = read_frames(myrktop.encode_frame(lines), 1)
+        self.assertEqual([myrktop.markup_from_json(line) for line in decoded], lines)
+
+
+class HandshakeTest(unittest.TestCase):
+    def test_agent_and_viewer(self):
+        summary = {"host": "board1", "time": 0, "cpu_max": 40, "cpu_avg": 20.0, "gpu": 5, "npu": [0, 70],
+                   "temp_max": 55.0, "temp_sensor": "soc_thermal", "net_rx": 1.0, "net_tx": 2.0, "stale": []}
+        dashboard = [("title", "🔥 System Monitor"), [("default", "GPU "), ("temp_yellow", "65%")]]
+
+        async def exchange():
+            agent = myrktop.FleetAgent()
+            agent.summary_frame = myrktop.encode_frame(summary)
+            agent.dashboard_frame = myrktop.encode_frame(dashboard)
+            server = await asyncio.start_server(agent.handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            conn = myrktop.AgentConnection(f"127.0.0.1:{port}")
+            conn.want_dashboard = True
+            task = asyncio.ensure_future(conn.run(0.01, timeout=2.0))
+            try:
+                for _ in range(200):
+                    if conn.dashboard is not None:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                task.cancel()
+                server.close()
+                await server.wait_closed()
+            return conn
+
+        conn = asyncio.run(exchange())
+        self.assertIsNone(conn.error)
+        self.assertEqual(conn.summary, summary)
+        self.assertEqual(conn.name, "board1")
+        self.assertEqual(conn.dashboard, dashboard)
+        self.assertIn(("temp_yellow", " 70%"), myrktop.fleet_row(conn))
+
+    def test_unreachable_agent(self):
+        async def exchange():
+            server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            server.close()
+            await server.wait_closed()
+            conn = myrktop.AgentConnection(f"127.0.0.1:{port}")
+            task = asyncio.ensure_future(conn.run(0.01, timeout=2.0))
+            for _ in range(200):
+                if conn.error != "connecting":
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+            return conn
+
+        conn = asyncio.run(exchange())
+        self.assertNotIn(conn.error, (None, "connecting"))
+        self.assertTrue(myrktop.fleet_row(conn)[1][1].startswith("offline ("))
+
+    def test_status_without_error_text(self):
+        conn = myrktop.AgentConnection("board1:7071")
+        conn.error = None
+        self.assertEqual(myrktop.fleet_row(conn)[1], ("bad", "never connected"))
+
+
+if __name__ == "__main__":
+    unittest.main()